@@ -5,19 +5,40 @@ import json
 import re
 import anthropic
 from datetime import datetime
-from flask import Flask, request, jsonify
+from flask import Flask, request, jsonify, Response, stream_with_context
 from collections import defaultdict
 from dotenv import load_dotenv
 from itertools import combinations
 from functools import lru_cache
 import time
+import io
+import contextvars
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from tracing import init_tracing, span, record_llm_usage
+from jobs import JobManager, JobQueueFull
 app = Flask(__name__)
+init_tracing(app)
 load_dotenv()
 ANTHROPIC_API_KEY = os.environ.get("ANTHROPIC_API_KEY")  
 if not ANTHROPIC_API_KEY:
     raise ValueError("ANTHROPIC_API_KEY environment variable is required")
 
 client = anthropic.Anthropic(api_key=ANTHROPIC_API_KEY) 
+job_manager = JobManager()
+
+BATCH_MAX_QUESTIONS = int(os.environ.get("CRM_BATCH_MAX_QUESTIONS", 20))
+BATCH_MAX_CONCURRENCY = int(os.environ.get("CRM_BATCH_CONCURRENCY", 6))
+BATCH_COMBINED_GROUP_SIZE = 3
+
+# Prompt caching: set to "1h" to keep dataset contexts cached between slower follow-up questions
+PROMPT_CACHE_TTL = os.environ.get("CRM_PROMPT_CACHE_TTL")
+
+def prompt_cache_control():
+    cache_control = {"type": "ephemeral"}
+    if PROMPT_CACHE_TTL:
+        cache_control["ttl"] = PROMPT_CACHE_TTL
+    return cache_control
+
 class DataSchemaAnalyzer:
     def __init__(self, df):
         self.df = df
@@ -1361,70 +1382,181 @@ class SmartRAGAssistant:
                 richest_field = field_name
         return richest_field or list(combined_fields.keys())[0]
     
-    def answer_question(self, question):
-        try:
+    def prepare_answer(self, question, data_context=None):
+        """Returns (answer, None) when the question can be answered locally, else (None, Claude request kwargs)"""
+        with span("deterministic_answer"):
             specific_analysis = self.handle_specific_question_types(question)
-            if specific_analysis:
-                return specific_analysis
-            
-            data_context = self.create_data_context()
-            
-            # Prepare prompt with caching optimization
-            static_template, variable_data = self.create_rag_prompt(question, data_context, return_split=True)
-            
-            # Prepare messages with cache control for prompt caching
-            system_message = "You are Transformellica's Smart Business Intelligence Assistant for CRM Intelligence. You are a senior BI/marketing strategist who converts raw CRM and transaction datasets into business-impact insights, prioritized actions, and measurable KPIs."
-            
-            # User message with split content (static template cached, variable data not cached)
-            user_content = [
+        if specific_analysis:
+            return specific_analysis, None
+        
+        if data_context is None:
+            with span("data_context"):
+                data_context = self.create_data_context()
+        
+        return None, self.build_claude_request(question, data_context)
+    
+    @staticmethod
+    def build_claude_request(question, data_context, extra_instructions="", max_tokens=5000):
+        # Prepare prompt with caching optimization
+        with span("prompt_build") as prompt_span:
+            static_template, dataset_context, question_block = SmartRAGAssistant.create_rag_prompt(question, data_context, return_split=True)
+            question_block += extra_instructions
+            prompt_span.set(prompt_chars=len(static_template) + len(dataset_context) + len(question_block))
+        
+        # Prepare messages with cache control for prompt caching
+        system_message = "You are Transformellica's Smart Business Intelligence Assistant for CRM Intelligence. You are a senior BI/marketing strategist who converts raw CRM and transaction datasets into business-impact insights, prioritized actions, and measurable KPIs."
+        
+        # User message in cacheable layers: template (shared by every dataset), then the
+        # dataset context (shared by every question on this dataset), then the uncached question
+        user_content = [
+            {
+                "type": "text",
+                "text": static_template,
+                "cache_control": prompt_cache_control()  # Cache static template
+            },
+            {
+                "type": "text",
+                "text": dataset_context,
+                "cache_control": prompt_cache_control()  # Cache per-dataset context
+            },
+            {
+                "type": "text",
+                "text": question_block
+                # No cache_control - the question changes per request
+            }
+        ]
+        
+        claude_request = {
+            "model": "claude-3-5-haiku-latest",
+            "max_tokens": max_tokens,
+            "temperature": 0.7,
+            "system": [
                 {
                     "type": "text",
-                    "text": static_template,
-                    "cache_control": {"type": "ephemeral"}  # Cache static template
-                },
+                    "text": system_message,
+                    "cache_control": prompt_cache_control()  # Cache system message
+                }
+            ],
+            "messages": [
                 {
-                    "type": "text",
-                    "text": variable_data
-                    # No cache_control - variable data (question + data context) changes per request
+                    "role": "user",
+                    "content": user_content
                 }
             ]
+        }
+        return claude_request
+    
+    def prepare_batch(self, questions, combined=False):
+        """
+        Batch form of prepare_answer: the data context is built once and shared by every question.
+        Returns (answers, units) where answers maps question index -> local answer and each unit is
+        (indices, Claude request, data context). In combined mode a unit answers up to
+        BATCH_COMBINED_GROUP_SIZE questions. The data context travels with the unit rather than on
+        the assistant so concurrent batches never see each other's context.
+        """
+        answers = {}
+        pending = []
+        for index, question in enumerate(questions):
+            with span("deterministic_answer"):
+                specific_analysis = self.handle_specific_question_types(question)
+            if specific_analysis:
+                answers[index] = specific_analysis
+            else:
+                pending.append(index)
+        
+        units = []
+        if pending:
+            with span("data_context"):
+                data_context = self.create_data_context()
             
-            response = self.client.messages.create(
-                model="claude-3-5-haiku-latest",
-                max_tokens=5000,
-                temperature=0.7,
-                system=[
-                    {
-                        "type": "text",
-                        "text": system_message,
-                        "cache_control": {"type": "ephemeral"}  # Cache system message
-                    }
-                ],
-                messages=[
-                    {
-                        "role": "user",
-                        "content": user_content
-                    }
-                ]
-            )
+            if combined and len(pending) > 1:
+                for start in range(0, len(pending), BATCH_COMBINED_GROUP_SIZE):
+                    group = pending[start:start + BATCH_COMBINED_GROUP_SIZE]
+                    units.append((group, self.build_combined_claude_request([questions[i] for i in group], data_context), data_context))
+            else:
+                for index in pending:
+                    units.append(([index], self.build_claude_request(questions[index], data_context), data_context))
+        
+        return answers, units
+    
+    def build_combined_claude_request(self, questions, data_context):
+        numbered = "\n".join(f"{position + 1}. {question}" for position, question in enumerate(questions))
+        extra_instructions = f"""
+MULTIPLE QUESTIONS: The user question above is a numbered list of {len(questions)} separate questions. Answer each one independently using the JSON schema above, and return a single JSON object of the form:
+
+{{"answers": [<answer object for question 1>, <answer object for question 2>, ...]}}
+
+The "answers" array must contain exactly {len(questions)} objects in the same order as the questions.
+"""
+        return self.build_claude_request(numbered, data_context, extra_instructions=extra_instructions, max_tokens=8192)
+    
+    @staticmethod
+    def parse_batch_rag_response(response_text, questions):
+        """Split a combined answer into per-question results; questions missing from the reply are omitted"""
+        clean_response = response_text.strip()
+        if clean_response.startswith('```json'):
+            clean_response = clean_response[7:-3]
+        elif clean_response.startswith('```'):
+            clean_response = clean_response[3:-3]
+        
+        try:
+            parsed = json.loads(clean_response)
+        except json.JSONDecodeError:
+            return {}
+        
+        items = parsed.get('answers', []) if isinstance(parsed, dict) else parsed
+        if not isinstance(items, list):
+            return {}
+        
+        results = {}
+        for position, item in enumerate(items[:len(questions)]):
+            if isinstance(item, dict):
+                results[position] = SmartRAGAssistant.parse_rag_response(json.dumps(item), questions[position])
+        return results
+    
+    def complete_unit(self, indices, claude_request, questions, data_context):
+        """Run one batch unit against Claude and return {question index: result}"""
+        try:
+            with span("llm_call") as llm_span:
+                response = self.client.messages.create(**claude_request)
+                llm_span.set(**record_llm_usage("rag_batch", getattr(response, "usage", None)))
+        except Exception as e:
+            error_msg = claude_error_message(e)
+            return {index: self.fallback_answer(questions[index], error_msg) for index in indices}
+        
+        with span("response_parse"):
+            if len(indices) == 1:
+                return {indices[0]: self.parse_rag_response(response.content[0].text, questions[indices[0]])}
+            
+            parsed = self.parse_batch_rag_response(response.content[0].text, [questions[index] for index in indices])
+        
+        results = {indices[position]: result for position, result in parsed.items()}
+        for index in indices:
+            if index not in results:
+                # The combined reply did not cover this question; ask it on its own
+                single_request = self.build_claude_request(questions[index], data_context)
+                results.update(self.complete_unit([index], single_request, questions, data_context))
+        return results
+    
+    def answer_question(self, question):
+        try:
+            answer, claude_request = self.prepare_answer(question)
+            if answer:
+                return answer
             
-            parsed_response = self.parse_rag_response(response.content[0].text, question)
+            with span("llm_call") as llm_span:
+                response = self.client.messages.create(**claude_request)
+                llm_span.set(**record_llm_usage("rag_answer", getattr(response, "usage", None)))
+            
+            with span("response_parse"):
+                parsed_response = self.parse_rag_response(response.content[0].text, question)
             return parsed_response
             
-        except anthropic.RateLimitError:
-            return self.fallback_answer(question, "Claude rate limit exceeded")
-        except anthropic.AuthenticationError:
-            return self.fallback_answer(question, "Claude authentication failed")
-        except anthropic.BadRequestError as e:
-            return self.fallback_answer(question, f"Invalid Claude request: {str(e)}")
-        except anthropic.APIConnectionError:
-            return self.fallback_answer(question, "Failed to connect to Claude API")
-        except anthropic.APIError as e:
-            return self.fallback_answer(question, f"Claude API error: {str(e)}")
         except Exception as e:
-            return self.fallback_answer(question, str(e))
+            return self.fallback_answer(question, claude_error_message(e))
         
-    def create_rag_prompt(self, question, data_context, return_split=False):
+    @staticmethod
+    def create_rag_prompt(question, data_context, return_split=False):
         """Create RAG prompt with optional splitting for caching using new business-focused format"""
         
         # Static template (instructions, format) - this can be cached
@@ -1527,8 +1659,8 @@ Final Instructions:
 
 Now analyze the following data context and answer the user's question:"""
         
-        # Variable data (changes per request) - this should NOT be cached
-        variable_data = f"""
+        # Dataset context (identical for every question on the same dataset) - cached separately
+        dataset_context = f"""
 BUSINESS CONTEXT:
 
 - Domain: {data_context['metadata']['business_domain']}
@@ -1560,18 +1692,22 @@ DATA QUALITY METRICS:
 SAMPLE DATA (First {len(data_context['sample_data'])} records):
 
 {json.dumps(data_context['sample_data'], indent=2)}
-
+"""
+        
+        # Question (changes per request) - this should NOT be cached
+        question_block = f"""
 USER QUESTION: "{question}"
 """
         
         if return_split:
-            return (static_template, variable_data)
+            return (static_template, dataset_context, question_block)
         
         return f"""{static_template}
 
-{variable_data}"""
+{dataset_context}{question_block}"""
     
-    def parse_rag_response(self, response_text, original_question):
+    @staticmethod
+    def parse_rag_response(response_text, original_question):
         """Parse RAG response - handles both new and old format for compatibility"""
         try:
             clean_response = response_text.strip()
@@ -1585,7 +1721,7 @@ USER QUESTION: "{question}"
             # Check if it's the new format (has 'summary' and 'dataset_overview')
             if 'summary' in parsed and 'dataset_overview' in parsed:
                 # New format - convert to old format for compatibility
-                return self._convert_new_format_to_old(parsed)
+                return SmartRAGAssistant._convert_new_format_to_old(parsed)
             else:
                 # Old format - handle as before
                 confidence = parsed.get('confidence', 0.7)
@@ -1617,7 +1753,8 @@ USER QUESTION: "{question}"
                 "follow_up_questions": []
             }
     
-    def _convert_new_format_to_old(self, new_format_data):
+    @staticmethod
+    def _convert_new_format_to_old(new_format_data):
         """Convert new CRM prompt format to old format for compatibility"""
         # Extract summary as analysis
         analysis = new_format_data.get('summary', '')
@@ -1726,10 +1863,7 @@ USER QUESTION: "{question}"
         key_findings.append(f"Data is {completeness:.1f}% complete")
         relevant_stats["data_completeness"] = completeness
         
-        if error_msg:
-            analysis += f"Note: Enhanced AI analysis failed ({error_msg}), providing basic analysis."
-        
-        return {
+        return note_fallback_error({
             "analysis": analysis,
             "confidence": 0.3,
             "key_findings": key_findings,
@@ -1745,7 +1879,54 @@ USER QUESTION: "{question}"
                 "What specific aspect would you like to explore?",
                 "Would you like to see data quality details?"
             ]
+        }, error_msg)
+
+def note_fallback_error(answer, error_msg):
+    """Add the Claude failure note to a fallback answer (fallbacks can be built before the call is made)"""
+    if not error_msg:
+        return answer
+    return dict(answer, analysis=answer["analysis"] + f"Note: Enhanced AI analysis failed ({error_msg}), providing basic analysis.")
+
+def parse_batch_questions(form):
+    """Accepts repeated 'questions' fields or one JSON array of strings / {"question": ...} objects"""
+    values = form.getlist('questions')
+    if len(values) == 1 and values[0].strip().startswith('['):
+        values = json.loads(values[0])
+    
+    questions = []
+    for value in values:
+        if isinstance(value, dict):
+            value = value.get('question', '')
+        value = str(value).strip()
+        if value:
+            questions.append(value)
+    return questions
+
+def iter_batch_answers(assistant, questions, answers, units, trace_context=None):
+    """
+    Yield (question index, result) for local answers first, then Claude answers as each completes.
+    A unit that raises yields a fallback answer for each of its questions instead of ending the stream.
+    """
+    for index in sorted(answers):
+        yield index, answers[index]
+    
+    if not units:
+        return
+    
+    trace_context = trace_context or contextvars.copy_context()
+    with ThreadPoolExecutor(max_workers=min(BATCH_MAX_CONCURRENCY, len(units))) as pool:
+        futures = {
+            pool.submit(trace_context.copy().run, assistant.complete_unit, indices, claude_request, questions, data_context): indices
+            for indices, claude_request, data_context in units
         }
+        for future in as_completed(futures):
+            try:
+                results = future.result()
+            except Exception as e:
+                error_msg = claude_error_message(e)
+                results = {index: assistant.fallback_answer(questions[index], error_msg) for index in futures[future]}
+            for index, result in sorted(results.items()):
+                yield index, result
 
 def format_response_structure(rag_result):    
     relevant_statistics = []
@@ -1797,80 +1978,102 @@ def format_response_structure(rag_result):
         "actionableInsights": actionable_insights,
         "followUpQuestions": rag_result.get('follow_up_questions', [])
     }
-def generate_dashboard_insights(df, schema_analysis):
-    try:
-        client = anthropic.Anthropic(api_key=ANTHROPIC_API_KEY)
-        
+def claude_error_message(error):
+    if isinstance(error, anthropic.RateLimitError):
+        return "Claude rate limit exceeded"
+    if isinstance(error, anthropic.AuthenticationError):
+        return "Claude authentication failed"
+    if isinstance(error, anthropic.BadRequestError):
+        return f"Invalid Claude request: {str(error)}"
+    if isinstance(error, anthropic.APIConnectionError):
+        return "Failed to connect to Claude API"
+    if isinstance(error, anthropic.APIError):
+        return f"Claude API error: {str(error)}"
+    return str(error)
+
+def prepare_dashboard(df, schema_analysis):
+    """CPU part of dashboard generation: the Claude request plus every section derived from df"""
+    with span("data_context"):
         data_context = create_dashboard_context(df, schema_analysis)
-        
-        # Prepare prompt with caching optimization
+    
+    # Prepare prompt with caching optimization
+    with span("prompt_build") as prompt_span:
         static_template, variable_data = create_dashboard_prompt(data_context, return_split=True)
-        
-        # Prepare messages with cache control for prompt caching
-        # System message with cache control
-        system_message = "You are a Business Intelligence Dashboard Generator."
-        
-        # User message with split content (static template cached, variable data not cached)
-        user_content = [
+        prompt_span.set(prompt_chars=len(static_template) + len(variable_data))
+    
+    # Prepare messages with cache control for prompt caching
+    # System message with cache control
+    system_message = "You are a Business Intelligence Dashboard Generator."
+    
+    # User message in cacheable layers: template, then the per-dataset context with its own breakpoint
+    # so regenerating the dashboard for the same dataset reads both from the cache
+    user_content = [
+        {
+            "type": "text",
+            "text": static_template,
+            "cache_control": prompt_cache_control()  # Cache static template
+        },
+        {
+            "type": "text",
+            "text": variable_data,
+            "cache_control": prompt_cache_control()  # Cache per-dataset context
+        }
+    ]
+    
+    claude_request = {
+        "model": "claude-3-5-haiku-latest",
+        "max_tokens": 5000,
+        "temperature": 0.7,
+        "system": [
             {
                 "type": "text",
-                "text": static_template,
-                "cache_control": {"type": "ephemeral"}  # Cache static template
-            },
+                "text": system_message,
+                "cache_control": prompt_cache_control()  # Cache system message
+            }
+        ],
+        "messages": [
             {
-                "type": "text",
-                "text": variable_data
-                # No cache_control - variable data changes per request
+                "role": "user",
+                "content": user_content
             }
         ]
-        
-        response = client.messages.create(
-            model="claude-3-5-haiku-latest",
-            max_tokens=5000,
-            temperature=0.7,
-            system=[
-                {
-                    "type": "text",
-                    "text": system_message,
-                    "cache_control": {"type": "ephemeral"}  # Cache system message
-                }
-            ],
-            messages=[
-                {
-                    "role": "user",
-                    "content": user_content
-                }
-            ]
-        )
-        
-        ai_insights_raw = parse_dashboard_response(response.content[0].text)
+    }
+    
+    with span("kpi_metrics"):
+        calculated_metrics = calculate_dashboard_metrics(df, schema_analysis)
+    
+    with span("chart_build"):
+        sections = {
+            "keyPerformanceMetrics": calculated_metrics,
+            "quickStats": generate_quick_stats(df, schema_analysis),
+            "analytics": generate_analytics_summary(df),
+            "charts": build_dashboard_charts(df, schema_analysis),
+            "fallbackInsights": generate_fallback_insights(df, schema_analysis)
+        }
+    
+    return claude_request, sections
+
+def finish_dashboard(response_text, sections):
+    with span("response_parse"):
+        ai_insights_raw = parse_dashboard_response(response_text)
         
         # Convert new format to old format for compatibility
         ai_insights = convert_dashboard_response_format(ai_insights_raw)
+    
+    return assemble_dashboard(ai_insights, sections)
+
+def generate_dashboard_insights(df, schema_analysis):
+    try:
+        claude_request, sections = prepare_dashboard(df, schema_analysis)
         
-        calculated_metrics = calculate_dashboard_metrics(df, schema_analysis)
-        
-        dashboard_data = merge_dashboard_data(ai_insights, calculated_metrics, df, schema_analysis)
+        with span("llm_call") as llm_span:
+            response = client.messages.create(**claude_request)
+            llm_span.set(**record_llm_usage("dashboard", getattr(response, "usage", None)))
         
-        return dashboard_data
+        return finish_dashboard(response.content[0].text, sections)
         
-    except anthropic.RateLimitError:
-        print("Claude rate limit exceeded for dashboard generation")
-        return generate_fallback_dashboard(df, schema_analysis)
-    except anthropic.AuthenticationError:
-        print("Claude authentication failed for dashboard generation")
-        return generate_fallback_dashboard(df, schema_analysis)
-    except anthropic.BadRequestError as e:
-        print(f"Invalid Claude request for dashboard: {str(e)}")
-        return generate_fallback_dashboard(df, schema_analysis)
-    except anthropic.APIConnectionError:
-        print("Failed to connect to Claude API for dashboard generation")
-        return generate_fallback_dashboard(df, schema_analysis)
-    except anthropic.APIError as e:
-        print(f"Claude API error for dashboard: {str(e)}")
-        return generate_fallback_dashboard(df, schema_analysis)
     except Exception as e:
-        print(f"Claude dashboard generation failed: {str(e)}")
+        print(f"Claude dashboard generation failed: {claude_error_message(e)}")
         return generate_fallback_dashboard(df, schema_analysis)
 
 def filter_meaningful_columns(df):
@@ -2113,7 +2316,7 @@ Final Instructions
 
 Now analyze the following data context:"""
     
-    # Variable data (changes per request) - this should NOT be cached
+    # Dataset context (identical for every request on the same dataset) - cached separately
     variable_data = f"""
 BUSINESS CONTEXT:
 
@@ -2363,27 +2566,28 @@ def generate_analytics_summary(df):
     
     return analytics
 
-def merge_dashboard_data(ai_insights, calculated_metrics, df, schema_analysis):
+def assemble_dashboard(ai_insights, sections):
     
     if not ai_insights:
-        ai_insights = generate_fallback_insights(df, schema_analysis)
+        ai_insights = sections["fallbackInsights"]
     
     return {
         "keyBusinessInsights": {
             "primaryInsights": ai_insights.get("primaryInsights", []),
-            "quickStats": generate_quick_stats(df, schema_analysis)
+            "quickStats": sections["quickStats"]
         },
-        "keyPerformanceMetrics": calculated_metrics,
+        "keyPerformanceMetrics": sections["keyPerformanceMetrics"],
         "businessRecommendations": {
             "actionableInsights": ai_insights.get("actionableInsights", []),
             "nextSteps": ai_insights.get("nextSteps", [])
         },
-        "analytics": generate_analytics_summary(df),
-        **build_dashboard_charts(df, schema_analysis)
+        "analytics": sections["analytics"],
+        **sections["charts"]
     }
 
 def generate_fallback_dashboard(df, schema_analysis):
-    return generate_fallback_insights_full(df, schema_analysis)
+    with span("fallback_dashboard"):
+        return generate_fallback_insights_full(df, schema_analysis)
 
 def generate_fallback_insights(df, schema_analysis):
     domain = schema_analysis.get('business_domain', 'general business')
@@ -2627,42 +2831,224 @@ def build_dashboard_charts(df, schema_analysis):
             "pieChart": "false",
             "pieChartData": {"title": "Category Share", "colorCodes": [], "data": []}
         }
-@app.route('/ai/upload', methods=['POST'])
-def upload():
-    try:
-        if 'data' not in request.files:
-            return jsonify({
-                "status": "error",
-                "message": "No file part in the request"
-            }), 400
+class CsvUploadError(ValueError):
+    pass
+
+def load_csv_dataframe(data_file):
+    """Parse an uploaded CSV (file object or raw bytes) and raise CsvUploadError if it is unusable"""
+    if isinstance(data_file, (bytes, bytearray)):
+        data_file = io.BytesIO(data_file)
+    df = read_csv_upload(data_file)
+
+    if df is None:
+        raise CsvUploadError("Could not parse CSV with any tried encoding/delimiter")
+    if df.empty:
+        raise CsvUploadError("Converted DataFrame is empty")
+    if len(df.columns) == 0:
+        raise CsvUploadError("No columns found in data")
+    return df
+
+def summarize_upload(df, schema_analysis):
+    with span("profiling"):
+        metrics = calculate_data_metrics(df)
+    return {
+        "domain": schema_analysis.get("business_domain"),
+        "total_rows": metrics.get("total_rows"),
+        "total_columns": metrics.get("total_columns"),
+        "missing_data_ratio": metrics.get("missing_data_ratio"),
+        "num_numeric_columns": metrics.get("num_numeric_columns")
+    }
 
-        data = request.files['data']
-        if data.filename == '':
-            return jsonify({
-                "status": "error",
-                "message": "No file selected"
-            }), 400
+def build_smart_questions(df):
+    with span("column_filtering"):
+        meaningful_cols = filter_meaningful_columns(df)
+    additional_excluded = set()
+    phone_email_keywords = [
+        'phone', 'mobile', 'telephone', 'tel', 'whatsapp', 'fax',
+        'contact', 'contact_no', 'contact_number', 'email', 'e-mail'
+    ]
+    for col in meaningful_cols:
+        lower = col.lower().strip()
+        if any(k in lower for k in phone_email_keywords):
+            additional_excluded.add(col)
+            continue
+        try:
+            if df[col].dtype in ['object', 'string']:
+                total = len(df)
+                if total > 0:
+                    uniq_ratio = df[col].nunique(dropna=True) / total
+                    if uniq_ratio > 0.95:
+                        additional_excluded.add(col)
+                        continue
+        except Exception:
+            pass
+
+    pruned_cols = [c for c in meaningful_cols if c not in additional_excluded]
+    df_meaningful = df[pruned_cols] if pruned_cols else df[meaningful_cols]
+
+    with span("schema_analysis"):
+        schema_analyzer = DataSchemaAnalyzer(df_meaningful)
+        schema_analysis = schema_analyzer.analyze_schema()
+
+    with span("question_generation"):
+        smart_questions = generate_smart_questions(df_meaningful, schema_analysis)
+
+    return smart_questions
+
+def build_pattern_initial(df, schema_analysis):
+    with span("transaction_extraction") as extraction_span:
+        pattern_analyzer = UniversalMarketBasketAnalyzer(df, schema_analysis)
+        extraction_span.set(transactions=len(pattern_analyzer.transactions))
+    
+    transactions_found = len(pattern_analyzer.transactions)
+    transactional_patterns_detected = transactions_found > 0
+    
+    avg_items_per_transaction = 0
+    if transactions_found > 0:
+        avg_items_per_transaction = np.mean([len(t) for t in pattern_analyzer.transactions])
+
+    response_data = {
+        "transactionalPatternsDetected": transactional_patterns_detected,
+        "data": {
+            "transactionsFound": transactions_found,
+            "avgItemsPerTransaction": round(avg_items_per_transaction, 1)
+        }
+    }
+
+    return response_data
+
+def build_pattern_analysis(df, schema_analysis, min_support=0.05, min_confidence=0.5, max_itemset_size=3, progress=None):
+    with span("transaction_extraction") as extraction_span:
+        pattern_analyzer = UniversalMarketBasketAnalyzer(df, schema_analysis)
+        extraction_span.set(transactions=len(pattern_analyzer.transactions))
+    
+    if not pattern_analyzer.transactions:
+        return {
+            "foundPatterns": False,
+            "issueIfNoPatternsFound": "No suitable transactional patterns detected in this dataset. Pattern Analysis works best with data that has comma-separated values in text fields, multiple items per record, or categorical associations.",
+            "data": {
+                "significantPatternsCount": 0,
+                "topAssociationPatterns": [],
+                "businessInsights": {
+                    "keyFindings": ["No transactional data patterns found in the dataset"],
+                    "recommendations": [
+                        "Ensure data contains comma-separated values or multiple items per record",
+                        "Check for fields with categorical associations",
+                        "Consider restructuring data to include transactional relationships"
+                    ]
+                }
+            }
+        }
 
-        encodings = ["utf-8", "latin-1", "utf-8-sig", "cp1252", "utf-16"]
-        delimiters = [",", ";"] 
+    if progress:
+        progress(50, "Mining association patterns")
+    with span("pattern_mining") as mining_span:
+        frequent_itemsets, association_rules = pattern_analyzer.analyze_patterns(
+            min_support=min_support, 
+            min_confidence=min_confidence, 
+            max_itemset_size=max_itemset_size
+        )
+        mining_span.set(itemsets=len(frequent_itemsets), rules=len(association_rules))
+    
+    if not association_rules:
+        issue_message = f"No significant patterns found with minimum support of {min_support*100:.0f}%. Try lowering the minimum support threshold or ensure your data contains meaningful associations."
+        
+        return {
+            "foundPatterns": False,
+            "issueIfNoPatternsFound": issue_message,
+            "data": {
+                "significantPatternsCount": 0,
+                "topAssociationPatterns": [],
+                "businessInsights": {
+                    "keyFindings": [
+                        f"Analyzed {len(pattern_analyzer.transactions)} transactional patterns",
+                        f"No patterns met the {min_support*100:.0f}% minimum support threshold"
+                    ],
+                    "recommendations": [
+                        "Lower the minimum support threshold to discover weaker patterns",
+                        "Examine data quality and ensure meaningful associations exist",
+                        "Consider different data preprocessing approaches"
+                    ]
+                }
+            }
+        }
 
+    association_rules.sort(key=lambda x: x['confidence'], reverse=True)
+    
+    top_association_patterns = []
+    for rule in association_rules[:10]:
+        top_association_patterns.append({
+            "whenWeSee": " + ".join(rule['antecedent']),
+            "weOftenFind": " + ".join(rule['consequent']),
+            "confidence": round(rule['confidence'], 3),
+            "lift": round(rule['lift'], 2)
+        })
+
+    domain = schema_analysis.get('business_domain', 'general business')
+    primary_entity = schema_analysis.get('primary_entity', 'record')
+    if progress:
+        progress(90, "Generating business insights")
+    with span("insight_generation"):
+        key_findings, recommendations = generate_pattern_business_insights(association_rules, domain, primary_entity)
+
+    response_data = {
+        "foundPatterns": True,
+        "issueIfNoPatternsFound": "",
+        "data": {
+            "significantPatternsCount": len(association_rules),
+            "topAssociationPatterns": top_association_patterns,
+            "businessInsights": {
+                "keyFindings": key_findings,
+                "recommendations": recommendations
+            }
+        }
+    }
+
+    return response_data
+
+def read_csv_upload(data_file):
+    encodings = ["utf-8", "latin-1", "utf-8-sig", "cp1252", "utf-16"]
+    delimiters = [",", ";"]
+
+    with span("csv_parse") as parse_span:
         df = None
         for encoding in encodings:
             for delimiter in delimiters:
-                data.stream.seek(0)  
+                getattr(data_file, "stream", data_file).seek(0)
                 try:
                     df = pd.read_csv(
-                        data,
+                        data_file,
                         encoding=encoding,
                         delimiter=delimiter,
                         on_bad_lines="skip"
                     )
                     print(f"Successfully read CSV with encoding={encoding}, delimiter='{delimiter}'")
-                    break 
+                    break
                 except Exception as e:
                     print(f"Failed with encoding={encoding}, delimiter='{delimiter}':", e)
             if df is not None:
-                break  
+                break
+        if df is not None:
+            parse_span.set(rows=len(df), columns=len(df.columns))
+    return df
+
+@app.route('/ai/upload', methods=['POST'])
+def upload():
+    try:
+        if 'data' not in request.files:
+            return jsonify({
+                "status": "error",
+                "message": "No file part in the request"
+            }), 400
+
+        data = request.files['data']
+        if data.filename == '':
+            return jsonify({
+                "status": "error",
+                "message": "No file selected"
+            }), 400
+
+        df = read_csv_upload(data)
 
         if df is None:
             return jsonify({
@@ -2682,17 +3068,11 @@ def upload():
                 "message": "No columns found in data"
             }), 400
 
-        schema_analyzer = DataSchemaAnalyzer(df)  
-        schema_analysis = schema_analyzer.analyze_schema()
+        with span("schema_analysis"):
+            schema_analyzer = DataSchemaAnalyzer(df)
+            schema_analysis = schema_analyzer.analyze_schema()
 
-        metrics = calculate_data_metrics(df)  
-        response_data = {
-            "domain": schema_analysis.get("business_domain"),
-            "total_rows": metrics.get("total_rows"),
-            "total_columns": metrics.get("total_columns"),
-            "missing_data_ratio": metrics.get("missing_data_ratio"),
-            "num_numeric_columns": metrics.get("num_numeric_columns")
-        }
+        response_data = summarize_upload(df, schema_analysis)
 
         return jsonify(response_data), 200
 
@@ -2732,26 +3112,7 @@ def smart_question_example():
                 "message": "No file selected"
             }), 400
 
-        encodings = ["utf-8", "latin-1", "utf-8-sig", "cp1252", "utf-16"]
-        delimiters = [",", ";"]
-
-        df = None
-        for encoding in encodings:
-            for delimiter in delimiters:
-                data.stream.seek(0)
-                try:
-                    df = pd.read_csv(
-                        data,
-                        encoding=encoding,
-                        delimiter=delimiter,
-                        on_bad_lines="skip"
-                    )
-                    print(f"Successfully read CSV with encoding={encoding}, delimiter='{delimiter}'")
-                    break
-                except Exception as e:
-                    print(f"Failed with encoding={encoding}, delimiter='{delimiter}':", e)
-            if df is not None:
-                break
+        df = read_csv_upload(data)
 
         if df is None:
             return jsonify({
@@ -2771,35 +3132,7 @@ def smart_question_example():
                 "message": "No columns found in data"
             }), 400
 
-        meaningful_cols = filter_meaningful_columns(df)
-        additional_excluded = set()
-        phone_email_keywords = [
-            'phone', 'mobile', 'telephone', 'tel', 'whatsapp', 'fax',
-            'contact', 'contact_no', 'contact_number', 'email', 'e-mail'
-        ]
-        for col in meaningful_cols:
-            lower = col.lower().strip()
-            if any(k in lower for k in phone_email_keywords):
-                additional_excluded.add(col)
-                continue
-            try:
-                if df[col].dtype in ['object', 'string']:
-                    total = len(df)
-                    if total > 0:
-                        uniq_ratio = df[col].nunique(dropna=True) / total
-                        if uniq_ratio > 0.95:
-                            additional_excluded.add(col)
-                            continue
-            except Exception:
-                pass
-
-        pruned_cols = [c for c in meaningful_cols if c not in additional_excluded]
-        df_meaningful = df[pruned_cols] if pruned_cols else df[meaningful_cols]
-
-        schema_analyzer = DataSchemaAnalyzer(df_meaningful)
-        schema_analysis = schema_analyzer.analyze_schema()
-
-        smart_questions = generate_smart_questions(df_meaningful, schema_analysis)
+        smart_questions = build_smart_questions(df)
 
         return jsonify(smart_questions), 200
 
@@ -2832,26 +3165,7 @@ def question_answer():
                 "message": "Question is required"
             }), 400
 
-        encodings = ["utf-8", "latin-1", "utf-8-sig", "cp1252", "utf-16"]
-        delimiters = [",", ";"]
-
-        df = None
-        for encoding in encodings:
-            for delimiter in delimiters:
-                data_file.stream.seek(0)
-                try:
-                    df = pd.read_csv(
-                        data_file,
-                        encoding=encoding,
-                        delimiter=delimiter,
-                        on_bad_lines="skip"
-                    )
-                    print(f"Successfully read CSV with encoding={encoding}, delimiter='{delimiter}'")
-                    break
-                except Exception as e:
-                    print(f"Failed with encoding={encoding}, delimiter='{delimiter}':", e)
-            if df is not None:
-                break
+        df = read_csv_upload(data_file)
 
         if df is None:
             return jsonify({
@@ -2871,8 +3185,9 @@ def question_answer():
                 "message": "No columns found in data"
             }), 400
 
-        schema_analyzer = DataSchemaAnalyzer(df)
-        schema_analysis = schema_analyzer.analyze_schema()
+        with span("schema_analysis"):
+            schema_analyzer = DataSchemaAnalyzer(df)
+            schema_analysis = schema_analyzer.analyze_schema()
 
         rag_assistant = SmartRAGAssistant(df, schema_analysis)
         rag_result = rag_assistant.answer_question(question)
@@ -2881,6 +3196,83 @@ def question_answer():
 
         return jsonify(formatted_response), 200
 
+    except Exception as e:
+        print(f"Unexpected error: {str(e)}")
+        return jsonify({
+            "status": "error",
+            "message": f"Unexpected error: {str(e)}"
+        }), 500
+@app.route('/ai/question-answer-batch', methods=['POST'])
+def question_answer_batch():
+    try:
+        if 'data' not in request.files:
+            return jsonify({
+                "status": "error",
+                "message": "No file part in the request"
+            }), 400
+
+        data_file = request.files['data']
+        if data_file.filename == '':
+            return jsonify({
+                "status": "error",
+                "message": "No file selected"
+            }), 400
+
+        try:
+            questions = parse_batch_questions(request.form)
+        except json.JSONDecodeError as e:
+            return jsonify({
+                "status": "error",
+                "message": f"Invalid JSON format: {str(e)}"
+            }), 400
+
+        if not questions:
+            return jsonify({
+                "status": "error",
+                "message": "At least one question is required"
+            }), 400
+
+        if len(questions) > BATCH_MAX_QUESTIONS:
+            return jsonify({
+                "status": "error",
+                "message": f"At most {BATCH_MAX_QUESTIONS} questions can be answered per batch"
+            }), 400
+
+        combined = request.form.get('combined', 'false').lower() == 'true'
+
+        try:
+            df = load_csv_dataframe(data_file)
+        except CsvUploadError as e:
+            return jsonify({
+                "status": "error",
+                "message": str(e)
+            }), 400
+
+        with span("schema_analysis"):
+            schema_analyzer = DataSchemaAnalyzer(df)
+            schema_analysis = schema_analyzer.analyze_schema()
+
+        rag_assistant = SmartRAGAssistant(df, schema_analysis)
+        answers, units = rag_assistant.prepare_batch(questions, combined=combined)
+        trace_context = contextvars.copy_context()
+
+        def stream_response():
+            for index, result in iter_batch_answers(rag_assistant, questions, answers, units, trace_context):
+                yield "data: "+json.dumps({
+                    "index": index,
+                    "question": questions[index],
+                    "answer": format_response_structure(result)
+                }, default=str)+'\n\n'
+            yield "data: "+json.dumps({"done": True, "total": len(questions)})+'\n\n'
+
+        response = Response(
+            stream_with_context(stream_response()),
+            mimetype="text/event-stream",
+        )
+        response.headers["Cache-Control"] = "no-cache, no-transform"
+        response.headers["X-Accel-Buffering"] = "no"
+        return response
+
     except Exception as e:
         print(f"Unexpected error: {str(e)}")
         return jsonify({
@@ -2903,26 +3295,7 @@ def dashboard_data():
                 "message": "No file selected"
             }), 400
 
-        encodings = ["utf-8", "latin-1", "utf-8-sig", "cp1252", "utf-16"]
-        delimiters = [",", ";"]
-
-        df = None
-        for encoding in encodings:
-            for delimiter in delimiters:
-                data_file.stream.seek(0)
-                try:
-                    df = pd.read_csv(
-                        data_file,
-                        encoding=encoding,
-                        delimiter=delimiter,
-                        on_bad_lines="skip"
-                    )
-                    print(f"Successfully read CSV with encoding={encoding}, delimiter='{delimiter}'")
-                    break
-                except Exception as e:
-                    print(f"Failed with encoding={encoding}, delimiter='{delimiter}':", e)
-            if df is not None:
-                break
+        df = read_csv_upload(data_file)
 
         if df is None:
             return jsonify({
@@ -2942,8 +3315,9 @@ def dashboard_data():
                 "message": "No columns found in data"
             }), 400
 
-        schema_analyzer = DataSchemaAnalyzer(df)
-        schema_analysis = schema_analyzer.analyze_schema()
+        with span("schema_analysis"):
+            schema_analyzer = DataSchemaAnalyzer(df)
+            schema_analysis = schema_analyzer.analyze_schema()
         
         dashboard_insights = generate_dashboard_insights(df, schema_analysis)
         
@@ -2971,26 +3345,7 @@ def pattern_analysis_initial():
                 "message": "No file selected"
             }), 400
 
-        encodings = ["utf-8", "latin-1", "utf-8-sig", "cp1252", "utf-16"]
-        delimiters = [",", ";"]
-
-        df = None
-        for encoding in encodings:
-            for delimiter in delimiters:
-                data_file.stream.seek(0)
-                try:
-                    df = pd.read_csv(
-                        data_file,
-                        encoding=encoding,
-                        delimiter=delimiter,
-                        on_bad_lines="skip"
-                    )
-                    print(f"Successfully read CSV with encoding={encoding}, delimiter='{delimiter}'")
-                    break
-                except Exception as e:
-                    print(f"Failed with encoding={encoding}, delimiter='{delimiter}':", e)
-            if df is not None:
-                break
+        df = read_csv_upload(data_file)
 
         if df is None:
             return jsonify({
@@ -3010,25 +3365,11 @@ def pattern_analysis_initial():
                 "message": "No columns found in data"
             }), 400
 
-        schema_analyzer = DataSchemaAnalyzer(df)
-        schema_analysis = schema_analyzer.analyze_schema()
+        with span("schema_analysis"):
+            schema_analyzer = DataSchemaAnalyzer(df)
+            schema_analysis = schema_analyzer.analyze_schema()
 
-        pattern_analyzer = UniversalMarketBasketAnalyzer(df, schema_analysis)
-        
-        transactions_found = len(pattern_analyzer.transactions)
-        transactional_patterns_detected = transactions_found > 0
-        
-        avg_items_per_transaction = 0
-        if transactions_found > 0:
-            avg_items_per_transaction = np.mean([len(t) for t in pattern_analyzer.transactions])
-
-        response_data = {
-            "transactionalPatternsDetected": transactional_patterns_detected,
-            "data": {
-                "transactionsFound": transactions_found,
-                "avgItemsPerTransaction": round(avg_items_per_transaction, 1)
-            }
-        }
+        response_data = build_pattern_initial(df, schema_analysis)
 
         return jsonify(response_data), 200
 
@@ -3059,26 +3400,7 @@ def pattern_analysis_analyze():
         min_confidence = float(request.form.get('min_confidence', 0.5))
         max_itemset_size = int(request.form.get('max_itemset_size', 3))
 
-        encodings = ["utf-8", "latin-1", "utf-8-sig", "cp1252", "utf-16"]
-        delimiters = [",", ";"]
-
-        df = None
-        for encoding in encodings:
-            for delimiter in delimiters:
-                data_file.stream.seek(0)
-                try:
-                    df = pd.read_csv(
-                        data_file,
-                        encoding=encoding,
-                        delimiter=delimiter,
-                        on_bad_lines="skip"
-                    )
-                    print(f"Successfully read CSV with encoding={encoding}, delimiter='{delimiter}'")
-                    break
-                except Exception as e:
-                    print(f"Failed with encoding={encoding}, delimiter='{delimiter}':", e)
-            if df is not None:
-                break
+        df = read_csv_upload(data_file)
 
         if df is None:
             return jsonify({
@@ -3098,87 +3420,101 @@ def pattern_analysis_analyze():
                 "message": "No columns found in data"
             }), 400
 
-        schema_analyzer = DataSchemaAnalyzer(df)
-        schema_analysis = schema_analyzer.analyze_schema()
-
-        pattern_analyzer = UniversalMarketBasketAnalyzer(df, schema_analysis)
-        
-        if not pattern_analyzer.transactions:
-            return jsonify({
-                "foundPatterns": False,
-                "issueIfNoPatternsFound": "No suitable transactional patterns detected in this dataset. Pattern Analysis works best with data that has comma-separated values in text fields, multiple items per record, or categorical associations.",
-                "data": {
-                    "significantPatternsCount": 0,
-                    "topAssociationPatterns": [],
-                    "businessInsights": {
-                        "keyFindings": ["No transactional data patterns found in the dataset"],
-                        "recommendations": [
-                            "Ensure data contains comma-separated values or multiple items per record",
-                            "Check for fields with categorical associations",
-                            "Consider restructuring data to include transactional relationships"
-                        ]
-                    }
-                }
-            }), 200
+        with span("schema_analysis"):
+            schema_analyzer = DataSchemaAnalyzer(df)
+            schema_analysis = schema_analyzer.analyze_schema()
 
-        frequent_itemsets, association_rules = pattern_analyzer.analyze_patterns(
-            min_support=min_support, 
-            min_confidence=min_confidence, 
+        response_data = build_pattern_analysis(
+            df,
+            schema_analysis,
+            min_support=min_support,
+            min_confidence=min_confidence,
             max_itemset_size=max_itemset_size
         )
-        
-        if not association_rules:
-            issue_message = f"No significant patterns found with minimum support of {min_support*100:.0f}%. Try lowering the minimum support threshold or ensure your data contains meaningful associations."
-            
-            return jsonify({
-                "foundPatterns": False,
-                "issueIfNoPatternsFound": issue_message,
-                "data": {
-                    "significantPatternsCount": 0,
-                    "topAssociationPatterns": [],
-                    "businessInsights": {
-                        "keyFindings": [
-                            f"Analyzed {len(pattern_analyzer.transactions)} transactional patterns",
-                            f"No patterns met the {min_support*100:.0f}% minimum support threshold"
-                        ],
-                        "recommendations": [
-                            "Lower the minimum support threshold to discover weaker patterns",
-                            "Examine data quality and ensure meaningful associations exist",
-                            "Consider different data preprocessing approaches"
-                        ]
-                    }
-                }
-            }), 200
 
-        association_rules.sort(key=lambda x: x['confidence'], reverse=True)
-        
-        top_association_patterns = []
-        for rule in association_rules[:10]:
-            top_association_patterns.append({
-                "whenWeSee": " + ".join(rule['antecedent']),
-                "weOftenFind": " + ".join(rule['consequent']),
-                "confidence": round(rule['confidence'], 3),
-                "lift": round(rule['lift'], 2)
-            })
+        return jsonify(response_data), 200
 
-        domain = schema_analysis.get('business_domain', 'general business')
-        primary_entity = schema_analysis.get('primary_entity', 'record')
-        key_findings, recommendations = generate_pattern_business_insights(association_rules, domain, primary_entity)
+    except Exception as e:
+        print(f"Unexpected error: {str(e)}")
+        return jsonify({
+            "status": "error",
+            "message": f"Unexpected error: {str(e)}"
+        }), 500
 
-        response_data = {
-            "foundPatterns": True,
-            "issueIfNoPatternsFound": "",
-            "data": {
-                "significantPatternsCount": len(association_rules),
-                "topAssociationPatterns": top_association_patterns,
-                "businessInsights": {
-                    "keyFindings": key_findings,
-                    "recommendations": recommendations
-                }
-            }
+def run_pattern_analysis_job(job, payload_path, params):
+    job.progress(5, "Parsing CSV")
+    with open(payload_path, 'rb') as f:
+        df = load_csv_dataframe(f.read())
+
+    job.progress(20, "Analyzing schema")
+    with span("schema_analysis"):
+        schema_analysis = DataSchemaAnalyzer(df).analyze_schema()
+
+    job.progress(30, "Extracting transactions")
+    return build_pattern_analysis(df, schema_analysis, progress=job.progress, **params)
+
+def run_dashboard_job(job, payload_path, params):
+    job.progress(5, "Parsing CSV")
+    with open(payload_path, 'rb') as f:
+        df = load_csv_dataframe(f.read())
+
+    job.progress(20, "Analyzing schema")
+    with span("schema_analysis"):
+        schema_analysis = DataSchemaAnalyzer(df).analyze_schema()
+
+    job.progress(40, "Generating dashboard insights")
+    return generate_dashboard_insights(df, schema_analysis)
+
+def submit_job(kind, handler, params, lane):
+    if 'data' not in request.files:
+        return jsonify({
+            "status": "error",
+            "message": "No file part in the request"
+        }), 400
+
+    data_file = request.files['data']
+    if data_file.filename == '':
+        return jsonify({
+            "status": "error",
+            "message": "No file selected"
+        }), 400
+
+    try:
+        job = job_manager.submit(kind, handler, data_file.read(), params, lane=lane)
+    except JobQueueFull as e:
+        return jsonify({
+            "status": "error",
+            "message": str(e)
+        }), 429
+
+    return jsonify({
+        "jobId": job["jobId"],
+        "status": job["status"],
+        "statusUrl": f"/ai/jobs/{job['jobId']}",
+        "eventsUrl": f"/ai/jobs/{job['jobId']}/events"
+    }), 200 if job["status"] == "completed" else 202
+
+@app.route('/ai/jobs/pattern-analysis', methods=['POST'])
+def submit_pattern_analysis_job():
+    try:
+        params = {
+            "min_support": float(request.form.get('min_support', 0.05)),
+            "min_confidence": float(request.form.get('min_confidence', 0.5)),
+            "max_itemset_size": int(request.form.get('max_itemset_size', 3))
         }
+        return submit_job("pattern-analysis", run_pattern_analysis_job, params, lane="cpu")
 
-        return jsonify(response_data), 200
+    except Exception as e:
+        print(f"Unexpected error: {str(e)}")
+        return jsonify({
+            "status": "error",
+            "message": f"Unexpected error: {str(e)}"
+        }), 500
+
+@app.route('/ai/jobs/dashboard-data', methods=['POST'])
+def submit_dashboard_job():
+    try:
+        return submit_job("dashboard-data", run_dashboard_job, {}, lane="io")
 
     except Exception as e:
         print(f"Unexpected error: {str(e)}")
@@ -3187,5 +3523,35 @@ def pattern_analysis_analyze():
             "message": f"Unexpected error: {str(e)}"
         }), 500
 
+@app.route('/ai/jobs/<job_id>', methods=['GET'])
+def get_job(job_id):
+    job = job_manager.get(job_id)
+    if job is None:
+        return jsonify({
+            "status": "error",
+            "message": "Job not found"
+        }), 404
+    return jsonify(job), 200
+
+@app.route('/ai/jobs/<job_id>/events', methods=['GET'])
+def stream_job(job_id):
+    if job_manager.get(job_id) is None:
+        return jsonify({
+            "status": "error",
+            "message": "Job not found"
+        }), 404
+
+    def stream_response():
+        for job in job_manager.stream(job_id):
+            yield "data: "+json.dumps(job)+'\n\n'
+
+    response = Response(
+        stream_with_context(stream_response()),
+        mimetype="text/event-stream",
+    )
+    response.headers["Cache-Control"] = "no-cache, no-transform"
+    response.headers["X-Accel-Buffering"] = "no"
+    return response
+
 if __name__ == "__main__":
     app.run(host="0.0.0.0", port= os.environ.get("PORT"), debug=True)
@@ -0,0 +1,472 @@
+"""
+ASGI entry point for the CRM service: uvicorn asgi:app
+Routes are coroutines with the same contracts as app.py. Pandas and pattern
+mining run in a process pool sized to the host's cores and Claude calls are
+awaited on the event loop, so a single worker keeps many requests in flight.
+"""
+
+import os
+import json
+import asyncio
+import contextvars
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+import anthropic
+from quart import Quart, request, jsonify, Response
+import app as crm
+from jobs import JobQueueFull, FINISHED_STATUSES
+from tracing import span, record_llm_usage, run_traced, replay_spans, start_request_trace, finish_request_trace, render_metrics
+
+CPU_WORKERS = int(os.environ.get("CRM_ASGI_CPU_WORKERS", os.cpu_count() or 1))
+START_METHOD = os.environ.get("CRM_ASGI_START_METHOD", "spawn")
+
+app = Quart(__name__)
+async_client = anthropic.AsyncAnthropic(api_key=crm.ANTHROPIC_API_KEY)
+cpu_executor = None
+
+
+@app.before_serving
+async def start_cpu_executor():
+    global cpu_executor
+    cpu_executor = ProcessPoolExecutor(
+        max_workers=CPU_WORKERS,
+        mp_context=multiprocessing.get_context(START_METHOD)
+    )
+
+
+@app.after_serving
+async def stop_cpu_executor():
+    if cpu_executor is not None:
+        cpu_executor.shutdown(wait=False, cancel_futures=True)
+
+
+@app.before_request
+async def start_trace():
+    start_request_trace(request.endpoint)
+
+
+@app.after_request
+async def finish_trace(response):
+    server_timing = finish_request_trace(response.status_code)
+    if server_timing:
+        response.headers["Server-Timing"] = server_timing
+    return response
+
+
+async def run_cpu(stage, fn, *args):
+    """Run fn in the process pool; the stage spans it opens there are replayed into this request"""
+    loop = asyncio.get_running_loop()
+    with span(stage):
+        result, spans = await loop.run_in_executor(cpu_executor, run_traced, fn, *args)
+    replay_spans(spans)
+    return result
+
+
+async def call_claude(stage, claude_request):
+    with span("llm_call") as llm_span:
+        response = await async_client.messages.create(**claude_request)
+        llm_span.set(**record_llm_usage(stage, getattr(response, "usage", None)))
+    return response
+
+
+# CPU-side work executed in the process pool. Each function takes the raw
+# upload bytes so only bytes and plain results cross the process boundary.
+# The upload is parsed once per request: anything a later step may need from
+# the dataframe (fallback answers) is computed in the same call.
+
+def _schema_for(df):
+    return crm.DataSchemaAnalyzer(df).analyze_schema()
+
+
+def _upload(payload):
+    df = crm.load_csv_dataframe(payload)
+    return crm.summarize_upload(df, _schema_for(df))
+
+
+def _smart_questions(payload):
+    return crm.build_smart_questions(crm.load_csv_dataframe(payload))
+
+
+def _prepare_answer(payload, question):
+    """Returns (answer, Claude request, fallback answer used if the Claude call fails)"""
+    df = crm.load_csv_dataframe(payload)
+    assistant = crm.SmartRAGAssistant(df, _schema_for(df))
+    try:
+        answer, claude_request = assistant.prepare_answer(question)
+    except Exception as e:
+        return assistant.fallback_answer(question, str(e)), None, None
+    if answer:
+        return answer, None, None
+    return None, claude_request, assistant.fallback_answer(question)
+
+
+def _parse_answer(response_text, question):
+    return crm.SmartRAGAssistant.parse_rag_response(response_text, question)
+
+
+def _prepare_batch(payload, questions, combined):
+    """Returns (local answers, units, {question index: fallback answer})"""
+    df = crm.load_csv_dataframe(payload)
+    assistant = crm.SmartRAGAssistant(df, _schema_for(df))
+    answers, units = assistant.prepare_batch(questions, combined=combined)
+    fallbacks = {index: assistant.fallback_answer(questions[index]) for indices, _, _ in units for index in indices}
+    return answers, units, fallbacks
+
+
+def _parse_batch(response_text, questions):
+    return crm.SmartRAGAssistant.parse_batch_rag_response(response_text, questions)
+
+
+def _prepare_dashboard(payload):
+    df = crm.load_csv_dataframe(payload)
+    schema_analysis = _schema_for(df)
+    try:
+        claude_request, sections = crm.prepare_dashboard(df, schema_analysis)
+        return claude_request, sections, None
+    except Exception as e:
+        print(f"Claude dashboard generation failed: {str(e)}")
+        return None, None, crm.generate_fallback_dashboard(df, schema_analysis)
+
+
+def _pattern_initial(payload):
+    df = crm.load_csv_dataframe(payload)
+    return crm.build_pattern_initial(df, _schema_for(df))
+
+
+def _pattern_analysis(payload, params):
+    df = crm.load_csv_dataframe(payload)
+    return crm.build_pattern_analysis(df, _schema_for(df), **params)
+
+
+async def read_upload():
+    """Returns (payload, error_response)"""
+    files = await request.files
+    if 'data' not in files:
+        return None, (jsonify({
+            "status": "error",
+            "message": "No file part in the request"
+        }), 400)
+
+    data_file = files['data']
+    if data_file.filename == '':
+        return None, (jsonify({
+            "status": "error",
+            "message": "No file selected"
+        }), 400)
+
+    return data_file.read(), None
+
+
+def upload_error(e):
+    return jsonify({
+        "status": "error",
+        "message": str(e)
+    }), 400
+
+
+def unexpected_error(e):
+    print(f"Unexpected error: {str(e)}")
+    return jsonify({
+        "status": "error",
+        "message": f"Unexpected error: {str(e)}"
+    }), 500
+
+
+@app.route('/ai/upload', methods=['POST'])
+async def upload():
+    try:
+        payload, error = await read_upload()
+        if error:
+            return error
+        return jsonify(await run_cpu("cpu_upload", _upload, payload)), 200
+    except crm.CsvUploadError as e:
+        return upload_error(e)
+    except Exception as e:
+        return unexpected_error(e)
+
+
+@app.route('/ai/smart-question-examples', methods=['POST'])
+async def smart_question_example():
+    try:
+        payload, error = await read_upload()
+        if error:
+            return error
+        return jsonify(await run_cpu("cpu_smart_questions", _smart_questions, payload)), 200
+    except crm.CsvUploadError as e:
+        return upload_error(e)
+    except Exception as e:
+        return unexpected_error(e)
+
+
+async def answer_question(payload, question):
+    answer, claude_request, fallback = await run_cpu("cpu_prepare_answer", _prepare_answer, payload, question)
+    if answer:
+        return answer
+    try:
+        response = await call_claude("rag_answer", claude_request)
+    except Exception as e:
+        return crm.note_fallback_error(fallback, crm.claude_error_message(e))
+    with span("response_parse"):
+        return _parse_answer(response.content[0].text, question)
+
+
+@app.route('/ai/question-answer', methods=['POST'])
+async def question_answer():
+    try:
+        payload, error = await read_upload()
+        if error:
+            return error
+
+        form = await request.form
+        question = form.get('question')
+        if not question:
+            return jsonify({
+                "status": "error",
+                "message": "Question is required"
+            }), 400
+
+        rag_result = await answer_question(payload, question)
+        return jsonify(crm.format_response_structure(rag_result)), 200
+    except crm.CsvUploadError as e:
+        return upload_error(e)
+    except Exception as e:
+        return unexpected_error(e)
+
+
+async def complete_unit(indices, claude_request, questions, data_context, fallbacks):
+    """Async counterpart of SmartRAGAssistant.complete_unit"""
+    try:
+        response = await call_claude("rag_batch", claude_request)
+    except Exception as e:
+        error_msg = crm.claude_error_message(e)
+        return {index: crm.note_fallback_error(fallbacks[index], error_msg) for index in indices}
+
+    with span("response_parse"):
+        if len(indices) == 1:
+            return {indices[0]: _parse_answer(response.content[0].text, questions[indices[0]])}
+        parsed = _parse_batch(response.content[0].text, [questions[index] for index in indices])
+
+    results = {indices[position]: result for position, result in parsed.items()}
+    for index in indices:
+        if index not in results:
+            single_request = crm.SmartRAGAssistant.build_claude_request(questions[index], data_context)
+            results.update(await complete_unit([index], single_request, questions, data_context, fallbacks))
+    return results
+
+
+@app.route('/ai/question-answer-batch', methods=['POST'])
+async def question_answer_batch():
+    try:
+        payload, error = await read_upload()
+        if error:
+            return error
+
+        form = await request.form
+        try:
+            questions = crm.parse_batch_questions(form)
+        except json.JSONDecodeError as e:
+            return jsonify({
+                "status": "error",
+                "message": f"Invalid JSON format: {str(e)}"
+            }), 400
+
+        if not questions:
+            return jsonify({
+                "status": "error",
+                "message": "At least one question is required"
+            }), 400
+
+        if len(questions) > crm.BATCH_MAX_QUESTIONS:
+            return jsonify({
+                "status": "error",
+                "message": f"At most {crm.BATCH_MAX_QUESTIONS} questions can be answered per batch"
+            }), 400
+
+        combined = form.get('combined', 'false').lower() == 'true'
+        answers, units, fallbacks = await run_cpu("cpu_prepare_batch", _prepare_batch, payload, questions, combined)
+    except crm.CsvUploadError as e:
+        return upload_error(e)
+    except Exception as e:
+        return unexpected_error(e)
+
+    semaphore = asyncio.Semaphore(crm.BATCH_MAX_CONCURRENCY)
+    # The body is streamed after finish_trace has cleared the request trace, so units run in a copy
+    # of the request's context to keep their spans on this route
+    trace_context = contextvars.copy_context()
+
+    async def run_unit(indices, claude_request, data_context):
+        async with semaphore:
+            try:
+                return await complete_unit(indices, claude_request, questions, data_context, fallbacks)
+            except Exception as e:
+                error_msg = crm.claude_error_message(e)
+                return {index: crm.note_fallback_error(fallbacks[index], error_msg) for index in indices}
+
+    def event(index, result):
+        return "data: "+json.dumps({
+            "index": index,
+            "question": questions[index],
+            "answer": crm.format_response_structure(result)
+        }, default=str)+'\n\n'
+
+    async def stream_response():
+        for index in sorted(answers):
+            yield event(index, answers[index])
+        loop = asyncio.get_running_loop()
+        tasks = [loop.create_task(run_unit(*unit), context=trace_context.copy()) for unit in units]
+        try:
+            for finished in asyncio.as_completed(tasks):
+                for index, result in sorted((await finished).items()):
+                    yield event(index, result)
+        finally:
+            for task in tasks:
+                task.cancel()
+        yield "data: "+json.dumps({"done": True, "total": len(questions)})+'\n\n'
+
+    response = Response(stream_response(), mimetype="text/event-stream")
+    response.headers["Cache-Control"] = "no-cache, no-transform"
+    response.headers["X-Accel-Buffering"] = "no"
+    return response
+
+
+@app.route('/ai/dashboard-data', methods=['POST'])
+async def dashboard_data():
+    try:
+        payload, error = await read_upload()
+        if error:
+            return error
+
+        claude_request, sections, fallback = await run_cpu("cpu_prepare_dashboard", _prepare_dashboard, payload)
+        if fallback is not None:
+            return jsonify(fallback), 200
+
+        try:
+            response = await call_claude("dashboard", claude_request)
+        except Exception as e:
+            print(f"Claude dashboard generation failed: {crm.claude_error_message(e)}")
+            return jsonify(crm.assemble_dashboard({}, sections)), 200
+
+        return jsonify(crm.finish_dashboard(response.content[0].text, sections)), 200
+    except crm.CsvUploadError as e:
+        return upload_error(e)
+    except Exception as e:
+        return unexpected_error(e)
+
+
+@app.route('/ai/pattern-analysis-initial', methods=['POST'])
+async def pattern_analysis_initial():
+    try:
+        payload, error = await read_upload()
+        if error:
+            return error
+        return jsonify(await run_cpu("cpu_pattern_initial", _pattern_initial, payload)), 200
+    except crm.CsvUploadError as e:
+        return upload_error(e)
+    except Exception as e:
+        return unexpected_error(e)
+
+
+@app.route('/ai/pattern-analysis-analyze', methods=['POST'])
+async def pattern_analysis_analyze():
+    try:
+        payload, error = await read_upload()
+        if error:
+            return error
+
+        form = await request.form
+        params = {
+            "min_support": float(form.get('min_support', 0.05)),
+            "min_confidence": float(form.get('min_confidence', 0.5)),
+            "max_itemset_size": int(form.get('max_itemset_size', 3))
+        }
+        return jsonify(await run_cpu("cpu_pattern_analysis", _pattern_analysis, payload, params)), 200
+    except crm.CsvUploadError as e:
+        return upload_error(e)
+    except Exception as e:
+        return unexpected_error(e)
+
+
+async def submit_job(kind, handler, params, lane):
+    payload, error = await read_upload()
+    if error:
+        return error
+    try:
+        job = await asyncio.to_thread(crm.job_manager.submit, kind, handler, payload, params, lane)
+    except JobQueueFull as e:
+        return jsonify({
+            "status": "error",
+            "message": str(e)
+        }), 429
+
+    return jsonify({
+        "jobId": job["jobId"],
+        "status": job["status"],
+        "statusUrl": f"/ai/jobs/{job['jobId']}",
+        "eventsUrl": f"/ai/jobs/{job['jobId']}/events"
+    }), 200 if job["status"] == "completed" else 202
+
+
+@app.route('/ai/jobs/pattern-analysis', methods=['POST'])
+async def submit_pattern_analysis_job():
+    try:
+        form = await request.form
+        params = {
+            "min_support": float(form.get('min_support', 0.05)),
+            "min_confidence": float(form.get('min_confidence', 0.5)),
+            "max_itemset_size": int(form.get('max_itemset_size', 3))
+        }
+        return await submit_job("pattern-analysis", crm.run_pattern_analysis_job, params, "cpu")
+    except Exception as e:
+        return unexpected_error(e)
+
+
+@app.route('/ai/jobs/dashboard-data', methods=['POST'])
+async def submit_dashboard_job():
+    try:
+        return await submit_job("dashboard-data", crm.run_dashboard_job, {}, "io")
+    except Exception as e:
+        return unexpected_error(e)
+
+
+@app.route('/ai/jobs/<job_id>', methods=['GET'])
+async def get_job(job_id):
+    job = await asyncio.to_thread(crm.job_manager.get, job_id)
+    if job is None:
+        return jsonify({
+            "status": "error",
+            "message": "Job not found"
+        }), 404
+    return jsonify(job), 200
+
+
+@app.route('/ai/jobs/<job_id>/events', methods=['GET'])
+async def stream_job(job_id):
+    if await asyncio.to_thread(crm.job_manager.get, job_id) is None:
+        return jsonify({
+            "status": "error",
+            "message": "Job not found"
+        }), 404
+
+    async def stream_response():
+        last_seen = None
+        while True:
+            job = await asyncio.to_thread(crm.job_manager.get, job_id)
+            if job is None:
+                return
+            marker = (job["status"], job["progress"], job["message"])
+            if marker != last_seen:
+                last_seen = marker
+                yield "data: "+json.dumps(job)+'\n\n'
+            if job["status"] in FINISHED_STATUSES:
+                return
+            await asyncio.sleep(0.5)
+
+    response = Response(stream_response(), mimetype="text/event-stream")
+    response.headers["Cache-Control"] = "no-cache, no-transform"
+    response.headers["X-Accel-Buffering"] = "no"
+    return response
+
+
+@app.route('/metrics', methods=['GET'])
+async def metrics_endpoint():
+    return Response(render_metrics(), mimetype="text/plain; version=0.0.4")
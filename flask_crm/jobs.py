@@ -0,0 +1,327 @@
+"""
+Background job subsystem for long-running CRM analyses.
+Jobs are persisted in a local SQLite database so every gunicorn worker can
+answer status polls, and completed results are reused for identical
+submissions. CPU-bound work runs in a process pool, LLM-bound work in a
+thread pool; no external broker is required.
+"""
+
+import os
+import json
+import time
+import uuid
+import sqlite3
+import hashlib
+import threading
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from tracing import run_traced, replay_spans
+
+JOBS_DIR = os.environ.get("CRM_JOBS_DIR", "/tmp/crm_jobs")
+CPU_WORKERS = int(os.environ.get("CRM_JOB_CPU_WORKERS", max(1, (os.cpu_count() or 2) // 2)))
+IO_WORKERS = int(os.environ.get("CRM_JOB_IO_WORKERS", 8))
+MAX_PENDING = int(os.environ.get("CRM_JOB_MAX_PENDING", 32))
+RESULT_TTL_SECONDS = int(os.environ.get("CRM_JOB_RESULT_TTL", 24 * 3600))
+START_METHOD = os.environ.get("CRM_JOB_START_METHOD", "spawn")
+# Live jobs are touched this often by the worker that owns them; a queued or running job whose
+# heartbeat is older than STALE_AFTER_SECONDS lost its worker (crash, OOM kill, redeploy)
+HEARTBEAT_INTERVAL = float(os.environ.get("CRM_JOB_HEARTBEAT_INTERVAL", 10))
+STALE_AFTER_SECONDS = float(os.environ.get("CRM_JOB_STALE_AFTER", 60))
+
+STATUS_QUEUED = "queued"
+STATUS_RUNNING = "running"
+STATUS_COMPLETED = "completed"
+STATUS_FAILED = "failed"
+FINISHED_STATUSES = (STATUS_COMPLETED, STATUS_FAILED)
+
+
+class JobQueueFull(Exception):
+    pass
+
+
+class JobStore:
+    """SQLite-backed job records shared by all worker processes"""
+
+    def __init__(self, jobs_dir=JOBS_DIR):
+        self.jobs_dir = jobs_dir
+        os.makedirs(jobs_dir, exist_ok=True)
+        self.db_path = os.path.join(jobs_dir, "jobs.sqlite3")
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS jobs (
+                    id TEXT PRIMARY KEY,
+                    kind TEXT NOT NULL,
+                    cache_key TEXT NOT NULL,
+                    status TEXT NOT NULL,
+                    progress INTEGER NOT NULL DEFAULT 0,
+                    message TEXT,
+                    result TEXT,
+                    error TEXT,
+                    created_at REAL NOT NULL,
+                    updated_at REAL NOT NULL,
+                    owner_pid INTEGER,
+                    heartbeat_at REAL
+                )
+            """)
+            columns = {row[1] for row in conn.execute("PRAGMA table_info(jobs)")}
+            for column, column_type in (("owner_pid", "INTEGER"), ("heartbeat_at", "REAL")):
+                if column not in columns:
+                    conn.execute(f"ALTER TABLE jobs ADD COLUMN {column} {column_type}")
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_jobs_cache_key ON jobs (cache_key, created_at)")
+
+    def _connect(self):
+        return sqlite3.connect(self.db_path, timeout=30)
+
+    def create(self, kind, cache_key):
+        now = time.time()
+        job_id = uuid.uuid4().hex
+        with self._connect() as conn:
+            conn.execute(
+                "INSERT INTO jobs (id, kind, cache_key, status, progress, message, created_at, updated_at, owner_pid, heartbeat_at) "
+                "VALUES (?, ?, ?, ?, 0, ?, ?, ?, ?, ?)",
+                (job_id, kind, cache_key, STATUS_QUEUED, "Queued", now, now, os.getpid(), now)
+            )
+        return self.get(job_id)
+
+    def get(self, job_id):
+        """The job record; a queued/running job whose heartbeat went stale is failed first, so polls and streams end"""
+        with self._connect() as conn:
+            conn.row_factory = sqlite3.Row
+            row = conn.execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone()
+            if row is None:
+                return None
+            if row["status"] in (STATUS_QUEUED, STATUS_RUNNING) and self._is_stale(row):
+                self.fail_stale()
+                row = conn.execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        return self._row_to_job(row)
+
+    @staticmethod
+    def _is_stale(row):
+        last_seen = row["heartbeat_at"] if row["heartbeat_at"] is not None else row["updated_at"]
+        return last_seen < time.time() - STALE_AFTER_SECONDS
+
+    def find_reusable(self, cache_key):
+        """Latest job for the same input that is still in flight or completed within the TTL"""
+        self.fail_stale()
+        with self._connect() as conn:
+            conn.row_factory = sqlite3.Row
+            row = conn.execute(
+                "SELECT * FROM jobs WHERE cache_key = ? AND status != ? AND created_at >= ? ORDER BY created_at DESC LIMIT 1",
+                (cache_key, STATUS_FAILED, time.time() - RESULT_TTL_SECONDS)
+            ).fetchone()
+        return self._row_to_job(row) if row else None
+
+    def update(self, job_id, **fields):
+        if "result" in fields and fields["result"] is not None:
+            fields["result"] = json.dumps(fields["result"], default=str)
+        fields["updated_at"] = time.time()
+        assignments = ", ".join(f"{key} = ?" for key in fields)
+        with self._connect() as conn:
+            conn.execute(f"UPDATE jobs SET {assignments} WHERE id = ?", (*fields.values(), job_id))
+
+    def heartbeat(self, job_ids):
+        if not job_ids:
+            return
+        placeholders = ", ".join("?" for _ in job_ids)
+        with self._connect() as conn:
+            conn.execute(f"UPDATE jobs SET heartbeat_at = ? WHERE id IN ({placeholders})", (time.time(), *job_ids))
+
+    def fail_stale(self):
+        """Mark queued/running jobs whose owner stopped sending heartbeats as failed, so they are not reused"""
+        now = time.time()
+        with self._connect() as conn:
+            cursor = conn.execute(
+                """
+                UPDATE jobs SET status = ?, message = ?, error = ?, updated_at = ?
+                WHERE status IN (?, ?) AND COALESCE(heartbeat_at, updated_at) < ?
+                """,
+                (STATUS_FAILED, "Failed", "Job was abandoned by its worker", now,
+                 STATUS_QUEUED, STATUS_RUNNING, now - STALE_AFTER_SECONDS)
+            )
+        if cursor.rowcount:
+            print(f"Marked {cursor.rowcount} abandoned job(s) as failed")
+
+    def purge_expired(self):
+        with self._connect() as conn:
+            conn.execute(
+                "DELETE FROM jobs WHERE status IN (?, ?) AND updated_at < ?",
+                (STATUS_COMPLETED, STATUS_FAILED, time.time() - RESULT_TTL_SECONDS)
+            )
+
+    @staticmethod
+    def _row_to_job(row):
+        return {
+            "jobId": row["id"],
+            "kind": row["kind"],
+            "status": row["status"],
+            "progress": row["progress"],
+            "message": row["message"],
+            "result": json.loads(row["result"]) if row["result"] else None,
+            "error": row["error"],
+            "createdAt": row["created_at"],
+            "updatedAt": row["updated_at"],
+        }
+
+
+class JobContext:
+    """Handed to job handlers so they can report progress"""
+
+    def __init__(self, store, job_id):
+        self.store = store
+        self.job_id = job_id
+
+    def progress(self, percent, message):
+        self.store.update(self.job_id, progress=int(percent), message=message)
+
+
+def _execute_job(jobs_dir, job_id, handler, payload_path, params):
+    """Run the handler in a lane worker; returns its stage spans so the submitting process can record them"""
+    store = JobStore(jobs_dir)
+    job = JobContext(store, job_id)
+    store.update(job_id, status=STATUS_RUNNING, message="Started", heartbeat_at=time.time())
+    try:
+        result, spans = run_traced(handler, job, payload_path, params)
+        store.update(job_id, status=STATUS_COMPLETED, progress=100, message="Completed", result=result)
+        return spans
+    except Exception as e:
+        print(f"Job {job_id} failed: {str(e)}")
+        store.update(job_id, status=STATUS_FAILED, message="Failed", error=str(e))
+        return []
+    finally:
+        try:
+            os.remove(payload_path)
+        except OSError:
+            pass
+
+
+class JobManager:
+    """
+    Submits jobs to one of two bounded lanes:
+    - "cpu": process pool for pandas/pattern mining work
+    - "io": thread pool for work dominated by Claude calls
+    Pools are created lazily so each gunicorn worker owns its own. While a job is
+    queued or running, a heartbeat thread in the submitting worker keeps it alive.
+    """
+
+    def __init__(self, jobs_dir=JOBS_DIR, cpu_workers=CPU_WORKERS, io_workers=IO_WORKERS, max_pending=MAX_PENDING):
+        self.store = JobStore(jobs_dir)
+        self.cpu_workers = cpu_workers
+        self.io_workers = io_workers
+        self.max_pending = max_pending
+        self._pools = {}
+        self._pending = 0
+        self._inflight = set()
+        self._heartbeat_thread = None
+        self._lock = threading.Lock()
+        # Jobs left behind by a worker that died before this one started
+        self.store.fail_stale()
+
+    def _pool(self, lane):
+        """The lane's executor; a process pool broken by a dead worker is replaced here"""
+        with self._lock:
+            pool = self._pools.get(lane)
+            if getattr(pool, "_broken", False):
+                pool.shutdown(wait=False)
+                del self._pools[lane]
+            if lane not in self._pools:
+                if lane == "cpu":
+                    self._pools[lane] = ProcessPoolExecutor(
+                        max_workers=self.cpu_workers,
+                        mp_context=multiprocessing.get_context(START_METHOD)
+                    )
+                else:
+                    self._pools[lane] = ThreadPoolExecutor(max_workers=self.io_workers, thread_name_prefix="crm-job")
+            return self._pools[lane]
+
+    @staticmethod
+    def cache_key(kind, payload, params):
+        digest = hashlib.sha256()
+        digest.update(kind.encode("utf-8"))
+        digest.update(json.dumps(params, sort_keys=True).encode("utf-8"))
+        digest.update(payload)
+        return digest.hexdigest()
+
+    def submit(self, kind, handler, payload, params, lane="cpu"):
+        """Queue handler(job, payload_path, params); returns the job record (possibly a reused one)"""
+        self.store.purge_expired()
+        cache_key = self.cache_key(kind, payload, params)
+        existing = self.store.find_reusable(cache_key)
+        if existing:
+            return existing
+
+        with self._lock:
+            if self._pending >= self.max_pending:
+                raise JobQueueFull(f"Too many pending jobs ({self._pending}), try again later")
+            self._pending += 1
+
+        job = self.store.create(kind, cache_key)
+        self._track(job["jobId"])
+        payload_path = os.path.join(self.store.jobs_dir, f"{job['jobId']}.payload")
+        with open(payload_path, "wb") as f:
+            f.write(payload)
+
+        task = (_execute_job, self.store.jobs_dir, job["jobId"], handler, payload_path, params)
+        try:
+            try:
+                future = self._pool(lane).submit(*task)
+            except BrokenProcessPool:
+                # A worker died since the last check; _pool() now builds a fresh executor
+                future = self._pool(lane).submit(*task)
+        except Exception:
+            self._release(job["jobId"])
+            self.store.update(job["jobId"], status=STATUS_FAILED, message="Failed", error="Could not schedule job")
+            raise
+        future.add_done_callback(lambda f, job_id=job["jobId"]: self._on_done(f, job_id, kind))
+        return job
+
+    def _on_done(self, future, job_id, kind):
+        self._release(job_id)
+        if future.exception() is not None:
+            # The worker process died before _execute_job could record the failure
+            print(f"Job {job_id} worker crashed: {future.exception()}")
+            self.store.update(job_id, status=STATUS_FAILED, message="Failed", error=str(future.exception()))
+            return
+        # Spans opened in the lane worker only reach /metrics through this process's registry
+        replay_spans(future.result(), route=f"job:{kind}")
+
+    def _release(self, job_id):
+        with self._lock:
+            self._pending -= 1
+            self._inflight.discard(job_id)
+
+    def _track(self, job_id):
+        with self._lock:
+            self._inflight.add(job_id)
+            if self._heartbeat_thread is None:
+                self._heartbeat_thread = threading.Thread(target=self._send_heartbeats, name="crm-job-heartbeat", daemon=True)
+                self._heartbeat_thread.start()
+
+    def _send_heartbeats(self):
+        while True:
+            time.sleep(HEARTBEAT_INTERVAL)
+            with self._lock:
+                job_ids = list(self._inflight)
+            try:
+                self.store.heartbeat(job_ids)
+            except Exception as e:
+                print(f"Job heartbeat failed: {str(e)}")
+
+    def get(self, job_id):
+        return self.store.get(job_id)
+
+    def stream(self, job_id, poll_interval=0.5):
+        """Yield the job record each time it changes until it finishes"""
+        last_seen = None
+        while True:
+            job = self.store.get(job_id)
+            if job is None:
+                return
+            marker = (job["status"], job["progress"], job["message"])
+            if marker != last_seen:
+                last_seen = marker
+                yield job
+            if job["status"] in FINISHED_STATUSES:
+                return
+            time.sleep(poll_interval)
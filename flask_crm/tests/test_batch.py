@@ -0,0 +1,76 @@
+import asyncio
+import io
+import json
+
+import pytest
+from werkzeug.datastructures import FileStorage
+
+import app as crm
+import asgi
+import tracing
+from tracing import span, render_metrics
+
+
+CSV = b"customer_id,age,city,total_spent\n1,34,Cairo,120.5\n2,41,Giza,80\n3,29,Cairo,310\n"
+QUESTIONS = ["Why do customers churn?", "Which city spends more?", "What would raise retention?"]
+
+
+@pytest.fixture(autouse=True)
+def fresh_metrics(monkeypatch):
+    monkeypatch.setattr(tracing, "metrics", tracing.MetricsRegistry())
+
+
+def _events(body):
+    return [json.loads(line[len("data: "):]) for line in body.split("\n\n") if line.startswith("data: ")]
+
+
+def _answer_with_span(indices, questions):
+    with span("llm_call"):
+        return {index: {"analysis": f"answer {index}"} for index in indices}
+
+
+def test_failed_unit_streams_fallbacks_and_keeps_request_route(monkeypatch):
+    def complete_unit(self, indices, claude_request, questions, data_context):
+        assert data_context
+        if 0 in indices:
+            raise RuntimeError("unit exploded")
+        return _answer_with_span(indices, questions)
+
+    monkeypatch.setattr(crm.SmartRAGAssistant, "complete_unit", complete_unit)
+
+    response = crm.app.test_client().post("/ai/question-answer-batch", data={
+        "data": (io.BytesIO(CSV), "customers.csv"),
+        "questions": json.dumps(QUESTIONS)
+    })
+    events = _events(response.get_data(as_text=True))
+
+    answers = {event["index"]: event["answer"] for event in events if "index" in event}
+    assert sorted(answers) == [0, 1, 2]
+    assert "unit exploded" in answers[0]["smartAnalysis"]["analysis"]
+    assert events[-1] == {"done": True, "total": 3}
+    assert 'crm_stage_duration_seconds_count{route="question_answer_batch",stage="llm_call"}' in render_metrics()
+
+
+def test_asgi_failed_unit_streams_fallbacks_and_keeps_request_route(monkeypatch):
+    async def complete_unit(indices, claude_request, questions, data_context, fallbacks):
+        assert data_context
+        if 0 in indices:
+            raise RuntimeError("unit exploded")
+        return _answer_with_span(indices, questions)
+
+    monkeypatch.setattr(asgi, "complete_unit", complete_unit)
+
+    async def scenario():
+        async with asgi.app.test_app() as test_app:
+            response = await test_app.test_client().post("/ai/question-answer-batch", files={
+                "data": FileStorage(io.BytesIO(CSV), filename="customers.csv")
+            }, form={"questions": json.dumps(QUESTIONS)})
+            return await response.get_data(as_text=True)
+
+    events = _events(asyncio.run(scenario()))
+
+    answers = {event["index"]: event["answer"] for event in events if "index" in event}
+    assert sorted(answers) == [0, 1, 2]
+    assert "unit exploded" in answers[0]["smartAnalysis"]["analysis"]
+    assert events[-1] == {"done": True, "total": 3}
+    assert 'crm_stage_duration_seconds_count{route="question_answer_batch",stage="llm_call"}' in render_metrics()
@@ -0,0 +1,144 @@
+import os
+import sys
+import time
+import signal
+import subprocess
+
+import jobs
+import tracing
+from jobs import JobManager, STATUS_COMPLETED, STATUS_FAILED, STATUS_RUNNING
+from tracing import span
+
+CRM_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# A worker that submits a job which never finishes, then waits to be killed
+WORKER_SCRIPT = """
+import sys, time
+from jobs import JobManager
+
+def hang(job, payload_path, params):
+    job.progress(10, "Working")
+    time.sleep(3600)
+
+job = JobManager(jobs_dir=sys.argv[1]).submit("patterns", hang, b"same data", {"x": 1}, lane="io")
+print(job["jobId"], flush=True)
+time.sleep(3600)
+"""
+
+
+def echo(job, payload_path, params):
+    with open(payload_path, "rb") as f:
+        return {"size": len(f.read()), "params": params}
+
+
+def wait_for(store, job_id, statuses, timeout=10):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        job = store.get(job_id)
+        if job["status"] in statuses:
+            return job
+        time.sleep(0.05)
+    raise AssertionError(f"job {job_id} never reached {statuses}")
+
+
+def test_completed_job_is_reused(tmp_path):
+    manager = JobManager(jobs_dir=str(tmp_path))
+    first = manager.submit("patterns", echo, b"abc", {"x": 1}, lane="io")
+    assert wait_for(manager.store, first["jobId"], (STATUS_COMPLETED,))["result"] == {"size": 3, "params": {"x": 1}}
+    assert manager.submit("patterns", echo, b"abc", {"x": 1}, lane="io")["jobId"] == first["jobId"]
+
+
+def test_job_of_killed_worker_is_not_reused(tmp_path, monkeypatch):
+    worker = subprocess.Popen(
+        [sys.executable, "-c", WORKER_SCRIPT, str(tmp_path)],
+        cwd=CRM_DIR,
+        stdout=subprocess.PIPE,
+        text=True,
+        env={**os.environ, "PYTHONPATH": CRM_DIR, "CRM_JOB_HEARTBEAT_INTERVAL": "0.2"}
+    )
+    try:
+        job_id = worker.stdout.readline().strip()
+        store = jobs.JobStore(str(tmp_path))
+        wait_for(store, job_id, (STATUS_RUNNING,))
+    finally:
+        worker.send_signal(signal.SIGKILL)
+        worker.wait()
+
+    # While its heartbeat is recent the job still counts as in flight
+    assert store.find_reusable(JobManager.cache_key("patterns", b"same data", {"x": 1}))["jobId"] == job_id
+
+    monkeypatch.setattr(jobs, "STALE_AFTER_SECONDS", 0.5)
+    time.sleep(0.6)
+    manager = JobManager(jobs_dir=str(tmp_path))
+    assert manager.get(job_id)["status"] == STATUS_FAILED
+
+    fresh = manager.submit("patterns", echo, b"same data", {"x": 1}, lane="io")
+    assert fresh["jobId"] != job_id
+    assert wait_for(manager.store, fresh["jobId"], (STATUS_COMPLETED,))["result"]["size"] == len(b"same data")
+
+
+def test_heartbeat_keeps_a_long_job_alive(tmp_path, monkeypatch):
+    monkeypatch.setattr(jobs, "HEARTBEAT_INTERVAL", 0.1)
+    monkeypatch.setattr(jobs, "STALE_AFTER_SECONDS", 0.5)
+
+    def slow(job, payload_path, params):
+        time.sleep(1.2)
+        return {"done": True}
+
+    manager = JobManager(jobs_dir=str(tmp_path))
+    job = manager.submit("patterns", slow, b"slow", {}, lane="io")
+    time.sleep(0.8)
+    assert manager.submit("patterns", slow, b"slow", {}, lane="io")["jobId"] == job["jobId"]
+    assert wait_for(manager.store, job["jobId"], (STATUS_COMPLETED, STATUS_FAILED))["status"] == STATUS_COMPLETED
+
+
+def die(job, payload_path, params):
+    os.kill(os.getpid(), signal.SIGKILL)
+
+
+def test_cpu_lane_recovers_after_a_worker_is_killed(tmp_path):
+    manager = JobManager(jobs_dir=str(tmp_path), cpu_workers=1)
+    killed = manager.submit("patterns", die, b"boom", {}, lane="cpu")
+    assert wait_for(manager.store, killed["jobId"], (STATUS_FAILED,), timeout=30)["status"] == STATUS_FAILED
+
+    job = manager.submit("patterns", echo, b"after crash", {}, lane="cpu")
+    assert wait_for(manager.store, job["jobId"], (STATUS_COMPLETED,), timeout=30)["result"]["size"] == len(b"after crash")
+
+
+def test_polls_and_streams_of_an_abandoned_job_end_in_failed(tmp_path, monkeypatch):
+    store = jobs.JobStore(str(tmp_path))
+    job_id = store.create("patterns", "abandoned")["jobId"]
+    store.update(job_id, status=STATUS_RUNNING, heartbeat_at=time.time() - 1)
+    manager = JobManager(jobs_dir=str(tmp_path))
+    assert manager.get(job_id)["status"] == STATUS_RUNNING
+
+    monkeypatch.setattr(jobs, "STALE_AFTER_SECONDS", 0.5)
+    assert manager.get(job_id)["status"] == STATUS_FAILED
+
+    job_id = store.create("patterns", "abandoned-while-streaming")["jobId"]
+    statuses = []
+    for job in manager.stream(job_id, poll_interval=0.05):
+        statuses.append(job["status"])
+        if len(statuses) > 200:
+            break
+    assert statuses == [jobs.STATUS_QUEUED, STATUS_FAILED]
+
+
+def traced(job, payload_path, params):
+    with span("csv_parse", rows=3, columns=2):
+        pass
+    return {"ok": True}
+
+
+def test_job_stage_spans_reach_the_submitting_process_metrics(tmp_path, monkeypatch):
+    monkeypatch.setattr(tracing, "metrics", tracing.MetricsRegistry())
+    manager = JobManager(jobs_dir=str(tmp_path), cpu_workers=1)
+    job = manager.submit("pattern-analysis", traced, b"traced", {}, lane="cpu")
+    wait_for(manager.store, job["jobId"], (STATUS_COMPLETED,), timeout=30)
+
+    deadline = time.time() + 5
+    while 'stage="csv_parse"' not in tracing.render_metrics() and time.time() < deadline:
+        time.sleep(0.05)
+    rendered = tracing.render_metrics()
+    assert 'crm_stage_duration_seconds_count{route="job:pattern-analysis",stage="csv_parse"} 1' in rendered
+    assert 'crm_dataset_rows_sum{route="job:pattern-analysis"} 3' in rendered
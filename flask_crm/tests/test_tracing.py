@@ -0,0 +1,44 @@
+import asyncio
+import io
+
+from werkzeug.datastructures import FileStorage
+
+import asgi
+
+
+CSV = b"customer_id,age,city,total_spent\n1,34,Cairo,120.5\n2,41,Giza,80\n3,29,Cairo,310\n"
+
+
+def test_cpu_stage_spans_reach_parent_metrics():
+    async def scenario():
+        async with asgi.app.test_app() as test_app:
+            client = test_app.test_client()
+            response = await client.post("/ai/upload", files={
+                "data": FileStorage(io.BytesIO(CSV), filename="customers.csv")
+            })
+            assert response.status_code == 200
+            return await (await client.get("/metrics")).get_data(as_text=True)
+
+    rendered = asyncio.run(scenario())
+    assert 'crm_stage_duration_seconds_count{route="upload",stage="cpu_upload"}' in rendered
+    assert 'crm_stage_duration_seconds_count{route="upload",stage="csv_parse"}' in rendered
+    assert 'crm_dataset_rows_sum{route="upload"} 3' in rendered
+
+
+def test_claude_failure_uses_fallback_built_with_the_prompt(monkeypatch):
+    async def failing_call(stage, claude_request):
+        raise RuntimeError("upstream unavailable")
+
+    monkeypatch.setattr(asgi, "call_claude", failing_call)
+
+    async def scenario():
+        async with asgi.app.test_app() as test_app:
+            client = test_app.test_client()
+            response = await client.post("/ai/question-answer", files={
+                "data": FileStorage(io.BytesIO(CSV), filename="customers.csv")
+            }, form={"question": "What would improve customer loyalty?"})
+            assert response.status_code == 200
+            return await response.get_json()
+
+    body = asyncio.run(scenario())
+    assert "Enhanced AI analysis failed (upstream unavailable)" in body["smartAnalysis"]["analysis"]
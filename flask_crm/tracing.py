@@ -0,0 +1,314 @@
+"""
+Lightweight stage tracing for the CRM service.
+Spans time each pipeline stage of a request, feed a Prometheus-style metrics
+registry exposed on /metrics and, when enabled, the Server-Timing response
+header and OpenTelemetry. Request state lives in a ContextVar so the same
+spans work under the Flask (WSGI) and Quart (ASGI) entry points.
+"""
+
+import os
+import time
+import asyncio
+import threading
+import tracemalloc
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+TRACE_MEMORY = os.environ.get("CRM_TRACE_MEMORY", "false").lower() == "true"
+SERVER_TIMING = os.environ.get("CRM_SERVER_TIMING", "false").lower() == "true"
+OTEL_ENABLED = os.environ.get("CRM_OTEL_ENABLED", "false").lower() == "true"
+
+_tracer = None
+if OTEL_ENABLED:
+    try:
+        from opentelemetry import trace as otel_trace
+        _tracer = otel_trace.get_tracer("flask_crm")
+    except ImportError:
+        print("CRM_OTEL_ENABLED is set but opentelemetry is not installed; OTel export disabled")
+
+if TRACE_MEMORY and not tracemalloc.is_tracing():
+    tracemalloc.start()
+
+
+class MetricsRegistry:
+    """Process-local counters and summaries rendered in Prometheus text format"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._counters = {}
+        self._summaries = {}
+        self._help = {}
+
+    def describe(self, name, help_text):
+        self._help[name] = help_text
+
+    def inc(self, name, value=1, **labels):
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + value
+
+    def observe(self, name, value, **labels):
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            entry = self._summaries.setdefault(key, {"sum": 0.0, "count": 0, "max": 0.0})
+            entry["sum"] += value
+            entry["count"] += 1
+            entry["max"] = max(entry["max"], value)
+
+    def render(self):
+        lines = []
+        with self._lock:
+            counters = sorted(self._counters.items())
+            summaries = sorted(self._summaries.items())
+
+        seen = set()
+        for (name, labels), value in counters:
+            if name not in seen:
+                seen.add(name)
+                if name in self._help:
+                    lines.append(f"# HELP {name} {self._help[name]}")
+                lines.append(f"# TYPE {name} counter")
+            lines.append(f"{name}{_format_labels(labels)} {value}")
+
+        for (name, labels), entry in summaries:
+            if name not in seen:
+                seen.add(name)
+                if name in self._help:
+                    lines.append(f"# HELP {name} {self._help[name]}")
+                lines.append(f"# TYPE {name} summary")
+            label_text = _format_labels(labels)
+            lines.append(f"{name}_sum{label_text} {entry['sum']}")
+            lines.append(f"{name}_count{label_text} {entry['count']}")
+
+        for (name, labels), entry in summaries:
+            max_name = f"{name}_max"
+            if max_name not in seen:
+                seen.add(max_name)
+                lines.append(f"# TYPE {max_name} gauge")
+            lines.append(f"{max_name}{_format_labels(labels)} {entry['max']}")
+
+        return "\n".join(lines) + "\n"
+
+
+def _format_labels(labels):
+    if not labels:
+        return ""
+    parts = []
+    for key, value in labels:
+        escaped = str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+        parts.append(f'{key}="{escaped}"')
+    return "{" + ",".join(parts) + "}"
+
+
+metrics = MetricsRegistry()
+metrics.describe("crm_requests_total", "Requests handled, by route and status code")
+metrics.describe("crm_request_duration_seconds", "End-to-end request duration")
+metrics.describe("crm_stage_duration_seconds", "Duration of a pipeline stage")
+metrics.describe("crm_stage_peak_memory_bytes", "Peak Python heap growth during a stage (CRM_TRACE_MEMORY=true)")
+metrics.describe("crm_dataset_rows", "Rows in the uploaded dataset")
+metrics.describe("crm_dataset_columns", "Columns in the uploaded dataset")
+metrics.describe("crm_llm_tokens_total", "Claude tokens consumed, by token type")
+
+_local = threading.local()
+_request_trace = ContextVar("crm_request_trace", default=None)
+
+
+def _current_route():
+    trace = _request_trace.get()
+    return trace["route"] if trace else "background"
+
+
+def _in_event_loop():
+    try:
+        asyncio.get_running_loop()
+        return True
+    except RuntimeError:
+        return False
+
+
+class Span:
+    def __init__(self, stage):
+        self.stage = stage
+        self.attributes = {}
+        self.duration = 0.0
+        self.peak_memory = None
+        self._otel_span = None
+
+    def set(self, **attributes):
+        self.attributes.update(attributes)
+        if self._otel_span is not None:
+            self._otel_span.set_attributes({k: v for k, v in attributes.items() if isinstance(v, (str, bool, int, float))})
+
+
+def _record_span(current, route):
+    if current.peak_memory is not None:
+        metrics.observe("crm_stage_peak_memory_bytes", current.peak_memory, route=route, stage=current.stage)
+    metrics.observe("crm_stage_duration_seconds", current.duration, route=route, stage=current.stage)
+    if "rows" in current.attributes:
+        metrics.observe("crm_dataset_rows", current.attributes["rows"], route=route)
+    if "columns" in current.attributes:
+        metrics.observe("crm_dataset_columns", current.attributes["columns"], route=route)
+
+
+@contextmanager
+def span(stage, **attributes):
+    """Time a pipeline stage. Yields a Span whose set() attaches attributes such as rows/columns."""
+    current = Span(stage)
+    current.set(**attributes)
+    route = _current_route()
+
+    stack = getattr(_local, "memory_stack", None)
+    if stack is None:
+        stack = _local.memory_stack = []
+    # tracemalloc peaks are process-wide, so interleaved coroutines would corrupt them
+    track_memory = TRACE_MEMORY and tracemalloc.is_tracing() and not _in_event_loop()
+    if track_memory:
+        start_current, peak_before = tracemalloc.get_traced_memory()
+        if stack:
+            # reset_peak() below discards the parent's peak so carry it forward
+            stack[-1]["carried_peak"] = max(stack[-1]["carried_peak"], peak_before)
+        tracemalloc.reset_peak()
+        stack.append({"start": start_current, "carried_peak": 0})
+
+    otel_context = _tracer.start_as_current_span(stage) if _tracer is not None else None
+    if otel_context is not None:
+        current._otel_span = otel_context.__enter__()
+        current._otel_span.set_attribute("route", route)
+        current.set(**current.attributes)
+
+    start = time.perf_counter()
+    error = None
+    try:
+        yield current
+    except BaseException as e:
+        error = e
+        raise
+    finally:
+        current.duration = time.perf_counter() - start
+
+        if track_memory:
+            frame = stack.pop()
+            _, peak = tracemalloc.get_traced_memory()
+            peak = max(peak, frame["carried_peak"])
+            current.peak_memory = max(0, peak - frame["start"])
+            if stack:
+                stack[-1]["carried_peak"] = max(stack[-1]["carried_peak"], peak)
+
+        trace = _request_trace.get()
+        if trace is None or not trace.get("exported"):
+            _record_span(current, route)
+
+        if otel_context is not None:
+            if error is not None:
+                current._otel_span.record_exception(error)
+            otel_context.__exit__(type(error) if error else None, error, error.__traceback__ if error else None)
+
+        if trace is not None:
+            trace["spans"].append(current)
+
+
+def run_traced(fn, *args):
+    """
+    Run fn in a worker process and return (result, spans). The spans it opens are not recorded
+    in the worker's registry, which nobody scrapes, but returned as plain dicts so the parent
+    can replay them into its own metrics and request trace with replay_spans().
+    """
+    token = _request_trace.set({"route": "background", "started": time.perf_counter(), "spans": [], "exported": True})
+    try:
+        result = fn(*args)
+        spans = [{
+            "stage": s.stage,
+            "duration": s.duration,
+            "peak_memory": s.peak_memory,
+            "attributes": {k: v for k, v in s.attributes.items() if isinstance(v, (str, bool, int, float))}
+        } for s in _request_trace.get()["spans"]]
+    finally:
+        _request_trace.reset(token)
+    return result, spans
+
+
+def replay_spans(spans, route=None):
+    """Record spans returned by run_traced() as if they had run in this process (under route when given)"""
+    route = route or _current_route()
+    trace = _request_trace.get()
+    for exported in spans:
+        current = Span(exported["stage"])
+        current.attributes = dict(exported["attributes"])
+        current.duration = exported["duration"]
+        current.peak_memory = exported["peak_memory"]
+        _record_span(current, route)
+        if trace is not None:
+            trace["spans"].append(current)
+
+
+def record_llm_usage(stage, usage):
+    """Record token counts from an Anthropic response.usage object"""
+    if usage is None:
+        return {}
+    route = _current_route()
+    counts = {
+        "input": getattr(usage, "input_tokens", 0) or 0,
+        "output": getattr(usage, "output_tokens", 0) or 0,
+        "cache_read": getattr(usage, "cache_read_input_tokens", 0) or 0,
+        "cache_creation": getattr(usage, "cache_creation_input_tokens", 0) or 0,
+    }
+    for token_type, value in counts.items():
+        if value:
+            metrics.inc("crm_llm_tokens_total", value, route=route, stage=stage, type=token_type)
+    return {f"{token_type}_tokens": value for token_type, value in counts.items()}
+
+
+def _server_timing_header(spans):
+    entries = []
+    for s in spans:
+        entry = f"{s.stage};dur={s.duration * 1000:.1f}"
+        if s.peak_memory is not None:
+            entry += f';desc="peak {s.peak_memory / 1024 / 1024:.1f}MB"'
+        entries.append(entry)
+    return ", ".join(entries)
+
+
+def start_request_trace(route):
+    _request_trace.set({"route": route or "unknown", "started": time.perf_counter(), "spans": []})
+
+
+def finish_request_trace(status_code):
+    """Record request metrics; returns the Server-Timing header value when enabled"""
+    trace = _request_trace.get()
+    if trace is None:
+        return None
+    _request_trace.set(None)
+    if trace["route"] == "metrics":
+        return None
+
+    metrics.observe("crm_request_duration_seconds", time.perf_counter() - trace["started"], route=trace["route"])
+    metrics.inc("crm_requests_total", route=trace["route"], status=status_code)
+    if SERVER_TIMING and trace["spans"]:
+        return _server_timing_header(trace["spans"])
+    return None
+
+
+def render_metrics():
+    return metrics.render()
+
+
+def init_tracing(app):
+    """Register request hooks and the /metrics endpoint on the Flask app"""
+    from flask import request, Response
+
+    @app.before_request
+    def _start_request_trace():
+        start_request_trace(request.endpoint)
+
+    @app.after_request
+    def _finish_request_trace(response):
+        server_timing = finish_request_trace(response.status_code)
+        if server_timing:
+            response.headers["Server-Timing"] = server_timing
+        return response
+
+    @app.route('/metrics', methods=['GET'])
+    def metrics_endpoint():
+        return Response(render_metrics(), mimetype="text/plain; version=0.0.4")
+
+    return app
@@ -1,15 +1,18 @@
 import os
 from flask import Flask, request, jsonify, Response, stream_with_context
 from typing import Any, Dict
-import asyncio
 import base64
 import io
 from PIL import Image
 from datetime import datetime
 from seo_analyzer import SEOAnalyzer
+from site_crawler import SiteCrawler, SITE_CRAWL_MAX_PAGES
 from gpt_insights_service import GPTInsightsService
 from helpers import is_valid_url, validate_url
 from sentiment_analyzer import SentimentAnalyzer
+from sentiment_model import start_background_warm_up
+from browser_pool import start_background_prelaunch
+from worker_loop import iterate, run
 from social_analyzer import SocialAnalyzer
 from branding_analyzer import BrandingAnalyzer
 from colorthief import ColorThief
@@ -19,6 +22,43 @@ import json
 app = Flask(__name__)
 load_dotenv()
 CORS(app, resources={r"/*": {"origins": ["https://app.thetransformix.com"]}})
+start_background_warm_up()
+start_background_prelaunch()
+
+def crawl_page_payload(page: Dict[str, Any]) -> Dict[str, Any]:
+    headings = page.get("headings", {}) or {}
+    return {
+        "url": page.get("url"),
+        "error": page.get("error"),
+        "title": page.get("title"),
+        "titleLength": page.get("title_length"),
+        "metaDescriptionLength": page.get("meta_description_length"),
+        "h1Count": len(headings.get("h1", []) or []),
+        "imagesCount": page.get("images_count"),
+        "imagesMissingAltTage": page.get("alt_tags_missing"),
+        "internalLinks": page.get("internal_links"),
+        "externalLinks": page.get("external_links"),
+    }
+
+def crawl_stats_payload(stats: Dict[str, Any]) -> Dict[str, Any]:
+    issues = stats.get("issues", {})
+    return {
+        "pagesCrawled": stats.get("pages_crawled", 0),
+        "pagesFailed": stats.get("pages_failed", 0),
+        "blockedByRobots": stats.get("blocked_by_robots", 0),
+        "imagesCount": stats.get("images_count", 0),
+        "imagesMissingAltTage": stats.get("alt_tags_missing", 0),
+        "altCoverage": stats.get("alt_coverage"),
+        "issues": {
+            "missingTitle": issues.get("missing_title"),
+            "missingMetaDescription": issues.get("missing_meta_description"),
+            "missingH1": issues.get("missing_h1"),
+            "multipleH1": issues.get("multiple_h1"),
+            "skippedHeadingLevels": issues.get("skipped_heading_levels"),
+            "duplicateTitles": issues.get("duplicate_titles"),
+            "duplicateMetaDescriptions": issues.get("duplicate_meta_descriptions"),
+        },
+    }
 
 @app.post("/ai/website-swot-analysis")
 def website_swot_analysis():
@@ -32,13 +72,34 @@ def website_swot_analysis():
         website_url = validate_url(website_url)
         if not is_valid_url(website_url):
             return jsonify({"error": "Invalid website_url. Must include http(s) scheme and domain."}), 400
+        # Crawl mode also audits the rest of the site and streams each page as it completes
+        crawl = body.get("crawl", False)
+        if isinstance(crawl, str):
+            crawl = {"true": True, "false": False}.get(crawl.strip().lower(), crawl)
+        if not isinstance(crawl, bool):
+            return jsonify({"error": "crawl must be true or false"}), 400
+        max_pages = body.get("max_pages")
+        try:
+            max_pages = SITE_CRAWL_MAX_PAGES if max_pages is None else int(max_pages)
+        except (TypeError, ValueError):
+            return jsonify({"error": "max_pages must be an integer"}), 400
+        if not 1 <= max_pages <= SITE_CRAWL_MAX_PAGES:
+            return jsonify({"error": f"max_pages must be between 1 and {SITE_CRAWL_MAX_PAGES}"}), 400
         print(f"website analysis started at:{datetime.now()}")
         def stream_response():
             analyzer = SEOAnalyzer()
             gpt_service = GPTInsightsService()
             async def run_analysis(url: str):
-                seo_result = await analyzer.analyze_website(url)
+                # PageSpeed takes 10-30s and only needs the URL: start it now and stream the
+                # on-page sections while it runs
+                page_speed_task = analyzer.start_page_speed(url)
+                try:
+                    async for chunk in stream_sections(url, page_speed_task):
+                        yield chunk
+                finally:
+                    page_speed_task.cancel()
 
+            async def stream_sections(url: str, page_speed_task):
                 payload = {
                     "pageSpeedScore": None,
                     "internalLinks": None,
@@ -72,17 +133,15 @@ def website_swot_analysis():
                         "type": None,
                         "siteName": None,
                     },
+                    "siteCrawl": None,
                     "summary": None,
                     "fullSocialAnalysis": None,
                 }
 
                 yield "data: "+json.dumps(payload)+'\n\n'
                 
-                payload["pageSpeedScore"] = (
-                    seo_result.get("page_speed_score")
-                    or seo_result.get("page_speed_scores", {}).get("overall", 0)
-                    or 0
-                )
+                seo_result = await analyzer.analyze_page(url)
+                
                 payload["internalLinks"] = seo_result.get("internal_links", 0) or 0
                 payload["externalLinks"] = seo_result.get("external_links", 0) or 0
                 yield "data: "+json.dumps(payload)+'\n\n'
@@ -140,6 +199,32 @@ def website_swot_analysis():
                 payload["schemaMarkup"] = seo_result.get("schema_markup", []) or []
                 yield "data: "+json.dumps(payload)+'\n\n'
                 
+                if crawl and not seo_result.get("error"):
+                    crawler = SiteCrawler(max_pages=max_pages)
+                    async for page in crawler.crawl(url):
+                        payload["siteCrawl"] = {
+                            "status": "running",
+                            "lastPage": crawl_page_payload(page),
+                            "stats": crawl_stats_payload(crawler.stats.summary()),
+                        }
+                        yield "data: "+json.dumps(payload)+'\n\n'
+                    site_stats = crawler.stats.summary()
+                    seo_result["site_crawl"] = site_stats
+                    payload["siteCrawl"] = {
+                        "status": "complete",
+                        "lastPage": None,
+                        "stats": crawl_stats_payload(site_stats),
+                    }
+                    yield "data: "+json.dumps(payload)+'\n\n'
+                
+                seo_result = await analyzer.add_page_speed(seo_result, page_speed_task)
+                payload["pageSpeedScore"] = (
+                    seo_result.get("page_speed_score")
+                    or (seo_result.get("page_speed_scores") or {}).get("overall", 0)
+                    or 0
+                )
+                yield "data: "+json.dumps(payload)+'\n\n'
+                
                 gpt_result = await gpt_service.generate_seo_insights(seo_result)
                 payload["summary"] = (
                     (gpt_result or {}).get("insights", {}).get("summary") or None
@@ -148,23 +233,7 @@ def website_swot_analysis():
                     (gpt_result or {}).get("insights", {}).get("full_analysis") or None
                 )
                 yield "data: "+json.dumps(payload)+'\n\n'
-            loop = asyncio.new_event_loop()
-            asyncio.set_event_loop(loop)
-            try:
-                async def run_and_yield():
-                    async for chunk in run_analysis(website_url):
-                        yield chunk
-
-                agen = run_and_yield()
-
-                while True:
-                    try:
-                        chunk = loop.run_until_complete(agen.__anext__())
-                        yield chunk
-                    except StopAsyncIteration:
-                        break
-            finally:
-                loop.close()
+            yield from iterate(run_analysis(website_url))
 
         response = Response(
             stream_with_context(stream_response()),
@@ -293,23 +362,7 @@ def social_swot_analysis():
                 insights = (gpt_result or {}).get("insights", {})
                 payload["fullSocialAnalysis"] = insights.get("full_analysis") or None
                 yield "data: "+json.dumps(payload)+'\n\n'
-            loop = asyncio.new_event_loop()
-            asyncio.set_event_loop(loop)
-            try:
-                async def run_and_yield():
-                    async for chunk in run_social(instagram_link, country):
-                        yield chunk
-
-                agen = run_and_yield()
-
-                while True:
-                    try:
-                        chunk = loop.run_until_complete(agen.__anext__())
-                        yield chunk
-                    except StopAsyncIteration:
-                        break
-            finally:
-                loop.close()
+            yield from iterate(run_social(instagram_link, country))
 
         response = Response(
             stream_with_context(stream_response()),
@@ -419,12 +472,7 @@ def branding_audit():
             async def run_branding():
                 return await analyzer.analyze_branding(urls, branding_profile)
 
-            loop = asyncio.new_event_loop()
-            asyncio.set_event_loop(loop)
-            try:
-                result = loop.run_until_complete(run_branding())
-            finally:
-                loop.close()
+            result = run(run_branding())
 
             if not result or "branding_analysis" not in result:
                 yield "data: "+json.dumps({"type": "error", "error": "Branding analysis failed"}) + '\n\n'
@@ -513,12 +561,7 @@ def customer_sentiment_analysis():
                     reviews_per_competitor=REVIEWS_PER_COMPETITOR,
                 )
 
-            loop = asyncio.new_event_loop()
-            asyncio.set_event_loop(loop)
-            try:
-                analysis_results = loop.run_until_complete(run_competitor_analysis())
-            finally:
-                loop.close()
+            analysis_results = run(run_competitor_analysis())
 
             competitor_results = analysis_results.get("competitor_results", [])
             combined = analysis_results.get("combined_analysis", {})
@@ -771,23 +814,7 @@ def social_analysis_tiktok():
                 insights = (gpt_result or {}).get("insights", {})
                 payload["fullSocialAnalysis"] = insights.get("full_analysis") or None
                 yield "data: "+json.dumps(payload)+'\n\n'
-            loop = asyncio.new_event_loop()
-            asyncio.set_event_loop(loop)
-            try:
-                async def run_and_yield():
-                    async for chunk in run_tiktok(tiktok_link, country):
-                        yield chunk
-
-                agen = run_and_yield()
-
-                while True:
-                    try:
-                        chunk = loop.run_until_complete(agen.__anext__())
-                        yield chunk
-                    except StopAsyncIteration:
-                        break
-            finally:
-                loop.close()
+            yield from iterate(run_tiktok(tiktok_link, country))
 
         return Response(stream_response(), mimetype="text/event-stream")
 
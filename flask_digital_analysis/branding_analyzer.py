@@ -6,15 +6,14 @@ import os
 import json
 from selenium import webdriver
 from selenium.webdriver.chrome.options import Options as ChromeOptions
-from selenium.webdriver.chrome.service import Service as ChromeService
 from selenium.webdriver.common.by import By
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
-from webdriver_manager.chrome import ChromeDriverManager
 import time
 from selenium.webdriver.common.keys import Keys
 from PIL import Image
 import io
+from browser_pool import get_pool, launch_chrome
 
 class BrandingAnalyzer:
 
@@ -22,24 +21,25 @@ class BrandingAnalyzer:
     def __init__(self):
         self.gpt_insights = GPTInsightsService()
 
+    @staticmethod
+    def setup_browser():
+        chrome_options = ChromeOptions()
+        chrome_options.add_argument("--headless")  
+        chrome_options.add_argument("--no-sandbox")
+        chrome_options.add_argument("--disable-dev-shm-usage")
+        chrome_options.add_argument("--disable-gpu")
+        chrome_options.add_argument("--window-size=1920,1080")
+        chrome_options.add_argument("--disable-blink-features=AutomationControlled")
+        chrome_options.add_experimental_option("excludeSwitches", ["enable-automation"])
+        chrome_options.add_experimental_option('useAutomationExtension', False)
+        chrome_options.add_argument("--disable-web-security")
+        chrome_options.add_argument("--allow-running-insecure-content")
+        return launch_chrome(chrome_options)
+
     def take_screenshot(self, url: str) -> bytes:
         try:
-            chrome_options = ChromeOptions()
-            chrome_options.add_argument("--headless")  
-            chrome_options.add_argument("--no-sandbox")
-            chrome_options.add_argument("--disable-dev-shm-usage")
-            chrome_options.add_argument("--disable-gpu")
-            chrome_options.add_argument("--window-size=1920,1080")
-            chrome_options.add_argument("--disable-blink-features=AutomationControlled")
-            chrome_options.add_experimental_option("excludeSwitches", ["enable-automation"])
-            chrome_options.add_experimental_option('useAutomationExtension', False)
-            chrome_options.add_argument("--disable-web-security")
-            chrome_options.add_argument("--allow-running-insecure-content")
-            
-            service = ChromeService(ChromeDriverManager().install())
-            driver = webdriver.Chrome(service=service, options=chrome_options)
-            
-            try:
+            # Each lease gets a fresh browser context, so Instagram session cookies never outlive it
+            with screenshot_browser_pool.lease() as driver:
                 if "instagram.com" in url.lower():
                     try:
                         session_cookies = {
@@ -210,9 +210,6 @@ class BrandingAnalyzer:
                 
                 return screenshot_bytes, image_format
                 
-            finally:
-                driver.quit()
-                
         except Exception as e:
             print(f"Error taking screenshot of {url}: {str(e)}")
             return b'\x89PNG\r\n\x1a\n\x00\x00\x00\rIHDR\x00\x00\x00\x01\x00\x00\x00\x01\x08\x02\x00\x00\x00\x90wS\xde\x00\x00\x00\tpHYs\x00\x00\x0b\x13\x00\x00\x0b\x13\x01\x00\x9a\x9c\x18\x00\x00\x00\x07tIME\x07\xe6\x06\x16\x0e\x1c\x0c\xc8\xc8\xc8\x00\x00\x00\x0cIDATx\x9cc```\x00\x00\x00\x04\x00\x01\xf5\xf7\xd0\xc4\x00\x00\x00\x00IEND\xaeB`\x82', "png"
@@ -222,7 +219,7 @@ class BrandingAnalyzer:
         screenshots = []
         for url in urls:
             try:
-                screenshot_bytes, image_format = self.take_screenshot(url)
+                screenshot_bytes, image_format = await asyncio.to_thread(self.take_screenshot, url)
                 screenshot_base64 = base64.b64encode(screenshot_bytes).decode('utf-8')
                 print(f"🔍 [SIZE TRACE] Base64 encoded size: {len(screenshot_base64):,} characters")
                 print(f"🔍 [SIZE TRACE] Base64 size in bytes: {len(screenshot_base64.encode('utf-8')):,} bytes")
@@ -247,4 +244,8 @@ class BrandingAnalyzer:
             "screenshots": screenshots,
             "branding_analysis": branding_analysis,
             "company_branding_profile": branding_profile
-        }
\ No newline at end of file
+        }
+
+
+# Warm screenshot browsers shared by every request in this worker
+screenshot_browser_pool = get_pool("screenshot browser", BrandingAnalyzer.setup_browser, prelaunch=True)
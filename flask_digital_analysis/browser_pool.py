@@ -0,0 +1,342 @@
+"""
+Bounded pools of reusable, warm headless browsers shared by every scraper in the worker.
+Browsers are created on demand up to the pool size (or pre-launched at startup) and handed back
+after each lease instead of being quit, so scrapes skip Chrome's cold start and concurrent scrapes
+share a fixed number of Chrome processes.
+
+All pools in a worker draw from one budget of Chrome processes, the worker's share of a host-wide
+budget (BROWSER_HOST_BUDGET, or what the host's cores and a quarter of its RAM allow, split across
+WEB_CONCURRENCY workers). A pool that needs a browser when the budget is spent quits an idle browser
+of another pool first. Only one worker per host pre-launches browsers.
+
+Each lease runs in its own CDP browser context (a fresh, in-memory profile: no cookies, storage
+or cache shared with earlier leases) that is disposed when the lease ends. Idle browsers are
+health-checked before reuse and recycled after BROWSER_MAX_USES leases.
+"""
+
+import os
+import time
+import queue
+import atexit
+import logging
+import threading
+from contextlib import contextmanager
+from typing import Callable, Dict, Optional
+from selenium import webdriver
+from selenium.webdriver.chrome.service import Service
+
+# Rough resident size of one headless Chrome with a Google Maps tab open
+BROWSER_MEMORY_BUDGET_MB = int(os.environ.get("BROWSER_MEMORY_BUDGET_MB", 500))
+# Leases served by one Chrome before it is quit and replaced (bounds leaks in long-lived browsers)
+BROWSER_MAX_USES = int(os.environ.get("BROWSER_MAX_USES", 50))
+# Browsers launched at startup in each pool registered with prelaunch=True, by one worker per host
+BROWSER_POOL_PRELAUNCH = int(os.environ.get("BROWSER_POOL_PRELAUNCH", 1))
+BROWSER_PRELAUNCH_LOCK = os.environ.get("BROWSER_PRELAUNCH_LOCK", "/tmp/browser_prelaunch.lock")
+# Gunicorn workers on the host; the host's browser budget is split between them
+WEB_CONCURRENCY = int(os.environ.get("WEB_CONCURRENCY", 1))
+# "context" gives every lease a fresh CDP browser context; "none" reuses the default profile
+BROWSER_ISOLATION = os.environ.get("BROWSER_ISOLATION", "context").lower()
+
+
+def host_browser_budget() -> int:
+    """BROWSER_HOST_BUDGET, or the Chrome processes the host's cores and a quarter of its RAM allow"""
+    configured = os.environ.get("BROWSER_HOST_BUDGET")
+    if configured:
+        return max(1, int(configured))
+    cpu_limit = os.cpu_count() or 1
+    try:
+        total_mb = os.sysconf("SC_PAGE_SIZE") * os.sysconf("SC_PHYS_PAGES") // (1024 * 1024)
+        memory_limit = max(1, (total_mb // 4) // BROWSER_MEMORY_BUDGET_MB)
+    except (ValueError, OSError, AttributeError):
+        memory_limit = 2
+    return max(1, min(cpu_limit, memory_limit))
+
+
+def worker_browser_budget() -> int:
+    """This worker's share of the host budget, shared by all of its pools"""
+    return max(1, host_browser_budget() // max(1, WEB_CONCURRENCY))
+
+
+def default_pool_size() -> int:
+    """BROWSER_POOL_SIZE, or the whole worker budget (pools still compete for it)"""
+    configured = os.environ.get("BROWSER_POOL_SIZE")
+    if configured:
+        return max(1, int(configured))
+    return worker_browser_budget()
+
+
+class _BrowserBudget:
+    """Count of Chrome processes this worker runs across all pools"""
+
+    def __init__(self, limit: int):
+        self.limit = limit
+        self._running = 0
+        self._changed = threading.Condition()
+
+    def try_acquire(self) -> bool:
+        with self._changed:
+            if self._running >= self.limit:
+                return False
+            self._running += 1
+            return True
+
+    def release(self) -> None:
+        with self._changed:
+            self._running -= 1
+            self._changed.notify()
+
+    def wait(self, timeout: float) -> None:
+        with self._changed:
+            if self._running >= self.limit:
+                self._changed.wait(timeout)
+
+
+_budget = _BrowserBudget(worker_browser_budget())
+
+
+def _reserve_browser(requester: "BrowserPool") -> bool:
+    """Take a unit of the worker budget, quitting other pools' idle browsers if it is spent"""
+    while not _budget.try_acquire():
+        if not any(pool._evict_idle() for pool in list(_pools.values()) if pool is not requester):
+            return False
+    return True
+
+
+_driver_path: Optional[str] = None
+_driver_path_lock = threading.Lock()
+
+
+def chromedriver_path() -> Optional[str]:
+    """
+    CHROMEDRIVER_PATH, or webdriver-manager's chromedriver resolved once per process instead of on
+    every launch. None lets Selenium locate a driver itself.
+    """
+    global _driver_path
+    if _driver_path is not None:
+        return _driver_path or None
+    with _driver_path_lock:
+        if _driver_path is None:
+            configured = os.environ.get("CHROMEDRIVER_PATH", "").strip()
+            if configured:
+                _driver_path = configured
+            else:
+                try:
+                    from webdriver_manager.chrome import ChromeDriverManager
+                    _driver_path = ChromeDriverManager().install()
+                except Exception as error:
+                    logging.warning(f"webdriver-manager could not resolve chromedriver, using Selenium's lookup: {error}")
+                    _driver_path = ""
+    return _driver_path or None
+
+
+def launch_chrome(options) -> webdriver.Chrome:
+    path = chromedriver_path()
+    service = Service(path) if path else Service()
+    return webdriver.Chrome(service=service, options=options)
+
+
+class BrowserPool:
+
+    def __init__(self, factory: Callable, size: Optional[int] = None, name: str = "browser",
+                 isolation: str = BROWSER_ISOLATION, max_uses: int = BROWSER_MAX_USES):
+        self.factory = factory
+        self.size = size or default_pool_size()
+        self.name = name
+        self.isolation = isolation
+        self.max_uses = max_uses
+        self._idle = queue.LifoQueue()
+        self._slots = threading.BoundedSemaphore(self.size)
+        self._uses: Dict[int, int] = {}
+        atexit.register(self.close)
+
+    @contextmanager
+    def lease(self, timeout: Optional[float] = None):
+        """Yield a browser; it returns to the pool afterwards, or is quit if the caller raised"""
+        if not self._slots.acquire(timeout=timeout):
+            raise TimeoutError(f"No {self.name} available within {timeout}s")
+        browser = None
+        context = None
+        try:
+            browser = self._checkout(timeout)
+            context = self._open_context(browser)
+            yield browser
+        except BaseException:
+            self._discard(browser)
+            browser = None
+            raise
+        finally:
+            if browser is not None:
+                self._release(browser, context)
+            self._slots.release()
+
+    def prelaunch(self, count: int) -> None:
+        """Start browsers ahead of the first lease, up to count idle ones, without exceeding the worker budget"""
+        for _ in range(min(count, self.size) - self._idle.qsize()):
+            if not self._slots.acquire(blocking=False):
+                return
+            try:
+                if not _budget.try_acquire():
+                    return
+                self._idle.put(self._launch())
+            except Exception as error:
+                logging.error(f"Could not pre-launch {self.name}: {error}")
+                return
+            finally:
+                self._slots.release()
+
+    def _launch(self):
+        """Start a browser against a budget unit the caller already holds (released if the launch fails)"""
+        try:
+            browser = self.factory()
+        except BaseException:
+            _budget.release()
+            raise
+        self._uses[id(browser)] = 0
+        return browser
+
+    def _checkout(self, timeout: Optional[float] = None):
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            try:
+                browser = self._idle.get_nowait()
+            except queue.Empty:
+                if _reserve_browser(self):
+                    return self._launch()
+                # Every budgeted browser is leased; wait for one to come back to this pool or be quit
+                remaining = 0.5 if deadline is None else min(0.5, deadline - time.monotonic())
+                if remaining <= 0:
+                    raise TimeoutError(f"No {self.name} available within {timeout}s")
+                _budget.wait(remaining)
+                continue
+            if self._healthy(browser):
+                return browser
+            logging.warning(f"Replacing unresponsive {self.name}")
+            self._discard(browser)
+
+    @staticmethod
+    def _healthy(browser) -> bool:
+        try:
+            return browser.execute_script("return 1") == 1
+        except Exception:
+            return False
+
+    def _open_context(self, browser):
+        """Switch the browser to a tab in a fresh browser context; returns what _release needs to undo it"""
+        if self.isolation != "context":
+            return None
+        home = browser.current_window_handle
+        context_id = browser.execute_cdp_cmd("Target.createBrowserContext", {})["browserContextId"]
+        try:
+            target_id = browser.execute_cdp_cmd(
+                "Target.createTarget", {"url": "about:blank", "browserContextId": context_id}
+            )["targetId"]
+            browser.switch_to.window(target_id)
+        except Exception:
+            browser.execute_cdp_cmd("Target.disposeBrowserContext", {"browserContextId": context_id})
+            raise
+        return home, context_id
+
+    def _release(self, browser, context):
+        try:
+            if context is None:
+                # Leave nothing running in the tab while it sits idle
+                browser.get("about:blank")
+            else:
+                # Disposing the context closes its tabs and drops its cookies, storage and cache
+                home, context_id = context
+                browser.switch_to.window(home)
+                browser.execute_cdp_cmd("Target.disposeBrowserContext", {"browserContextId": context_id})
+        except Exception as error:
+            logging.warning(f"Dropping {self.name} that failed to reset: {error}")
+            self._discard(browser)
+            return
+        uses = self._uses.get(id(browser), 0) + 1
+        if uses >= self.max_uses:
+            logging.info(f"Recycling {self.name} after {uses} uses")
+            self._discard(browser)
+            return
+        self._uses[id(browser)] = uses
+        self._idle.put(browser)
+
+    def _evict_idle(self) -> bool:
+        """Quit one idle browser to free budget for another pool; False if none is idle"""
+        try:
+            browser = self._idle.get_nowait()
+        except queue.Empty:
+            return False
+        self._discard(browser)
+        return True
+
+    def _discard(self, browser):
+        if browser is None:
+            return
+        if self._uses.pop(id(browser), None) is not None:
+            _budget.release()
+        try:
+            browser.quit()
+        except Exception:
+            pass
+
+    def close(self):
+        while True:
+            try:
+                self._discard(self._idle.get_nowait())
+            except queue.Empty:
+                return
+
+
+_pools: Dict[str, BrowserPool] = {}
+_prelaunched: Dict[str, BrowserPool] = {}
+_pools_lock = threading.Lock()
+
+
+def get_pool(name: str, factory: Callable, prelaunch: bool = False, **options) -> BrowserPool:
+    """The worker's pool called name, created on first use; prelaunch=True warms it in start_background_prelaunch()"""
+    with _pools_lock:
+        if name not in _pools:
+            _pools[name] = BrowserPool(factory, name=name, **options)
+            if prelaunch:
+                _prelaunched[name] = _pools[name]
+        return _pools[name]
+
+
+_prelaunch_lock_file = None
+
+
+def _claim_prelaunch() -> bool:
+    """
+    True in the one worker per host that pre-launches: the first to lock BROWSER_PRELAUNCH_LOCK
+    holds it for its lifetime, so a replacement worker can take over when it exits.
+    """
+    global _prelaunch_lock_file
+    try:
+        import fcntl
+    except ImportError:
+        return True
+    handle = open(BROWSER_PRELAUNCH_LOCK, "a")
+    try:
+        fcntl.flock(handle, fcntl.LOCK_EX | fcntl.LOCK_NB)
+    except OSError:
+        handle.close()
+        return False
+    _prelaunch_lock_file = handle
+    return True
+
+
+def prelaunch_pools() -> None:
+    chromedriver_path()
+    for pool in list(_prelaunched.values()):
+        pool.prelaunch(BROWSER_POOL_PRELAUNCH)
+
+
+def start_background_prelaunch() -> None:
+    """Launch the pre-launched pools' browsers in a daemon thread (BROWSER_POOL_PRELAUNCH=0 disables)"""
+    if BROWSER_POOL_PRELAUNCH <= 0:
+        return
+    try:
+        claimed = _claim_prelaunch()
+    except OSError as error:
+        logging.warning(f"Could not open {BROWSER_PRELAUNCH_LOCK}, skipping browser pre-launch: {error}")
+        return
+    if claimed:
+        threading.Thread(target=prelaunch_pools, name="browser-prelaunch", daemon=True).start()
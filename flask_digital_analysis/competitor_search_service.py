@@ -7,17 +7,47 @@ from datetime import datetime
 import logging
 from selenium import webdriver
 from selenium.webdriver.chrome.options import Options
-from selenium.webdriver.chrome.service import Service
 from selenium.webdriver.common.by import By
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
 from selenium.common.exceptions import TimeoutException, NoSuchElementException
-from webdriver_manager.chrome import ChromeDriverManager
 import time
 import os
+from debug_capture import capture, capture_failure
+from dom_extract import extract_fields
+from browser_pool import get_pool, launch_chrome
 
 logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
 
+# Selector fallbacks for a search result list item; every non-empty candidate is returned so the
+# caller can skip ones that fail validation (e.g. the "Results" heading)
+LIST_ITEM_FIELDS = {
+    "fields": {
+        "name": {"candidates": True, "selectors": [
+            "a.hfpxzc",
+            "[role='article'] a.hfpxzc",
+            ".fontHeadlineSmall",
+            "h3",
+            ".section-result-title",
+            ".fontBodyMedium"
+        ]},
+        "rating": {"candidates": True, "selectors": [
+            ".section-star-display",
+            ".fontCaption",
+            "[aria-label*='stars']",
+            ".section-rating"
+        ]},
+        "address": {"candidates": True, "selectors": [
+            ".section-result-location",
+            ".fontBodyMedium",
+            ".section-result-details"
+        ]}
+    }
+}
+
+# Warm search browsers shared by every request in this worker
+search_browser_pool = get_pool("competitor search browser", lambda: CompetitorSearchService().setup_browser(), prelaunch=True)
+
 class CompetitorSearchService:
     
     def __init__(self):
@@ -36,8 +66,7 @@ class CompetitorSearchService:
             options.add_experimental_option('useAutomationExtension', False)
             
             try:
-                service = Service(ChromeDriverManager().install())
-                driver = webdriver.Chrome(service=service, options=options)
+                driver = launch_chrome(options)
                 driver.execute_script("Object.defineProperty(navigator, 'webdriver', {get: () => undefined})")
                 driver.implicitly_wait(10)
                 logging.info("Successfully initialized Chrome WebDriver")
@@ -73,20 +102,20 @@ class CompetitorSearchService:
         search_query = f"{industry} in {region}"
         competitors = []
         
-        driver = None
         try:
-            driver = self.setup_browser()
-            competitors = await self._search_google_maps(driver, search_query, max_results)
+            # Selenium blocks, so the whole browser session runs on a worker thread with its own loop
+            competitors = await asyncio.to_thread(self._search_in_browser, search_query, max_results)
             
         except Exception as e:
             logging.error(f"Error searching competitors: {str(e)}")
             raise Exception(f"Competitor search failed: {str(e)}")
-        finally:
-            if driver:
-                driver.quit()
         
         return competitors
     
+    def _search_in_browser(self, search_query: str, max_results: int) -> List[Dict[str, Any]]:
+        with search_browser_pool.lease() as driver:
+            return asyncio.run(self._search_google_maps(driver, search_query, max_results))
+    
     async def _search_google_maps(self, driver, search_query: str, max_results: int) -> List[Dict[str, Any]]:
         competitors = []
         
@@ -157,16 +186,8 @@ class CompetitorSearchService:
                 EC.presence_of_element_located((By.CSS_SELECTOR, "[role='main']"))
             )
 
-            driver.save_screenshot('vps_critical_error.png')
-            with open('vps_critical_error.html', 'w', encoding='utf-8') as f:
-                f.write(driver.page_source)
-            logging.critical("Saved debug screenshot and HTML. Check vps_critical_error.png!")
-
-            logging.info(main.get_attribute('outerHTML'))
-
             logging.info("Main results container loaded")
-            inner_html = main.get_attribute("innerHTML")
-            print(inner_html)
+            capture(driver, "competitor_results")
 
             selectors_to_try = [
                 ".Nv2PK",
@@ -190,6 +211,7 @@ class CompetitorSearchService:
 
             if not result_items:
                 logging.warning("No result items found with any selector")
+                capture_failure(driver, "vps_critical_error")
                 return competitors
             
             for i, item in enumerate(result_items[:max_results]):
@@ -316,19 +338,11 @@ class CompetitorSearchService:
     
     def _extract_from_list_item(self, item, index: int) -> Optional[Dict[str, Any]]:
         try:
-            name_selectors = [
-            "a.hfpxzc",
-            "[role='article'] a.hfpxzc",
-                ".fontHeadlineSmall",
-                "h3",
-                ".section-result-title",
-                ".fontBodyMedium",
-                ".fontHeadlineSmall"
-            ]
+            # One script call reads every selector candidate for this result item
+            fields = extract_fields(item.parent, LIST_ITEM_FIELDS, roots=[item])[0]
             
             name = ""
-            for selector in name_selectors:
-                candidate = self._safe_extract_text(item, selector)
+            for candidate in fields["name"]:
                 candidate = self._sanitize_business_name(candidate)
                 if candidate:
                     name = candidate
@@ -337,34 +351,19 @@ class CompetitorSearchService:
             if not name:
                 name = f"Business {index + 1}"
             
-            rating_selectors = [
-                ".section-star-display",
-                ".fontCaption",
-                "[aria-label*='stars']",
-                ".section-rating"
-            ]
-            
             rating = 0.0
             review_count = 0
             
-            for selector in rating_selectors:
-                rating_text = self._safe_extract_text(item, selector)
-                if rating_text:
-                    rating = self._extract_rating_number(rating_text)
-                    review_count = self._extract_review_count(rating_text)
-                    if rating > 0:
-                        break
-            
-            address_selectors = [
-                ".section-result-location",
-                ".fontBodyMedium",
-                ".section-result-details"
-            ]
+            for rating_text in fields["rating"]:
+                rating = self._extract_rating_number(rating_text)
+                review_count = self._extract_review_count(rating_text)
+                if rating > 0:
+                    break
             
             address = ""
-            for selector in address_selectors:
-                address = self._safe_extract_text(item, selector)
-                if address and "rating" not in address.lower() and "star" not in address.lower():
+            for candidate in fields["address"]:
+                if "rating" not in candidate.lower() and "star" not in candidate.lower():
+                    address = candidate
                     break
             
             place_url = f"https://www.google.com/maps/search/{name.replace(' ', '+')}?hl=en&gl=eg"
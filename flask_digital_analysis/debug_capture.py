@@ -0,0 +1,66 @@
+"""
+Opt-in screenshot + HTML capture for debugging the scrapers.
+Off by default. DEBUG_CAPTURE_MODE=failure captures only when a scrape fails, and
+DEBUG_CAPTURE_MODE=sample also captures a DEBUG_CAPTURE_SAMPLE_RATE fraction of normal
+checkpoints. Each capture gets a unique file name, so concurrent requests never overwrite each
+other. HTML is capped at DEBUG_CAPTURE_MAX_HTML_BYTES, and files are written by a background
+thread so the scrape only pays for reading the screenshot and source from the browser.
+"""
+
+import os
+import re
+import uuid
+import random
+import logging
+from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor
+
+DEBUG_CAPTURE_MODE = os.environ.get("DEBUG_CAPTURE_MODE", "off").lower()
+DEBUG_CAPTURE_SAMPLE_RATE = float(os.environ.get("DEBUG_CAPTURE_SAMPLE_RATE", 0.02))
+DEBUG_CAPTURE_DIR = os.environ.get("SCRAPER_DEBUG_DIR", "/tmp/scraper_debug")
+DEBUG_CAPTURE_MAX_HTML_BYTES = int(os.environ.get("DEBUG_CAPTURE_MAX_HTML_BYTES", 2 * 1024 * 1024))
+
+_writer = ThreadPoolExecutor(max_workers=1, thread_name_prefix="debug-capture")
+
+
+def _should_capture(failure: bool) -> bool:
+    if DEBUG_CAPTURE_MODE == "failure":
+        return failure
+    if DEBUG_CAPTURE_MODE == "sample":
+        return failure or random.random() < DEBUG_CAPTURE_SAMPLE_RATE
+    return False
+
+
+def _write(base: str, png: bytes, html: str) -> None:
+    try:
+        os.makedirs(DEBUG_CAPTURE_DIR, exist_ok=True)
+        with open(f"{base}.png", "wb") as f:
+            f.write(png)
+        with open(f"{base}.html", "w", encoding="utf-8") as f:
+            f.write(html)
+        logging.info(f"Saved debug capture {base}.png / {base}.html")
+    except Exception as error:
+        logging.warning(f"Could not write debug capture {base}: {error}")
+
+
+def capture(driver, name: str, failure: bool = False) -> None:
+    """Capture the current page as `name` if the configured mode selects it; never raises"""
+    if not _should_capture(failure):
+        return
+    try:
+        png = driver.get_screenshot_as_png()
+        html = driver.page_source
+    except Exception as error:
+        logging.warning(f"Could not capture {name}: {error}")
+        return
+    encoded = html.encode("utf-8")
+    if len(encoded) > DEBUG_CAPTURE_MAX_HTML_BYTES:
+        html = encoded[:DEBUG_CAPTURE_MAX_HTML_BYTES].decode("utf-8", errors="ignore") + "\n<!-- truncated -->"
+    safe_name = re.sub(r"[^A-Za-z0-9_.-]", "_", name)
+    stamp = datetime.now().strftime("%Y%m%d-%H%M%S")
+    base = os.path.join(DEBUG_CAPTURE_DIR, f"{stamp}-{safe_name}-{uuid.uuid4().hex[:8]}")
+    _writer.submit(_write, base, png, html)
+
+
+def capture_failure(driver, name: str) -> None:
+    capture(driver, name, failure=True)
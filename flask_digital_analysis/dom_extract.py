@@ -0,0 +1,111 @@
+"""
+Single-roundtrip DOM extraction for the Selenium scrapers.
+One injected script expands "More" buttons and reads every field of every card, instead of one
+WebDriver HTTP call per find_element / .text / get_attribute.
+
+A field config maps output keys to selector fallback lists, tried in order:
+
+    {
+        "expand": ['button.more[aria-expanded="false"]', 'xpath:.//button[normalize-space(.)="More"]'],
+        "fields": {
+            "name": {"selectors": ["div.title", "h3"]},                         # first non-empty innerText
+            "stars": {"selectors": ["span.stars"], "attr": "aria-label"},       # attribute, falling back to innerText
+            "names": {"selectors": ["a.title", "h3"], "candidates": True},      # every selector's value, in order
+            "tags": {"selectors": ['a[href*="/tag/"]'], "all": True, "attr": "href", "within": "name"},
+        },
+    }
+
+Selectors are CSS unless prefixed with "xpath:" (evaluated relative to the card). "all" returns
+[{"text", "value"}] for every match; "within" searches inside the element matched by another field.
+"""
+
+import logging
+from typing import Any, Dict, List, Optional, Sequence
+
+_EXTRACT_JS = r"""
+const [roots, rootSelector, config, settleMs, done] = arguments;
+
+function query(root, selector, all) {
+    try {
+        if (selector.startsWith('xpath:')) {
+            const type = all ? XPathResult.ORDERED_NODE_SNAPSHOT_TYPE : XPathResult.FIRST_ORDERED_NODE_TYPE;
+            const result = document.evaluate(selector.slice(6), root, null, type, null);
+            if (!all) return result.singleNodeValue ? [result.singleNodeValue] : [];
+            const nodes = [];
+            for (let i = 0; i < result.snapshotLength; i++) nodes.push(result.snapshotItem(i));
+            return nodes;
+        }
+        if (all) return Array.from(root.querySelectorAll(selector));
+        const node = root.querySelector(selector);
+        return node ? [node] : [];
+    } catch (e) {
+        return [];
+    }
+}
+
+function read(node, attr) {
+    const text = (node.innerText || node.textContent || '').trim();
+    if (!attr) return text;
+    return (node.getAttribute(attr) || text || '').trim();
+}
+
+const cards = roots && roots.length ? roots
+    : rootSelector ? Array.from(document.querySelectorAll(rootSelector))
+    : [document];
+
+let expanded = 0;
+for (const card of cards) {
+    for (const selector of (config.expand || [])) {
+        const buttons = query(card, selector, true);
+        if (!buttons.length) continue;
+        for (const button of buttons) { try { button.click(); expanded++; } catch (e) {} }
+        break;
+    }
+}
+
+function extract() {
+    return cards.map(card => {
+        const out = {};
+        const matched = {};
+        for (const [key, field] of Object.entries(config.fields)) {
+            const scope = field.within ? matched[field.within] : card;
+            if (!scope) { out[key] = field.all || field.candidates ? [] : ''; continue; }
+            if (field.all) {
+                let nodes = [];
+                for (const selector of field.selectors) {
+                    nodes = query(scope, selector, true);
+                    if (nodes.length) break;
+                }
+                out[key] = nodes.map(node => ({text: read(node, null), value: field.attr ? (node.getAttribute(field.attr) || '') : ''}));
+                continue;
+            }
+            const values = [];
+            for (const selector of field.selectors) {
+                const node = query(scope, selector, false)[0];
+                if (!node) continue;
+                const value = read(node, field.attr);
+                if (!value) continue;
+                if (!matched[key]) matched[key] = node;
+                values.push(value);
+                if (!field.candidates) break;
+            }
+            out[key] = field.candidates ? values : (values[0] || '');
+        }
+        return out;
+    });
+}
+
+// Expanded text is re-rendered by the page's own handlers, so give them a moment before reading
+if (expanded && settleMs) setTimeout(() => done(extract()), settleMs);
+else done(extract());
+"""
+
+
+def extract_fields(driver, config: Dict[str, Any], roots: Optional[Sequence] = None, root_selector: Optional[str] = None, settle_ms: int = 150) -> List[Dict[str, Any]]:
+    """
+    Run one script over the given card elements (or every match of root_selector, or the whole
+    document) and return one dict per card with a key per configured field.
+    """
+    results = driver.execute_async_script(_EXTRACT_JS, list(roots or []), root_selector, config, settle_ms)
+    logging.info(f"Extracted {len(config.get('fields', {}))} fields from {len(results)} card(s) in one script call")
+    return results
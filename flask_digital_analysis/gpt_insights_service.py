@@ -389,6 +389,14 @@ class GPTInsightsService:
         Open Graph Tags: {seo_data.get('og_tags', {})}
         """
         
+        site_crawl = seo_data.get('site_crawl')
+        if site_crawl:
+            variable_data += f"""
+        Site Crawl ({site_crawl.get('pages_crawled')} pages, {site_crawl.get('pages_failed')} failed):
+        - Alt Text Coverage: {site_crawl.get('alt_coverage')}%
+        - Issues: {json.dumps(site_crawl.get('issues', {}))}
+        """
+        
         if return_split:
             return (static_template, variable_data)
         
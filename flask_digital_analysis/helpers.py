@@ -1,4 +1,5 @@
 import re
+import ipaddress
 from urllib.parse import urlparse
 from typing import List, Optional
 
@@ -18,6 +19,25 @@ def extract_domain(url: str) -> str:
     parsed_url = urlparse(url)
     return parsed_url.netloc
 
+# Second-level labels that ccTLDs register names under (example.co.uk, example.com.eg)
+_SECOND_LEVEL_LABELS = {"co", "com", "net", "org", "gov", "edu", "ac", "or", "ne", "go"}
+
+def registrable_domain(host: str) -> str:
+    """
+    The domain a host was registered under: example.com for shop.example.com, example.co.uk for
+    www.example.co.uk. An approximation without the public suffix list; IP addresses are returned as-is.
+    """
+    host = (host or "").lower().rstrip(".")
+    try:
+        ipaddress.ip_address(host)
+        return host
+    except ValueError:
+        pass
+    labels = host.split(".")
+    if len(labels) >= 3 and len(labels[-1]) == 2 and labels[-2] in _SECOND_LEVEL_LABELS:
+        return ".".join(labels[-3:])
+    return ".".join(labels[-2:])
+
 def is_social_media_url(url: str) -> bool:
     social_domains = [
         'facebook.com', 'instagram.com', 'twitter.com', 'linkedin.com',
@@ -0,0 +1,228 @@
+"""
+On-disk HTTP cache shared by every worker on the host.
+Fetched pages are stored with their validators (ETag / Last-Modified) and revalidated with
+If-None-Match / If-Modified-Since on the next fetch, so an unchanged page costs a 304 instead of
+the full body. Entries are keyed by URL and User-Agent (the analyzers send different ones), and a
+stored copy is only reused when the request headers named in its Vary match. Responses that vary
+on everything or on cookies are not stored. PageSpeed results are stored per (URL, strategy) for PAGESPEED_CACHE_TTL, which
+keeps repeated audits within the API quota. Storage is SQLite in WAL mode, one connection per call.
+"""
+
+import os
+import json
+import time
+import sqlite3
+import asyncio
+import logging
+import threading
+from typing import Any, Dict, List, Optional
+from http_client import HttpResponse, fetch
+
+HTTP_CACHE_ENABLED = os.environ.get("HTTP_CACHE_ENABLED", "true").lower() == "true"
+HTTP_CACHE_PATH = os.environ.get("HTTP_CACHE_PATH", "/tmp/http_cache/http.sqlite3")
+# Stored pages unused for this long are dropped
+HTTP_CACHE_TTL = int(os.environ.get("HTTP_CACHE_TTL", 7 * 24 * 3600))
+HTTP_CACHE_MAX_BODY_BYTES = int(os.environ.get("HTTP_CACHE_MAX_BODY_BYTES", 5 * 1024 * 1024))
+PAGESPEED_CACHE_TTL = int(os.environ.get("PAGESPEED_CACHE_TTL", 24 * 3600))
+
+
+# Vary values that make a stored copy unusable for another request from this shared cache
+_UNCACHEABLE_VARY = {"*", "cookie"}
+
+
+def _vary_names(headers: Dict[str, str]) -> List[str]:
+    vary = next((value for key, value in headers.items() if key.lower() == "vary"), "")
+    return sorted({name.strip().lower() for name in vary.split(",") if name.strip()})
+
+
+def _request_values(request_headers: Dict[str, str], names: List[str]) -> Dict[str, str]:
+    lowered = {key.lower(): value for key, value in request_headers.items()}
+    return {name: lowered.get(name, "") for name in names}
+
+
+def _cache_key(url: str, request_headers: Dict[str, str]) -> str:
+    return f"{_request_values(request_headers, ['user-agent'])['user-agent']}\n{url}"
+
+
+def _storable(response: HttpResponse) -> bool:
+    headers = {key.lower(): value for key, value in response.headers.items()}
+    if response.status != 200 or len(response.body) > HTTP_CACHE_MAX_BODY_BYTES:
+        return False
+    if "no-store" in headers.get("cache-control", "").lower():
+        return False
+    if _UNCACHEABLE_VARY & set(_vary_names(headers)):
+        return False
+    return "etag" in headers or "last-modified" in headers
+
+
+class HttpCache:
+    """SQLite store of validated responses and PageSpeed results"""
+
+    def __init__(self, path: str = HTTP_CACHE_PATH):
+        self.path = path
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            # Superseded by cached_responses, which is keyed by User-Agent as well as URL
+            conn.execute("DROP TABLE IF EXISTS responses")
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS cached_responses (
+                    key TEXT PRIMARY KEY,
+                    final_url TEXT NOT NULL,
+                    headers TEXT NOT NULL,
+                    body BLOB NOT NULL,
+                    encoding TEXT NOT NULL,
+                    etag TEXT,
+                    last_modified TEXT,
+                    vary TEXT NOT NULL,
+                    used_at REAL NOT NULL
+                )
+            """)
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS pagespeed_results (
+                    key TEXT PRIMARY KEY,
+                    result TEXT NOT NULL,
+                    created_at REAL NOT NULL
+                )
+            """)
+        self.purge_expired()
+
+    def _connect(self):
+        return sqlite3.connect(self.path, timeout=30)
+
+    def get_response(self, url: str, request_headers: Dict[str, str]) -> Optional[Dict[str, Any]]:
+        """The stored copy for this URL and User-Agent, if the request matches the headers it varies on"""
+        with self._connect() as conn:
+            row = conn.execute(
+                "SELECT final_url, headers, body, encoding, etag, last_modified, vary FROM cached_responses WHERE key = ?",
+                (_cache_key(url, request_headers),)
+            ).fetchone()
+        if row is None:
+            return None
+        final_url, headers, body, encoding, etag, last_modified, vary = row
+        vary = json.loads(vary)
+        if _request_values(request_headers, list(vary)) != vary:
+            return None
+        return {
+            "final_url": final_url,
+            "headers": json.loads(headers),
+            "body": body,
+            "encoding": encoding,
+            "etag": etag,
+            "last_modified": last_modified
+        }
+
+    def put_response(self, url: str, request_headers: Dict[str, str], response: HttpResponse) -> None:
+        headers = {key.lower(): value for key, value in response.headers.items()}
+        vary = _request_values(request_headers, _vary_names(headers))
+        with self._connect() as conn:
+            conn.execute(
+                """
+                INSERT OR REPLACE INTO cached_responses
+                (key, final_url, headers, body, encoding, etag, last_modified, vary, used_at)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+                """,
+                (_cache_key(url, request_headers), response.url, json.dumps(response.headers), response.body,
+                 response.encoding, headers.get("etag"), headers.get("last-modified"), json.dumps(vary), time.time())
+            )
+
+    def touch_response(self, url: str, request_headers: Dict[str, str]) -> None:
+        with self._connect() as conn:
+            conn.execute("UPDATE cached_responses SET used_at = ? WHERE key = ?", (time.time(), _cache_key(url, request_headers)))
+
+    def get_pagespeed(self, url: str, strategy: str) -> Optional[Dict[str, Any]]:
+        with self._connect() as conn:
+            row = conn.execute(
+                "SELECT result FROM pagespeed_results WHERE key = ? AND created_at >= ?",
+                (f"{strategy}:{url}", time.time() - PAGESPEED_CACHE_TTL)
+            ).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def put_pagespeed(self, url: str, strategy: str, result: Dict[str, Any]) -> None:
+        with self._connect() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO pagespeed_results (key, result, created_at) VALUES (?, ?, ?)",
+                (f"{strategy}:{url}", json.dumps(result), time.time())
+            )
+
+    def purge_expired(self) -> None:
+        now = time.time()
+        with self._connect() as conn:
+            conn.execute("DELETE FROM cached_responses WHERE used_at < ?", (now - HTTP_CACHE_TTL,))
+            conn.execute("DELETE FROM pagespeed_results WHERE created_at < ?", (now - PAGESPEED_CACHE_TTL,))
+
+
+_cache: Optional[HttpCache] = None
+_cache_lock = threading.Lock()
+_cache_failed = False
+
+
+def get_http_cache() -> Optional[HttpCache]:
+    """Shared cache, or None when disabled (HTTP_CACHE_ENABLED=false) or the database cannot be opened"""
+    global _cache, _cache_failed
+    if not HTTP_CACHE_ENABLED or _cache_failed:
+        return None
+    if _cache is not None:
+        return _cache
+    with _cache_lock:
+        if _cache is None and not _cache_failed:
+            try:
+                _cache = HttpCache()
+            except Exception as error:
+                logging.error(f"HTTP cache unavailable, fetching without it: {error}")
+                _cache_failed = True
+    return _cache
+
+
+async def _call(method, *args):
+    """Run a cache method off the event loop; cache errors are logged and treated as a miss"""
+    try:
+        return await asyncio.get_running_loop().run_in_executor(None, method, *args)
+    except Exception as error:
+        logging.warning(f"HTTP cache {method.__name__} failed: {error}")
+        return None
+
+
+async def fetch_revalidated(url: str, headers: Optional[Dict[str, str]] = None, **kwargs) -> HttpResponse:
+    """
+    GET url through the cache: a stored copy is revalidated with its ETag / Last-Modified, and a
+    304 is answered from the stored body. Returns the same HttpResponse as http_client.fetch.
+    """
+    cache = get_http_cache()
+    if cache is None:
+        return await fetch(url, headers=headers, **kwargs)
+
+    headers = dict(headers or {})
+    stored = await _call(cache.get_response, url, headers)
+    request_headers = dict(headers)
+    if stored is not None:
+        if stored["etag"]:
+            request_headers["If-None-Match"] = stored["etag"]
+        if stored["last_modified"]:
+            request_headers["If-Modified-Since"] = stored["last_modified"]
+
+    response = await fetch(url, headers=request_headers, **kwargs)
+    if response.status == 304 and stored is not None:
+        await _call(cache.touch_response, url, headers)
+        return HttpResponse(
+            status=200,
+            url=stored["final_url"],
+            headers=stored["headers"],
+            body=stored["body"],
+            encoding=stored["encoding"],
+            elapsed=response.elapsed
+        )
+    if _storable(response):
+        await _call(cache.put_response, url, headers, response)
+    return response
+
+
+async def get_cached_pagespeed(url: str, strategy: str) -> Optional[Dict[str, Any]]:
+    cache = get_http_cache()
+    return await _call(cache.get_pagespeed, url, strategy) if cache is not None else None
+
+
+async def put_cached_pagespeed(url: str, strategy: str, scores: Dict[str, Any]) -> None:
+    cache = get_http_cache()
+    if cache is not None:
+        await _call(cache.put_pagespeed, url, strategy, scores)
@@ -0,0 +1,134 @@
+"""
+Process-wide HTTP client for the analyzers.
+Requests run on the worker's persistent event loop (worker_loop), which owns a single aiohttp
+session, so connections, keep-alive sockets, the DNS cache and the SSL context (CA bundle parsed
+once) are shared by every request in the worker. Code on other loops (scrapers running
+asyncio.run in a thread) is bridged onto it.
+
+Responses are read fully and returned as HttpResponse, so callers never hold a connection.
+Idempotent requests are retried on connection errors, timeouts and 502/503/504.
+"""
+
+import os
+import ssl
+import json
+import atexit
+import asyncio
+import logging
+import threading
+import certifi
+import aiohttp
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Any, Dict, Optional
+from worker_loop import get_loop
+
+HTTP_TIMEOUT = float(os.environ.get("HTTP_TIMEOUT", 30))
+HTTP_RETRIES = int(os.environ.get("HTTP_RETRIES", 2))
+HTTP_POOL_LIMIT = int(os.environ.get("HTTP_POOL_LIMIT", 100))
+# Concurrent connections per host, so one slow site cannot take the whole pool
+HTTP_PER_HOST_LIMIT = int(os.environ.get("HTTP_PER_HOST_LIMIT", 8))
+HTTP_DNS_TTL = int(os.environ.get("HTTP_DNS_TTL", 300))
+DEFAULT_USER_AGENT = (
+    "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 "
+    "(KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36"
+)
+
+_RETRY_STATUSES = {502, 503, 504}
+_IDEMPOTENT_METHODS = {"GET", "HEAD", "OPTIONS"}
+
+
+@dataclass
+class HttpResponse:
+    status: int
+    url: str
+    headers: Dict[str, str]
+    body: bytes
+    encoding: str = "utf-8"
+    elapsed: float = 0.0
+
+    def text(self) -> str:
+        return self.body.decode(self.encoding or "utf-8", errors="replace")
+
+    def json(self) -> Any:
+        return json.loads(self.body)
+
+
+@lru_cache(maxsize=1)
+def ssl_context() -> ssl.SSLContext:
+    return ssl.create_default_context(cafile=certifi.where())
+
+
+class _Client:
+    """The shared session, living on the worker loop"""
+
+    def __init__(self):
+        self.loop = get_loop()
+        self.session: Optional[aiohttp.ClientSession] = None
+
+    async def _session(self) -> aiohttp.ClientSession:
+        if self.session is None or self.session.closed:
+            connector = aiohttp.TCPConnector(
+                limit=HTTP_POOL_LIMIT,
+                limit_per_host=HTTP_PER_HOST_LIMIT,
+                ttl_dns_cache=HTTP_DNS_TTL,
+                ssl=ssl_context()
+            )
+            self.session = aiohttp.ClientSession(connector=connector, headers={"User-Agent": DEFAULT_USER_AGENT})
+        return self.session
+
+    async def request(self, method: str, url: str, timeout: float, retries: int, **kwargs) -> HttpResponse:
+        session = await self._session()
+        attempts = retries + 1 if method.upper() in _IDEMPOTENT_METHODS else 1
+        for attempt in range(attempts):
+            started = self.loop.time()
+            try:
+                async with session.request(method, url, timeout=aiohttp.ClientTimeout(total=timeout), **kwargs) as response:
+                    body = await response.read()
+                    if response.status in _RETRY_STATUSES and attempt < attempts - 1:
+                        logging.warning(f"HTTP {response.status} from {url}, retrying ({attempt + 1}/{retries})")
+                    else:
+                        return HttpResponse(
+                            status=response.status,
+                            url=str(response.url),
+                            headers=dict(response.headers),
+                            body=body,
+                            encoding=response.get_encoding() if body else "utf-8",
+                            elapsed=self.loop.time() - started
+                        )
+            except (aiohttp.ClientConnectionError, asyncio.TimeoutError) as error:
+                if attempt == attempts - 1:
+                    raise
+                logging.warning(f"{type(error).__name__} fetching {url}, retrying ({attempt + 1}/{retries})")
+            await asyncio.sleep(0.5 * 2 ** attempt)
+
+    def close(self):
+        if self.session is not None and not self.session.closed:
+            asyncio.run_coroutine_threadsafe(self.session.close(), self.loop).result(timeout=5)
+
+
+_client: Optional[_Client] = None
+_client_lock = threading.Lock()
+
+
+def _get_client() -> _Client:
+    global _client
+    if _client is None:
+        with _client_lock:
+            if _client is None:
+                _client = _Client()
+                atexit.register(_client.close)
+    return _client
+
+
+async def fetch(url: str, method: str = "GET", *, timeout: float = HTTP_TIMEOUT, retries: int = HTTP_RETRIES, **kwargs) -> HttpResponse:
+    """
+    Make a request on the shared session from any event loop. kwargs are passed to
+    aiohttp's session.request (headers, params, data, json, allow_redirects, ...).
+    """
+    client = _get_client()
+    request = client.request(method, url, timeout, retries, **kwargs)
+    if asyncio.get_running_loop() is client.loop:
+        return await request
+    future = asyncio.run_coroutine_threadsafe(request, client.loop)
+    return await asyncio.wrap_future(future)
@@ -1,12 +1,21 @@
 import instaloader
 import pandas as pd
 from datetime import datetime
-from typing import Dict, Any, Optional
+from typing import Dict, Any, List, Optional, Tuple
 import os
 import json
-import aiohttp
+import time
+import logging
 import asyncio
 from bs4 import BeautifulSoup
+from http_client import fetch
+from social_cache import get_social_cache, posts_key
+
+# Posts analysed per profile, and how long one analysis may spend paging through them
+INSTAGRAM_POST_BUDGET = int(os.environ.get("INSTAGRAM_POST_BUDGET", 41))
+INSTAGRAM_TIME_BUDGET = float(os.environ.get("INSTAGRAM_TIME_BUDGET", 20))
+# After this long the cached post history is dropped and fetched in full, refreshing old posts' counts
+INSTAGRAM_HISTORY_TTL = int(os.environ.get("INSTAGRAM_HISTORY_TTL", 24 * 3600))
 
 class InstagramAnalyzer:
 
@@ -74,14 +83,27 @@ class InstagramAnalyzer:
             }
     
     async def _analyze_with_session(self, username: str) -> Dict[str, Any]:
-        
-        profile = instaloader.Profile.from_username(self.loader.context, username)
-        
-        posts_data = []
-        hashtags = []
-        
+        # instaloader is blocking (one GraphQL request per page of posts); keep it off the event loop
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(None, self._analyze_with_session_sync, username)
+
+    def _fetch_new_posts(self, profile, known: set) -> Tuple[List[Dict[str, Any]], bool]:
+        """
+        Newest posts first, stopping at the first post already in the cached history, at
+        INSTAGRAM_POST_BUDGET posts or after INSTAGRAM_TIME_BUDGET seconds. Also returns whether the
+        fetch joined up with the history (reached a known post or the end of the feed); when a budget
+        cut it short, posts between the last one fetched and the history are missing.
+        """
+        deadline = time.monotonic() + INSTAGRAM_TIME_BUDGET
+        new_posts = []
         for post in profile.get_posts():
-            posts_data.append({
+            if post.shortcode in known:
+                # Pinned posts are listed first regardless of age, so they do not mark the end of new posts
+                if getattr(post, "is_pinned", False):
+                    continue
+                return new_posts, True
+            new_posts.append({
+                'shortcode': post.shortcode,
                 'date': post.date.isoformat(),
                 'likes': post.likes,
                 'comments': post.comments,
@@ -90,9 +112,32 @@ class InstagramAnalyzer:
                 'url': post.url,
                 'is_video': post.is_video
             })
-            if len(posts_data) > 40:
-                break
-            hashtags.extend(post.caption_hashtags)
+            if len(new_posts) >= INSTAGRAM_POST_BUDGET:
+                return new_posts, False
+            if time.monotonic() > deadline:
+                logging.warning(f"Instagram time budget reached after {len(new_posts)} new posts for {profile.username}")
+                return new_posts, False
+        return new_posts, True
+
+    def _analyze_with_session_sync(self, username: str) -> Dict[str, Any]:
+        
+        profile = instaloader.Profile.from_username(self.loader.context, username)
+
+        cache = get_social_cache()
+        owner = posts_key("instagram", username)
+        history = cache.get_history(owner, INSTAGRAM_HISTORY_TTL) if cache else []
+        new_posts, contiguous = self._fetch_new_posts(profile, {post['shortcode'] for post in history})
+        if not contiguous:
+            # The fetch stopped before reaching the history; merging would hide the posts in between
+            # for good, so the fetched posts replace the history instead
+            history = []
+        new_shortcodes = {post['shortcode'] for post in new_posts}
+        posts_data = (new_posts + [post for post in history if post['shortcode'] not in new_shortcodes])[:INSTAGRAM_POST_BUDGET]
+        if cache and new_posts:
+            cache.put_history(owner, posts_data, reset=not history)
+        logging.info(f"Instagram {username}: {len(new_posts)} new posts fetched, {len(posts_data) - len(new_posts)} from history")
+
+        hashtags = [tag for post in posts_data for tag in post['hashtags']]
 
         total_followers = profile.followers
         total_following = profile.followees
@@ -156,46 +201,48 @@ class InstagramAnalyzer:
         }
         
         try:
-            async with aiohttp.ClientSession(headers=headers) as session:
-                async with session.get(url) as response:
-                    if response.status != 200:
-                        raise Exception(f"HTTP {response.status}: Unable to fetch profile")
-                    
-                    html = await response.text()
-                    soup = BeautifulSoup(html, 'html.parser')
-                    
-                    profile_data = self._extract_public_profile_data(soup, username)
-                    
-                    return {
-                        "username": username,
-                        "full_name": profile_data.get("full_name", username),
-                        "biography": profile_data.get("biography", ""),
-                        "followers": profile_data.get("followers", 0),
-                        "following": profile_data.get("following", 0),
-                        "posts_count": profile_data.get("posts_count", 0),
-                        "is_private": profile_data.get("is_private", False),
-                        "is_verified": profile_data.get("is_verified", False),
-                        "external_url": profile_data.get("external_url"),
-                        "engagement": {
-                            "avg_likes": 0,
-                            "avg_comments": 0,
-                            "engagement_per_post": 0,
-                            "engagement_rate": 0
-                        },
-                        "content_analysis": {
-                            "posts_analyzed": 0,
-                            "top_hashtags": {},
-                            "has_videos": False,
-                            "recent_posts": []
-                        },
-                        "success": True,
-                        "method": "public_scraping",
-                        "note": "Limited data available from public scraping. For detailed analysis, Instagram authentication is required."
-                    }
-                    
+            response = await fetch(url, headers=headers)
+            if response.status != 200:
+                raise Exception(f"HTTP {response.status}: Unable to fetch profile")
+            
+            html = response.text()
+            # Parsing is CPU-bound; keep it off the worker loop shared by concurrent analyses
+            loop = asyncio.get_running_loop()
+            profile_data = await loop.run_in_executor(None, self._parse_public_profile, html, username)
+            
+            return {
+                "username": username,
+                "full_name": profile_data.get("full_name", username),
+                "biography": profile_data.get("biography", ""),
+                "followers": profile_data.get("followers", 0),
+                "following": profile_data.get("following", 0),
+                "posts_count": profile_data.get("posts_count", 0),
+                "is_private": profile_data.get("is_private", False),
+                "is_verified": profile_data.get("is_verified", False),
+                "external_url": profile_data.get("external_url"),
+                "engagement": {
+                    "avg_likes": 0,
+                    "avg_comments": 0,
+                    "engagement_per_post": 0,
+                    "engagement_rate": 0
+                },
+                "content_analysis": {
+                    "posts_analyzed": 0,
+                    "top_hashtags": {},
+                    "has_videos": False,
+                    "recent_posts": []
+                },
+                "success": True,
+                "method": "public_scraping",
+                "note": "Limited data available from public scraping. For detailed analysis, Instagram authentication is required."
+            }
+            
         except Exception as e:
             raise Exception(f"Public profile analysis failed: {str(e)}")
     
+    def _parse_public_profile(self, html: str, username: str) -> Dict[str, Any]:
+        return self._extract_public_profile_data(BeautifulSoup(html, 'html.parser'), username)
+
     def _extract_public_profile_data(self, soup: BeautifulSoup, username: str) -> Dict[str, Any]:
         
         profile_data = {
@@ -0,0 +1,167 @@
+"""
+Google Maps review capture from the network instead of the rendered DOM.
+The reviews panel pages in its reviews through XHR batches as it scrolls. With Chrome's
+performance log enabled, every matching response is read via the DevTools protocol
+(Network.getResponseBody) and parsed directly, so reviews come back with numeric star ratings
+and the page never has to lay out or expand review cards for us to read them.
+
+Payloads are nested JSON arrays; the positions of each field are kept in REVIEW_PAYLOADS so a
+Google-side layout change is a config edit. The payload format is undocumented, so network capture
+is opt-in (REVIEW_CAPTURE_MODE=network) and gives up after REVIEW_FIRST_PAYLOAD_TIMEOUT when no
+payload parses, leaving the DOM scraper to do the work.
+"""
+
+import os
+import json
+import time
+import base64
+import logging
+from typing import Any, Dict, List, Optional, Sequence
+
+# "network" captures review payloads over CDP; "dom" always scrapes the rendered review cards
+REVIEW_CAPTURE_MODE = os.environ.get("REVIEW_CAPTURE_MODE", "dom").lower()
+# How long to wait for the first review payload after opening the reviews tab before falling back to the DOM
+REVIEW_FIRST_PAYLOAD_TIMEOUT = float(os.environ.get("REVIEW_FIRST_PAYLOAD_TIMEOUT", 3))
+
+# Review RPCs and where each field sits in their response. "reviews" locates the list of
+# reviews in the payload, "item" the review inside each list entry, "fields" the value in the review.
+REVIEW_PAYLOADS = [
+    {
+        "url": "/maps/rpc/listugcposts",
+        "reviews": [2],
+        "item": [0],
+        "fields": {"review_id": [0], "name": [1, 4, 5, 0], "stars": [2, 0, 0], "review_text": [2, 15, 0, 0]}
+    },
+    {
+        "url": "/maps/preview/review/listentitiesreviews",
+        "reviews": [2],
+        "item": [],
+        "fields": {"review_id": [10], "name": [0, 1], "stars": [4], "review_text": [3]}
+    }
+]
+
+# Responses are prefixed with this to defeat JSON hijacking
+_XSSI_PREFIX = ")]}'"
+
+# Scroll the reviews pane (the largest scrollable container) to its end without touching review cards
+_SCROLL_PANE_JS = """
+let pane = window.__reviewPane;
+if (!pane || !pane.isConnected) {
+    pane = null;
+    for (const node of document.querySelectorAll('div.m6QErb, div[role="main"] div')) {
+        const overflow = getComputedStyle(node).overflowY;
+        if ((overflow === 'auto' || overflow === 'scroll') && node.scrollHeight > node.clientHeight + 50) {
+            if (!pane || node.scrollHeight > pane.scrollHeight) pane = node;
+        }
+    }
+    window.__reviewPane = pane;
+}
+if (!pane) return false;
+pane.scrollTop = pane.scrollHeight;
+return true;
+"""
+
+
+def enable_performance_logging(options) -> None:
+    """Ask chromedriver to record Network.* events so responses can be matched and read back"""
+    options.set_capability("goog:loggingPrefs", {"performance": "ALL"})
+
+
+def _dig(value: Any, path: Sequence[int]) -> Any:
+    for index in path:
+        if not isinstance(value, list) or index >= len(value):
+            return None
+        value = value[index]
+    return value
+
+
+def parse_review_payload(body: str, spec: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """Turn one review RPC response into dicts with review_id, name, stars (int or None) and review_text"""
+    if body.startswith(_XSSI_PREFIX):
+        body = body[len(_XSSI_PREFIX):]
+    data = json.loads(body)
+    parsed = []
+    for entry in _dig(data, spec["reviews"]) or []:
+        review = _dig(entry, spec["item"])
+        if review is None:
+            continue
+        fields = {key: _dig(review, path) for key, path in spec["fields"].items()}
+        stars = fields.get("stars")
+        parsed.append({
+            "review_id": str(fields.get("review_id") or ""),
+            "name": fields.get("name") if isinstance(fields.get("name"), str) else "",
+            "stars": int(stars) if isinstance(stars, (int, float)) else None,
+            "review_text": fields.get("review_text") if isinstance(fields.get("review_text"), str) else ""
+        })
+    return parsed
+
+
+def scroll_reviews_pane(driver) -> bool:
+    return bool(driver.execute_script(_SCROLL_PANE_JS))
+
+
+class ReviewCapture:
+    """
+    Collects reviews from the driver's performance log. Create it before triggering the first
+    review request (it drains log entries left over from earlier page loads), then call poll()
+    or wait_for_more() after each scroll.
+    """
+
+    def __init__(self, driver):
+        self.driver = driver
+        self.reviews: List[Dict[str, Any]] = []
+        self.payloads = 0
+        self._seen = set()
+        self._pending: Dict[str, Dict[str, Any]] = {}
+        self.driver.get_log("performance")
+
+    def _spec_for(self, url: str) -> Optional[Dict[str, Any]]:
+        for spec in REVIEW_PAYLOADS:
+            if spec["url"] in url:
+                return spec
+        return None
+
+    def poll(self) -> int:
+        """Read any finished review responses; returns how many new reviews were added"""
+        before = len(self.reviews)
+        for entry in self.driver.get_log("performance"):
+            try:
+                message = json.loads(entry["message"])["message"]
+            except (KeyError, ValueError):
+                continue
+            method = message.get("method")
+            params = message.get("params", {})
+            if method == "Network.responseReceived":
+                spec = self._spec_for(params.get("response", {}).get("url", ""))
+                if spec is not None:
+                    self._pending[params["requestId"]] = spec
+            elif method == "Network.loadingFinished" and params.get("requestId") in self._pending:
+                self._read(params["requestId"], self._pending.pop(params["requestId"]))
+        return len(self.reviews) - before
+
+    def _read(self, request_id: str, spec: Dict[str, Any]) -> None:
+        try:
+            response = self.driver.execute_cdp_cmd("Network.getResponseBody", {"requestId": request_id})
+            body = response.get("body", "")
+            if response.get("base64Encoded"):
+                body = base64.b64decode(body).decode("utf-8", errors="replace")
+            reviews = parse_review_payload(body, spec)
+        except Exception as error:
+            logging.warning(f"Could not read review payload {request_id}: {error}")
+            return
+        self.payloads += 1
+        for review in reviews:
+            key = review["review_id"] or (review["name"], review["review_text"])
+            if key in self._seen:
+                continue
+            self._seen.add(key)
+            self.reviews.append(review)
+
+    def wait_for_more(self, timeout: float) -> int:
+        """Poll until new reviews arrive or timeout passes; returns how many were added"""
+        deadline = time.monotonic() + timeout
+        added = self.poll()
+        while not added and time.monotonic() < deadline:
+            time.sleep(0.2)
+            added = self.poll()
+        return added
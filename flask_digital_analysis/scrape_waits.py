@@ -0,0 +1,116 @@
+"""
+Wait strategies for the Selenium scrapers.
+Explicit WebDriverWait conditions replace fixed sleeps: each helper returns as soon as the page
+is ready and only spends its full timeout when the page really is stuck.
+"""
+
+import os
+import time
+from typing import List, Optional, Sequence, Tuple
+from selenium.webdriver.common.by import By
+from selenium.webdriver.support.ui import WebDriverWait
+from selenium.common.exceptions import TimeoutException, WebDriverException
+
+SCRAPE_WAIT_TIMEOUT = float(os.environ.get("SCRAPE_WAIT_TIMEOUT", 20))
+# Scroll rounds without new reviews before giving up; the wait per round grows each idle round
+SCROLL_IDLE_ROUNDS = int(os.environ.get("SCROLL_IDLE_ROUNDS", 5))
+SCROLL_MIN_WAIT = float(os.environ.get("SCROLL_MIN_WAIT", 0.5))
+SCROLL_MAX_WAIT = float(os.environ.get("SCROLL_MAX_WAIT", 4))
+
+# Resource Timing entries are added as requests complete; the buffer is raised so the count keeps growing
+_RESOURCE_COUNT_JS = """
+if (!window.__scrapeTimingBuffer) { performance.setResourceTimingBufferSize(10000); window.__scrapeTimingBuffer = true; }
+return performance.getEntriesByType('resource').length;
+"""
+
+
+def _find_all(driver, selector: str) -> list:
+    try:
+        return driver.find_elements(By.CSS_SELECTOR, selector)
+    except WebDriverException:
+        # e.g. an invalid selector in a fallback list
+        return []
+
+
+def wait_for_document_ready(driver, timeout: float = SCRAPE_WAIT_TIMEOUT) -> bool:
+    try:
+        WebDriverWait(driver, timeout).until(lambda d: d.execute_script("return document.readyState") == "complete")
+        return True
+    except TimeoutException:
+        return False
+
+
+def wait_for_any(driver, selectors: Sequence[str], timeout: float = SCRAPE_WAIT_TIMEOUT) -> Tuple[Optional[str], List]:
+    """Wait until one of the selectors matches; returns (selector, elements) or (None, []) on timeout"""
+    found = {}
+
+    def any_present(d):
+        for selector in selectors:
+            elements = _find_all(d, selector)
+            if elements:
+                found["selector"], found["elements"] = selector, elements
+                return True
+        return False
+
+    try:
+        WebDriverWait(driver, timeout, poll_frequency=0.25).until(any_present)
+        return found["selector"], found["elements"]
+    except TimeoutException:
+        return None, []
+
+
+def wait_for_count_increase(driver, selector: str, previous: int, timeout: float) -> List:
+    """Wait until more than `previous` elements match; returns the current matches either way"""
+    def more_present(d):
+        elements = _find_all(d, selector)
+        return elements if len(elements) > previous else False
+
+    try:
+        return WebDriverWait(driver, timeout, poll_frequency=0.2).until(more_present)
+    except TimeoutException:
+        return _find_all(driver, selector)
+
+
+def wait_for_network_idle(driver, idle_time: float = 0.5, timeout: float = 5) -> bool:
+    """Wait until no network request has completed for idle_time seconds"""
+    deadline = time.monotonic() + timeout
+    last_total, quiet_since = None, time.monotonic()
+    while time.monotonic() < deadline:
+        try:
+            total = driver.execute_script(_RESOURCE_COUNT_JS)
+        except WebDriverException:
+            return False
+        if total != last_total:
+            last_total, quiet_since = total, time.monotonic()
+        elif time.monotonic() - quiet_since >= idle_time:
+            return True
+        time.sleep(0.1)
+    return False
+
+
+class AdaptiveScroll:
+    """
+    Pacing for infinite-scroll lists: each round waits only until new items appear, the wait grows
+    while rounds come back empty, and the loop ends once `limit` items are loaded or after
+    `idle_rounds` empty rounds.
+    """
+
+    def __init__(self, limit: int, idle_rounds: int = SCROLL_IDLE_ROUNDS, min_wait: float = SCROLL_MIN_WAIT, max_wait: float = SCROLL_MAX_WAIT):
+        self.limit = limit
+        self.idle_rounds = idle_rounds
+        self.min_wait = min_wait
+        self.max_wait = max_wait
+        self.wait = max(min_wait, 1.0)
+        self.idle = 0
+
+    def done(self, count: int) -> bool:
+        return count >= self.limit or self.idle >= self.idle_rounds
+
+    def record(self, previous: int, current: int) -> None:
+        if current > previous:
+            self.idle = 0
+            self.wait = max(self.min_wait, self.wait / 2)
+        else:
+            self.idle += 1
+            self.wait = min(self.max_wait, self.wait * 2)
+
@@ -8,7 +8,7 @@ from selenium.webdriver import ActionChains
 from selenium.webdriver.common.actions.wheel_input import ScrollOrigin
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
-from webdriver_manager.chrome import ChromeDriverManager
+from selenium.common.exceptions import TimeoutException
 from typing import Dict, List, Optional, Any, Union
 import os
 os.environ.setdefault("TRANSFORMERS_NO_TF", "1")
@@ -16,7 +16,7 @@ import asyncio
 import aiohttp
 import json
 import re
-from transformers import pipeline, AutoTokenizer, AutoModelForSequenceClassification
+from concurrent.futures import ThreadPoolExecutor
 import plotly.express as px
 import plotly.graph_objects as go
 from datetime import datetime
@@ -26,34 +26,53 @@ sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 
 from gpt_insights_service import GPTInsightsService
 from competitor_search_service import CompetitorSearchService
+from sentiment_model import get_sentiment_model, SENTIMENT_BATCH_SIZE
+from sentiment_cache import SentimentCache, get_sentiment_cache
+from browser_pool import get_pool, launch_chrome
+from dom_extract import extract_fields
+from review_capture import (
+    REVIEW_CAPTURE_MODE, REVIEW_FIRST_PAYLOAD_TIMEOUT, ReviewCapture, enable_performance_logging, scroll_reviews_pane
+)
+from scrape_waits import (
+    AdaptiveScroll, SCROLL_MIN_WAIT, wait_for_any, wait_for_count_increase, wait_for_document_ready,
+    wait_for_network_idle
+)
+from debug_capture import capture_failure
 
 logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
 
+# "script" reads all review cards with one injected script; "webdriver" uses per-element lookups
+REVIEW_EXTRACTION_MODE = os.environ.get("REVIEW_EXTRACTION_MODE", "script").lower()
+
+# Selector fallbacks per review card field, tried in order
+REVIEW_CARD_FIELDS = {
+    "expand": [
+        'button.w8nwRe.kyuRq[aria-expanded="false"]',
+        'xpath:.//button[contains(@aria-label,"عرض المزيد") or normalize-space(.)="المزيد" or contains(normalize-space(.),"عرض المزيد")]'
+    ],
+    "fields": {
+        "name": {"selectors": ['div.d4r55', 'div[data-attrid="title"]', 'div.TSUbDb', 'span.X43Kjb']},
+        "reviews_count": {"selectors": ['div.RfnDt', 'span.RfnDt', 'div[data-attrid="reviewCount"]']},
+        "stars": {"selectors": ['span.kvMYJc', 'div[role="img"]', 'span[aria-label*="star"]'], "attr": "aria-label"},
+        "review_text": {"selectors": ['span.wiI7pd', 'div[data-attrid="description"]', 'div.MyEned', 'div.review-text']}
+    }
+}
+
+# Shared by every request in this worker; bounds how many review pages are scraped at once
+review_browser_pool = get_pool("review browser", lambda: SentimentAnalyzer.setup_browser(), prelaunch=True)
+
 class SentimentAnalyzer:
 
     
     def __init__(self):
         self.gpt_service = GPTInsightsService()
         self.competitor_search = CompetitorSearchService()
-        try:
-            import torch  
-            model_name = 'tabularisai/multilingual-sentiment-analysis'
-            tokenizer = AutoTokenizer.from_pretrained(model_name)
-            model = AutoModelForSequenceClassification.from_pretrained(model_name)
-            # device = 0 if hasattr(torch, 'cuda') and torch.cuda.is_available() else -1
-            self.sentiment_pipeline = pipeline(
-                task="text-classification",
-                model=model,
-                tokenizer=tokenizer,
-                device=-1
-            )
-        except Exception as error:
-            logging.error(f"Failed to initialize HF sentiment pipeline: {error}")
-            self.sentiment_pipeline = None
+        # Shared per worker (see sentiment_model.py); None if the model could not be loaded
+        self.sentiment_model = get_sentiment_model()
+        self.sentiment_cache = get_sentiment_cache()
     
-    def setup_browser(self):
-        from selenium.webdriver.chrome.service import Service
-        
+    @staticmethod
+    def setup_browser():
         edge_options = Options()
         try:
             edge_options.add_argument("--headless=new")
@@ -70,10 +89,12 @@ class SentimentAnalyzer:
         edge_options.add_experimental_option("useAutomationExtension", False)
         
         edge_options.add_argument("--window-size=1920,1080")
+        if REVIEW_CAPTURE_MODE == "network":
+            # Needed for the network review capture (see review_capture.py)
+            enable_performance_logging(edge_options)
         
-        try:            
-            service = Service(ChromeDriverManager().install())
-            return webdriver.Chrome(service=service, options=edge_options)            
+        try:
+            return launch_chrome(edge_options)
         except Exception as e:
             logging.error(f"Error with local driver: {e}")
             logging.info("Falling back to system Chrome driver...")
@@ -104,8 +125,6 @@ class SentimentAnalyzer:
     def _scrape_single_google_reviews(self, url: str, scroll_limit: int = 1000) -> pd.DataFrame:
         print(f"[DEBUG] _scrape_single_google_reviews starting for URL: {url}")
         print(f"[DEBUG] Scroll limit set to: {scroll_limit}")
-        browser = self.setup_browser()
-        print(f"[DEBUG] Browser setup complete, navigating to URL...")
         # Ensure Google Maps is loaded in English (Egypt region)
         if "hl=" not in url:
             if "?" in url:
@@ -113,22 +132,20 @@ class SentimentAnalyzer:
             else:
                 url += "?hl=en&gl=eg"
         print(f"[DEBUG] Final URL with language/region enforced: {url}")
+        with review_browser_pool.lease() as browser:
+            print(f"[DEBUG] Browser leased from pool, navigating to URL...")
+            return self._scrape_reviews_in_browser(browser, url, scroll_limit)
+
+    def _scrape_reviews_in_browser(self, browser, url: str, scroll_limit: int) -> pd.DataFrame:
         browser.get(url)
-        print(f"[DEBUG] Page loaded, waiting 10 seconds...")
-        time.sleep(10)
+        wait_for_document_ready(browser)
+        print(f"[DEBUG] Page loaded")
 
         try:
             action = ActionChains(browser)
             
             print(f"[DEBUG] Current page title: {browser.title}")
             print(f"[DEBUG] Current URL after navigation: {browser.current_url}")
-            cookie_button_selector = "[aria-label='Accept all']" # This is just a guess!
-            accept_button = WebDriverWait(browser, 10).until(
-                    EC.element_to_be_clickable((By.CSS_SELECTOR, cookie_button_selector))
-                )
-            accept_button.click()
-            print(f"[DEBUG] Clicked cookie consent button.")
-            print(f"[DEBUG] Current URL after navigation: {browser.current_url}")
             reviews_tab = None
             tab_selectors = [
                 'button[data-tab-index="1"]',
@@ -139,22 +156,27 @@ class SentimentAnalyzer:
                 'button:contains("Reviews")',
                 'button:contains("مراجعات")'
             ]
-            time.sleep(30)
-            browser.save_screenshot('vps_error.png')
-            with open('vps_error.html', 'w', encoding='utf-8') as f:
-                f.write(browser.page_source)
-            logging.critical("Saved debug screenshot and HTML. Check vps_error.png!")
-            for selector in tab_selectors:
+            cookie_button_selector = "[aria-label='Accept all']" # This is just a guess!
+            # Either the consent dialog or the place page shows up first; react to whichever it is
+            selector, elements = wait_for_any(browser, [cookie_button_selector] + tab_selectors)
+            if selector == cookie_button_selector:
                 try:
-                    reviews_tab = browser.find_element(By.CSS_SELECTOR, selector)
-                    print(f"[DEBUG] Reviews tab found using selector: {selector}")
-                    break
-                except Exception as e:
-                    print(f"[DEBUG] Reviews tab not found with selector '{selector}': {str(e)}")
-                    continue
+                    WebDriverWait(browser, 5).until(
+                        EC.element_to_be_clickable((By.CSS_SELECTOR, cookie_button_selector))
+                    ).click()
+                    print(f"[DEBUG] Clicked cookie consent button.")
+                except TimeoutException:
+                    print(f"[DEBUG] Cookie consent button was not clickable, continuing.")
+                print(f"[DEBUG] Current URL after navigation: {browser.current_url}")
+                selector, elements = wait_for_any(browser, tab_selectors)
+            
+            if selector is not None:
+                reviews_tab = elements[0]
+                print(f"[DEBUG] Reviews tab found using selector: {selector}")
             
             if reviews_tab is None:
                 print(f"[DEBUG] ERROR: Could not find reviews tab with any selector")
+                capture_failure(browser, "vps_error")
                 print(f"[DEBUG] Available buttons on page:")
                 buttons = browser.find_elements(By.TAG_NAME, "button")
                 for i, btn in enumerate(buttons[:10]): 
@@ -166,11 +188,26 @@ class SentimentAnalyzer:
                         pass
                 return pd.DataFrame()
             
+            capture = None
+            if REVIEW_CAPTURE_MODE == "network":
+                try:
+                    capture = ReviewCapture(browser)
+                except Exception as e:
+                    print(f"[DEBUG] Network review capture unavailable: {str(e)}")
+
             print(f"[DEBUG] Reviews tab found, clicking...")
             reviews_tab.click()
-            time.sleep(5)
-            
-            print(f"[DEBUG] Page URL after reviews tab click: {browser.current_url}")
+
+            if capture is not None:
+                try:
+                    records = self._capture_review_records(browser, capture, url, scroll_limit)
+                except Exception as e:
+                    records = []
+                    print(f"[DEBUG] Network review capture failed: {str(e)}")
+                if records:
+                    print(f"[DEBUG] Captured {len(records)} reviews from {capture.payloads} network payload(s) for {url}")
+                    return pd.DataFrame(records, columns=['Name', 'Reviews Count', 'Stars', 'Review Text', 'Source URL'])
+                print(f"[DEBUG] No review payloads captured, falling back to DOM scraping")
             
             review_selectors = [
                 'div.jftiEf.fontBodyMedium',
@@ -182,120 +219,43 @@ class SentimentAnalyzer:
                 'div[data-hveid]'
             ]
             
-            reviews = []
-            for selector in review_selectors:
-                try:
-                    reviews = browser.find_elements(By.CSS_SELECTOR, selector)
-                    if reviews:
-                        print(f"[DEBUG] Found {len(reviews)} reviews using selector: {selector}")
-                        break
-                except Exception as e:
-                    print(f"[DEBUG] No reviews found with selector '{selector}': {str(e)}")
-                    continue
+            review_selector, reviews = wait_for_any(browser, review_selectors)
+            print(f"[DEBUG] Page URL after reviews tab click: {browser.current_url}")
             
             if not reviews:
                 print(f"[DEBUG] ERROR: No reviews found with any selector")
-                print(f"[DEBUG] Page source snippet (first 1000 chars):")
-                page_source = browser.page_source[:1000]
-                print(page_source)
+                capture_failure(browser, "vps_error")
                 return pd.DataFrame()
             
-            print(f"[DEBUG] Initial reviews found: {len(reviews)}")
+            print(f"[DEBUG] Found {len(reviews)} reviews using selector: {review_selector}")
 
-            attempts = 0
+            pacing = AdaptiveScroll(scroll_limit)
             print(f"[DEBUG] Starting scroll loop with {len(reviews)} initial reviews, limit: {scroll_limit}")
-            while len(reviews) < scroll_limit:
-                last_review = reviews[-1] if reviews else None
-                if last_review:
-                    print(f"[DEBUG] Scrolling from last review element...")
-                    scroll_origin = ScrollOrigin.from_element(last_review)
-                    action.scroll_from_origin(scroll_origin, 0, 1000).perform()
-                    time.sleep(2)
-
-                new_reviews = []
-                for selector in review_selectors:
-                    try:
-                        new_reviews = browser.find_elements(By.CSS_SELECTOR, selector)
-                        if new_reviews:
-                            print(f"[DEBUG] After scroll, found {len(new_reviews)} reviews using selector: {selector}")
-                            break
-                    except Exception as e:
-                        continue
-                
-                if len(new_reviews) == len(reviews):
-                    attempts += 1
-                    print(f"[DEBUG] No new reviews found after scroll, attempt {attempts}/20")
-                    if attempts >= 20:
-                        print(f"[DEBUG] Reached max scroll attempts, breaking")
-                        break
-                else:
-                    attempts = 0
+            while not pacing.done(len(reviews)):
+                scroll_origin = ScrollOrigin.from_element(reviews[-1])
+                action.scroll_from_origin(scroll_origin, 0, 1000).perform()
+
+                new_reviews = wait_for_count_increase(browser, review_selector, len(reviews), pacing.wait)
+                if len(new_reviews) <= len(reviews) and wait_for_network_idle(browser, timeout=pacing.wait):
+                    # A review batch can still be rendering when its request finishes
+                    new_reviews = wait_for_count_increase(browser, review_selector, len(reviews), SCROLL_MIN_WAIT)
+                pacing.record(len(reviews), len(new_reviews))
+                if len(new_reviews) > len(reviews):
                     print(f"[DEBUG] Found {len(new_reviews)} total reviews (was {len(reviews)})")
                     reviews = new_reviews
+                else:
+                    print(f"[DEBUG] No new reviews found after scroll, attempt {pacing.idle}/{pacing.idle_rounds}")
 
-            records = []
+            reviews = reviews[:scroll_limit]
             print(f"[DEBUG] Processing {len(reviews)} review elements...")
-            for i, review in enumerate(reviews):
+            records = None
+            if REVIEW_EXTRACTION_MODE == "script":
                 try:
-                    print(f"[DEBUG] Processing review {i+1}/{len(reviews)}")
-                    
-                    name = "Unknown"
-                    name_selectors = ['div.d4r55', 'div[data-attrid="title"]', 'div.TSUbDb', 'span.X43Kjb']
-                    for selector in name_selectors:
-                        try:
-                            name_elem = review.find_element(By.CSS_SELECTOR, selector)
-                            name = name_elem.text.strip()
-                            if name:
-                                break
-                        except:
-                            continue
-                    
-                    reviews_count = "N/A"
-                    count_selectors = ['div.RfnDt', 'span.RfnDt', 'div[data-attrid="reviewCount"]']
-                    for selector in count_selectors:
-                        try:
-                            count_elem = review.find_element(By.CSS_SELECTOR, selector)
-                            reviews_count = count_elem.text.strip()
-                            if reviews_count:
-                                break
-                        except:
-                            continue
-                    
-                    stars = "No Rating"
-                    star_selectors = ['span.kvMYJc', 'div[role="img"]', 'span[aria-label*="star"]']
-                    for selector in star_selectors:
-                        try:
-                            star_elem = review.find_element(By.CSS_SELECTOR, selector)
-                            stars = star_elem.get_attribute('aria-label') or star_elem.text
-                            if stars:
-                                break
-                        except:
-                            continue
-                    
-                    self.expand_review_if_needed(browser, review)
-                    
-                    review_text = "No Review Text"
-                    text_selectors = ['span.wiI7pd', 'div[data-attrid="description"]', 'div.MyEned', 'div.review-text']
-                    for selector in text_selectors:
-                        try:
-                            text_elem = review.find_element(By.CSS_SELECTOR, selector)
-                            review_text = text_elem.text.strip()
-                            if review_text:
-                                break
-                        except:
-                            continue
-                    
-                    print(f"[DEBUG] Review {i+1} - Name: '{name}', Stars: '{stars}', Text length: {len(review_text)}")
-                    
-                    if review_text and review_text.strip() and review_text.lower() != "no review text":
-                        records.append((name, reviews_count, stars, review_text, url))
-                        print(f"[DEBUG] Added review {i+1} to records")
-                    else:
-                        print(f"[DEBUG] Skipped review {i+1} - no valid text content")
-                        
+                    records = self._extract_review_records(browser, reviews, url)
                 except Exception as e:
-                    print(f"[DEBUG] Error processing review {i+1}: {str(e)}")
-                    continue
+                    print(f"[DEBUG] Script extraction failed, falling back to per-element extraction: {str(e)}")
+            if records is None:
+                records = self._extract_review_records_webdriver(browser, reviews, url)
 
             print(f"[DEBUG] Scraping completed for {url}. Total reviews scraped: {len(records)}")
             return pd.DataFrame(records, columns=['Name', 'Reviews Count', 'Stars', 'Review Text', 'Source URL'])
@@ -304,11 +264,108 @@ class SentimentAnalyzer:
             print(f"[DEBUG] Error occurred while scraping {url}: {error}")
             logging.error(f"Error scraping {url}: {error}")
             return pd.DataFrame()
-        finally:
+
+    def _capture_review_records(self, browser, capture: ReviewCapture, url: str, scroll_limit: int) -> List[tuple]:
+        """Page through the reviews pane by scrolling it and read each review batch from the network"""
+        if not capture.wait_for_more(REVIEW_FIRST_PAYLOAD_TIMEOUT):
+            return []
+
+        pacing = AdaptiveScroll(scroll_limit)
+        while not pacing.done(len(capture.reviews)):
+            previous = len(capture.reviews)
+            if not scroll_reviews_pane(browser):
+                print(f"[DEBUG] Reviews pane not found, stopping network capture")
+                break
+            capture.wait_for_more(pacing.wait)
+            pacing.record(previous, len(capture.reviews))
+            print(f"[DEBUG] Captured {len(capture.reviews)} reviews (was {previous})")
+
+        records = []
+        for review in capture.reviews[:scroll_limit]:
+            if review["review_text"].strip():
+                stars = review["stars"] if review["stars"] is not None else "No Rating"
+                records.append((review["name"] or "Unknown", "N/A", stars, review["review_text"], url))
+        return records
+
+    def _extract_review_records(self, browser, reviews, url: str) -> List[tuple]:
+        """Expand and read every review card in a single script call"""
+        records = []
+        cards = extract_fields(browser, REVIEW_CARD_FIELDS, roots=reviews)
+        for i, card in enumerate(cards):
+            name = card["name"] or "Unknown"
+            reviews_count = card["reviews_count"] or "N/A"
+            stars = card["stars"] or "No Rating"
+            review_text = card["review_text"] or "No Review Text"
+            if review_text.strip() and review_text.lower() != "no review text":
+                records.append((name, reviews_count, stars, review_text, url))
+            else:
+                print(f"[DEBUG] Skipped review {i+1} - no valid text content")
+        return records
+
+    def _extract_review_records_webdriver(self, browser, reviews, url: str) -> List[tuple]:
+        records = []
+        for i, review in enumerate(reviews):
             try:
-                browser.quit()
-            except Exception:
-                pass
+                print(f"[DEBUG] Processing review {i+1}/{len(reviews)}")
+                
+                name = "Unknown"
+                name_selectors = REVIEW_CARD_FIELDS["fields"]["name"]["selectors"]
+                for selector in name_selectors:
+                    try:
+                        name_elem = review.find_element(By.CSS_SELECTOR, selector)
+                        name = name_elem.text.strip()
+                        if name:
+                            break
+                    except:
+                        continue
+                
+                reviews_count = "N/A"
+                count_selectors = REVIEW_CARD_FIELDS["fields"]["reviews_count"]["selectors"]
+                for selector in count_selectors:
+                    try:
+                        count_elem = review.find_element(By.CSS_SELECTOR, selector)
+                        reviews_count = count_elem.text.strip()
+                        if reviews_count:
+                            break
+                    except:
+                        continue
+                
+                stars = "No Rating"
+                star_selectors = REVIEW_CARD_FIELDS["fields"]["stars"]["selectors"]
+                for selector in star_selectors:
+                    try:
+                        star_elem = review.find_element(By.CSS_SELECTOR, selector)
+                        stars = star_elem.get_attribute('aria-label') or star_elem.text
+                        if stars:
+                            break
+                    except:
+                        continue
+                
+                self.expand_review_if_needed(browser, review)
+                
+                review_text = "No Review Text"
+                text_selectors = REVIEW_CARD_FIELDS["fields"]["review_text"]["selectors"]
+                for selector in text_selectors:
+                    try:
+                        text_elem = review.find_element(By.CSS_SELECTOR, selector)
+                        review_text = text_elem.text.strip()
+                        if review_text:
+                            break
+                    except:
+                        continue
+                
+                print(f"[DEBUG] Review {i+1} - Name: '{name}', Stars: '{stars}', Text length: {len(review_text)}")
+                
+                if review_text and review_text.strip() and review_text.lower() != "no review text":
+                    records.append((name, reviews_count, stars, review_text, url))
+                    print(f"[DEBUG] Added review {i+1} to records")
+                else:
+                    print(f"[DEBUG] Skipped review {i+1} - no valid text content")
+                    
+            except Exception as e:
+                print(f"[DEBUG] Error processing review {i+1}: {str(e)}")
+                continue
+        return records
 
     def scrape_google_reviews(self, urls: Union[str, List[str]], scroll_limit: int = 1000) -> pd.DataFrame:
         url_list: List[str] = [urls] if isinstance(urls, str) else list(urls or [])
@@ -320,11 +377,12 @@ class SentimentAnalyzer:
             print("[DEBUG] No URLs provided, returning empty DataFrame")
             return pd.DataFrame(columns=['Name', 'Reviews Count', 'Stars', 'Review Text', 'Source URL'])
 
+        valid_urls = [single_url for single_url in url_list if single_url and isinstance(single_url, str)]
         dataframes: List[pd.DataFrame] = []
-        for i, single_url in enumerate(url_list):
-            if single_url and isinstance(single_url, str):
-                print(f"[DEBUG] Processing URL {i+1}/{len(url_list)}: {single_url}")
-                df_single = self._scrape_single_google_reviews(single_url, scroll_limit=scroll_limit)
+        # URLs are scraped concurrently; the browser pool bounds how many run at once
+        with ThreadPoolExecutor(max_workers=max(1, min(len(valid_urls), review_browser_pool.size))) as executor:
+            for i, df_single in enumerate(executor.map(lambda single_url: self._scrape_single_google_reviews(single_url, scroll_limit=scroll_limit), valid_urls)):
+                print(f"[DEBUG] Finished URL {i+1}/{len(valid_urls)}: {valid_urls[i]}")
                 if not df_single.empty:
                     dataframes.append(df_single)
 
@@ -344,46 +402,11 @@ class SentimentAnalyzer:
                     "confidence": 0.0
                 }
 
-            if self.sentiment_pipeline is None:
-                raise RuntimeError("HF sentiment pipeline is not initialized")
-
-            result = self.sentiment_pipeline(text, truncation=True)
-            if isinstance(result, list):
-                result = result[0]
-
-            label = result.get('label', '')
-            score = float(result.get('score', 0.0))
-
-            label_lower = str(label).strip().lower()
-            if 'very negative' in label_lower:
-                stars_value = 1
-            elif label_lower == 'negative':
-                stars_value = 2
-            elif label_lower == 'neutral':
-                stars_value = 3
-            elif label_lower == 'positive':
-                stars_value = 4
-            elif 'very positive' in label_lower:
-                stars_value = 5
-            else:
-                match = re.search(r"(\d)", str(label))
-                stars_value = int(match.group(1)) if match else 3
-
-            if stars_value >= 4:
-                sentiment_label = "Positive"
-            elif stars_value <= 2:
-                sentiment_label = "Negative"
-            else:
-                sentiment_label = "Neutral"
-
-            polarity = (stars_value - 3) / 2.0
+            if self.sentiment_model is None:
+                raise RuntimeError("HF sentiment model is not initialized")
 
-            return {
-                "sentiment": sentiment_label,
-                "polarity": polarity,
-                "subjectivity": 0.5,
-                "confidence": score
-            }
+            label, score = self.sentiment_model.predict([text])[0]
+            return self._sentiment_from_label(label, score)
         except Exception as error:
             logging.error(f"Error analyzing sentiment: {error}")
             return {
@@ -393,22 +416,100 @@ class SentimentAnalyzer:
                 "confidence": 0.0
             }
 
+    @staticmethod
+    def _sentiment_from_label(label: str, score: float) -> Dict[str, Any]:
+        """Map the model's 5-class label to stars, then to the Positive/Negative/Neutral polarity we report"""
+        label_lower = str(label).strip().lower()
+        if 'very negative' in label_lower:
+            stars_value = 1
+        elif label_lower == 'negative':
+            stars_value = 2
+        elif label_lower == 'neutral':
+            stars_value = 3
+        elif label_lower == 'positive':
+            stars_value = 4
+        elif 'very positive' in label_lower:
+            stars_value = 5
+        else:
+            match = re.search(r"(\d)", str(label))
+            stars_value = int(match.group(1)) if match else 3
+
+        if stars_value >= 4:
+            sentiment_label = "Positive"
+        elif stars_value <= 2:
+            sentiment_label = "Negative"
+        else:
+            sentiment_label = "Neutral"
+
+        polarity = (stars_value - 3) / 2.0
+
+        return {
+            "sentiment": sentiment_label,
+            "polarity": polarity,
+            "subjectivity": 0.5,
+            "confidence": score
+        }
+
     def analyze_sentiment_batch(self, texts: List[str]) -> List[Dict[str, Any]]:
-        results = []
-        for text in texts:
-            if text and text.strip():
-                result = self.analyze_sentiment_textblob(text)
-                results.append(result)
+        results = [{
+            "sentiment": "Neutral",
+            "polarity": 0.0,
+            "subjectivity": 0.0,
+            "confidence": 0.0
+        } for _ in texts]
+
+        pending = [i for i, text in enumerate(texts) if text and text.strip()]
+        if not pending:
+            return results
+
+        if self.sentiment_model is None:
+            for i in pending:
+                results[i] = self.analyze_sentiment_textblob(texts[i])
+            return results
+
+        # Identical reviews share a key, so each distinct review is looked up and scored once
+        model_id = f"{self.sentiment_model.model_name}:{self.sentiment_model.backend}"
+        keys = {i: SentimentCache.key(texts[i], model_id, self.sentiment_model.commit) for i in pending}
+        cached: Dict[str, Dict[str, Any]] = {}
+        if self.sentiment_cache:
+            try:
+                cached = self.sentiment_cache.get_many(keys.values())
+            except Exception as error:
+                logging.error(f"Sentiment cache lookup failed: {error}")
+
+        misses: Dict[str, int] = {}
+        for i in pending:
+            if keys[i] not in cached and keys[i] not in misses:
+                misses[keys[i]] = i
+
+        scored: Dict[str, Dict[str, Any]] = {}
+        if misses:
+            try:
+                started = time.perf_counter()
+                predictions = self.sentiment_model.predict([texts[i] for i in misses.values()])
+                for key, (label, score) in zip(misses, predictions):
+                    scored[key] = self._sentiment_from_label(label, score)
+                logging.info(f"Scored {len(misses)} reviews in {time.perf_counter() - started:.2f}s (batch size {SENTIMENT_BATCH_SIZE})")
+            except Exception as error:
+                logging.error(f"Batched sentiment inference failed, scoring reviews one by one: {error}")
+                for key, i in misses.items():
+                    scored[key] = self.analyze_sentiment_textblob(texts[i])
             else:
-                results.append({
-                    "sentiment": "Neutral",
-                    "polarity": 0.0,
-                    "subjectivity": 0.0,
-                    "confidence": 0.0
-                })
+                if self.sentiment_cache:
+                    try:
+                        self.sentiment_cache.put_many(scored)
+                    except Exception as error:
+                        logging.error(f"Sentiment cache write failed: {error}")
+
+        logging.info(f"Sentiment cache: {len(pending) - len(misses)}/{len(pending)} reviews served without inference")
+        for i in pending:
+            results[i] = dict(cached.get(keys[i]) or scored[keys[i]])
         return results
 
-    def extract_star_rating(self, stars_text: str) -> int:
+    def extract_star_rating(self, stars_text: Union[str, int]) -> int:
+        # Network-captured reviews already carry the rating as a number
+        if isinstance(stars_text, (int, float)):
+            return int(stars_text)
         try:
             match = re.search(r'(\d+(?:\.\d+)?)', stars_text)
             if match:
@@ -556,60 +657,14 @@ class SentimentAnalyzer:
                     "analysis_results": {}
                 }
             
-            competitor_results = []
-            all_reviews = []
-            
-            for competitor in competitors:
-                try:
-                    reviews_url = competitor.get("reviews_url")
-                    if reviews_url:
-                        print(f"[DEBUG] Full Analysis Mode - Processing competitor: {competitor.get('name', 'Unknown')}")
-                        print(f"[DEBUG] Full Analysis Mode - Reviews URL: {reviews_url}")
-                        print(f"[DEBUG] Full Analysis Mode - Reviews per competitor limit: {reviews_per_competitor}")
-                        df = self.scrape_google_reviews(reviews_url, reviews_per_competitor)
-                        
-                        if not df.empty:
-                            df_processed = self.process_reviews_dataframe(df)
-                            
-                            summary = self.generate_sentiment_summary(df_processed)
-                            
-                            try:
-                                competitor_ai_input = {
-                                    "summary": {
-                                        "total_reviews": summary.get("total_reviews", 0),
-                                        "sentiment_percentages": summary.get("sentiment_percentages", {}),
-                                        "average_polarity": summary.get("average_polarity", 0),
-                                        "average_subjectivity": summary.get("average_subjectivity", 0),
-                                        "average_star_rating": summary.get("average_star_rating", 0)
-                                    },
-                                    "sample_reviews": df_processed.head(15)[["Review Text", "Sentiment", "Star Rating"]].to_dict("records"),
-                                    "competitor": {
-                                        "name": competitor.get("name", "Unknown"),
-                                        "rating": competitor.get("rating", 0),
-                                        "review_count": competitor.get("review_count", 0)
-                                    }
-                                }
-                                competitor_ai_insights = await self.gpt_service.generate_sentiment_insights(competitor_ai_input)
-                            except Exception as _:
-                                competitor_ai_insights = {"insights": {"summary": "AI insights unavailable.", "full_analysis": ""}}
-                            
-                            competitor_result = {
-                                "competitor_info": competitor,
-                                "reviews_data": df_processed,
-                                "sentiment_summary": summary,
-                                "total_reviews_analyzed": len(df_processed),
-                                "ai_insights": competitor_ai_insights
-                            }
-                            
-                            competitor_results.append(competitor_result)
-                            
-                            df_processed["competitor_name"] = competitor["name"]
-                            df_processed["competitor_rating"] = competitor["rating"]
-                            all_reviews.append(df_processed)
-                            
-                except Exception as e:
-                    logging.warning(f"Error analyzing competitor {competitor.get('name', 'Unknown')}: {str(e)}")
-                    continue
+            # Each competitor is scraped, scored and summarised independently, so run them side by side;
+            # the review browser pool bounds how many scrapes are in flight
+            outcomes = await asyncio.gather(*[
+                self._analyze_single_competitor(competitor, reviews_per_competitor)
+                for competitor in competitors
+            ])
+            competitor_results = [result for result in outcomes if result is not None]
+            all_reviews = [result["reviews_data"] for result in competitor_results]
             
             combined_analysis = {}
             if all_reviews:
@@ -642,6 +697,59 @@ class SentimentAnalyzer:
                 "analysis_results": {}
             }
     
+    async def _analyze_single_competitor(self, competitor: Dict[str, Any], reviews_per_competitor: int) -> Optional[Dict[str, Any]]:
+        try:
+            reviews_url = competitor.get("reviews_url")
+            if not reviews_url:
+                return None
+            print(f"[DEBUG] Full Analysis Mode - Processing competitor: {competitor.get('name', 'Unknown')}")
+            print(f"[DEBUG] Full Analysis Mode - Reviews URL: {reviews_url}")
+            print(f"[DEBUG] Full Analysis Mode - Reviews per competitor limit: {reviews_per_competitor}")
+            # Selenium and model inference block, so keep them off the event loop
+            df = await asyncio.to_thread(self.scrape_google_reviews, reviews_url, reviews_per_competitor)
+            
+            if df.empty:
+                return None
+            
+            df_processed = await asyncio.to_thread(self.process_reviews_dataframe, df)
+            
+            summary = self.generate_sentiment_summary(df_processed)
+            
+            try:
+                competitor_ai_input = {
+                    "summary": {
+                        "total_reviews": summary.get("total_reviews", 0),
+                        "sentiment_percentages": summary.get("sentiment_percentages", {}),
+                        "average_polarity": summary.get("average_polarity", 0),
+                        "average_subjectivity": summary.get("average_subjectivity", 0),
+                        "average_star_rating": summary.get("average_star_rating", 0)
+                    },
+                    "sample_reviews": df_processed.head(15)[["Review Text", "Sentiment", "Star Rating"]].to_dict("records"),
+                    "competitor": {
+                        "name": competitor.get("name", "Unknown"),
+                        "rating": competitor.get("rating", 0),
+                        "review_count": competitor.get("review_count", 0)
+                    }
+                }
+                competitor_ai_insights = await self.gpt_service.generate_sentiment_insights(competitor_ai_input)
+            except Exception as _:
+                competitor_ai_insights = {"insights": {"summary": "AI insights unavailable.", "full_analysis": ""}}
+            
+            df_processed["competitor_name"] = competitor["name"]
+            df_processed["competitor_rating"] = competitor["rating"]
+            
+            return {
+                "competitor_info": competitor,
+                "reviews_data": df_processed,
+                "sentiment_summary": summary,
+                "total_reviews_analyzed": len(df_processed),
+                "ai_insights": competitor_ai_insights
+            }
+            
+        except Exception as e:
+            logging.warning(f"Error analyzing competitor {competitor.get('name', 'Unknown')}: {str(e)}")
+            return None
+    
     async def generate_competitor_insights(self, competitor_results: List[Dict[str, Any]], combined_analysis: Dict[str, Any], industry: str, region: str) -> Dict[str, Any]:
         try:
             insights_data = {
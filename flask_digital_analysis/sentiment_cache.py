@@ -0,0 +1,112 @@
+"""
+Persistent per-review sentiment cache.
+Results are keyed by a hash of the normalized review text and the model that scored it, so
+re-running a competitor analysis (or another user hitting the same competitors) only runs
+inference for reviews that have not been scored before.
+"""
+
+import os
+import json
+import time
+import sqlite3
+import hashlib
+import logging
+import threading
+import unicodedata
+from typing import Dict, Iterable, List, Optional, Any
+
+SENTIMENT_CACHE_ENABLED = os.environ.get("SENTIMENT_CACHE_ENABLED", "true").lower() == "true"
+SENTIMENT_CACHE_PATH = os.environ.get("SENTIMENT_CACHE_PATH", "/tmp/sentiment_cache/sentiment.sqlite3")
+SENTIMENT_CACHE_TTL = int(os.environ.get("SENTIMENT_CACHE_TTL", 30 * 24 * 3600))
+
+# Stay well below SQLite's bound-parameter limit
+_QUERY_CHUNK = 500
+
+
+def normalize_review_text(text: str) -> str:
+    """NFC-normalize and collapse whitespace; case is kept because the model is case-sensitive"""
+    return " ".join(unicodedata.normalize("NFC", text).split())
+
+
+class SentimentCache:
+    """SQLite store shared by every worker on the host (WAL mode, one connection per call)"""
+
+    def __init__(self, path: str = SENTIMENT_CACHE_PATH, ttl: int = SENTIMENT_CACHE_TTL):
+        self.path = path
+        self.ttl = ttl
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS review_sentiment (
+                    key TEXT PRIMARY KEY,
+                    result TEXT NOT NULL,
+                    created_at REAL NOT NULL
+                )
+            """)
+        self.purge_expired()
+
+    def _connect(self):
+        return sqlite3.connect(self.path, timeout=30)
+
+    @staticmethod
+    def key(text: str, model_id: str, commit: str) -> str:
+        digest = hashlib.sha256()
+        digest.update(model_id.encode("utf-8"))
+        digest.update(b"\0")
+        digest.update(commit.encode("utf-8"))
+        digest.update(b"\0")
+        digest.update(normalize_review_text(text).encode("utf-8"))
+        return digest.hexdigest()
+
+    def get_many(self, keys: Iterable[str]) -> Dict[str, Dict[str, Any]]:
+        keys = list(dict.fromkeys(keys))
+        found: Dict[str, Dict[str, Any]] = {}
+        oldest = time.time() - self.ttl
+        with self._connect() as conn:
+            for start in range(0, len(keys), _QUERY_CHUNK):
+                chunk = keys[start:start + _QUERY_CHUNK]
+                placeholders = ",".join("?" for _ in chunk)
+                rows = conn.execute(
+                    f"SELECT key, result FROM review_sentiment WHERE key IN ({placeholders}) AND created_at >= ?",
+                    (*chunk, oldest)
+                ).fetchall()
+                for key, result in rows:
+                    found[key] = json.loads(result)
+        return found
+
+    def put_many(self, entries: Dict[str, Dict[str, Any]]) -> None:
+        if not entries:
+            return
+        now = time.time()
+        with self._connect() as conn:
+            conn.executemany(
+                "INSERT OR REPLACE INTO review_sentiment (key, result, created_at) VALUES (?, ?, ?)",
+                [(key, json.dumps(result), now) for key, result in entries.items()]
+            )
+
+    def purge_expired(self) -> None:
+        with self._connect() as conn:
+            conn.execute("DELETE FROM review_sentiment WHERE created_at < ?", (time.time() - self.ttl,))
+
+
+_cache: Optional[SentimentCache] = None
+_cache_lock = threading.Lock()
+_cache_failed = False
+
+
+def get_sentiment_cache() -> Optional[SentimentCache]:
+    """Shared cache, or None when disabled (SENTIMENT_CACHE_ENABLED=false) or the database cannot be opened"""
+    global _cache, _cache_failed
+    if not SENTIMENT_CACHE_ENABLED or _cache_failed:
+        return None
+    if _cache is not None:
+        return _cache
+    with _cache_lock:
+        if _cache is None and not _cache_failed:
+            try:
+                _cache = SentimentCache()
+            except Exception as error:
+                logging.error(f"Sentiment cache unavailable, scoring without it: {error}")
+                _cache_failed = True
+    return _cache
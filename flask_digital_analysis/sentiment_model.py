@@ -0,0 +1,266 @@
+"""
+Process-wide registry for the review sentiment model.
+The tokenizer and model are loaded once per worker, on first use or by warm_up() at startup,
+and the same handle is shared by every SentimentAnalyzer instead of reloading per request.
+
+SENTIMENT_BACKEND=onnx swaps the PyTorch model for an int8-quantized ONNX Runtime export.
+The export is built once and reused, and is only used if it agrees with PyTorch on a fixed
+review corpus; otherwise the PyTorch backend stays in place.
+"""
+
+import os
+os.environ.setdefault("TRANSFORMERS_NO_TF", "1")
+import re
+import time
+import logging
+import threading
+import numpy as np
+from typing import List, Optional, Tuple
+
+SENTIMENT_MODEL_NAME = os.environ.get("SENTIMENT_MODEL_NAME", "tabularisai/multilingual-sentiment-analysis")
+# Branch, tag or commit; cached scores and the ONNX export are keyed on the commit it resolves to
+SENTIMENT_MODEL_REVISION = os.environ.get("SENTIMENT_MODEL_REVISION", "main")
+# Reviews per forward pass; reviews are sorted by token length so each batch pads to a similar length
+SENTIMENT_BATCH_SIZE = int(os.environ.get("SENTIMENT_BATCH_SIZE", 32))
+SENTIMENT_WARMUP = os.environ.get("SENTIMENT_WARMUP", "true").lower() == "true"
+SENTIMENT_BACKEND = os.environ.get("SENTIMENT_BACKEND", "torch").lower()
+SENTIMENT_ONNX_DIR = os.environ.get("SENTIMENT_ONNX_DIR", "/tmp/sentiment_onnx")
+# 0 leaves intra-op threading to onnxruntime (all physical cores)
+SENTIMENT_ONNX_THREADS = int(os.environ.get("SENTIMENT_ONNX_THREADS", 0))
+SENTIMENT_PARITY_TOLERANCE = float(os.environ.get("SENTIMENT_PARITY_TOLERANCE", 0.05))
+
+# Fixed corpus for the ONNX parity check: mixed languages, lengths and polarities
+PARITY_REVIEWS = [
+    "Great service, the staff were friendly and the food came out quickly.",
+    "Terrible experience. We waited an hour and the order was still wrong.",
+    "It was okay, nothing special but nothing bad either.",
+    "Absolutely loved it! Best coffee in town, will definitely come back.",
+    "The room was dirty and the manager refused to help us.",
+    "Prices are a bit high for what you get, but the location is convenient.",
+    "خدمة ممتازة والموظفين محترمين جدا",
+    "تجربة سيئة جدا ولن أكرر الزيارة",
+    "المكان عادي والأسعار مناسبة",
+    "Service impeccable, je recommande vivement.",
+    "La comida estaba fría y el camarero fue muy grosero.",
+    "Good",
+]
+
+
+def _resolved_commit(config, revision: str) -> str:
+    """
+    The hub commit the weights were loaded from. revision may be a moving ref such as "main", so
+    anything keyed on the model (the score cache, the ONNX export) uses this instead.
+    """
+    commit = getattr(config, "_commit_hash", None)
+    if commit:
+        return commit
+    if re.fullmatch(r"[0-9a-f]{40}", revision):
+        return revision
+    logging.warning(
+        f"Could not resolve sentiment model revision {revision!r} to a commit; cached scores will not be "
+        f"invalidated when the model changes. Pin SENTIMENT_MODEL_REVISION to a commit SHA."
+    )
+    return revision
+
+
+class SentimentModel:
+    """Loaded tokenizer + PyTorch model. predict() is serialized because fast tokenizers are not thread-safe."""
+
+    backend = "torch"
+
+    def __init__(self, model_name: str = SENTIMENT_MODEL_NAME, revision: str = SENTIMENT_MODEL_REVISION):
+        from transformers import AutoTokenizer, AutoModelForSequenceClassification
+
+        self.model_name = model_name
+        self.revision = revision
+        self.model = AutoModelForSequenceClassification.from_pretrained(model_name, revision=revision)
+        self.model.eval()
+        self.commit = _resolved_commit(self.model.config, revision)
+        # Load the tokenizer from the same commit in case the ref moved while the weights downloaded
+        self.tokenizer = AutoTokenizer.from_pretrained(model_name, revision=self.commit)
+        self.id2label = self.model.config.id2label
+        self._lock = threading.Lock()
+
+    def predict(self, texts: List[str]) -> List[Tuple[str, float]]:
+        """
+        Batched equivalent of the text-classification pipeline: returns (label, score) per text in input order.
+        Texts are tokenized once, sorted by token length and padded per batch, so short reviews
+        are not padded up to the longest one.
+        """
+        if not texts:
+            return []
+
+        with self._lock:
+            encodings = self.tokenizer(texts, truncation=True)
+            lengths = [len(input_ids) for input_ids in encodings["input_ids"]]
+            order = sorted(range(len(texts)), key=lambda i: lengths[i])
+
+            predictions: List[Optional[Tuple[str, float]]] = [None] * len(texts)
+            for start in range(0, len(order), SENTIMENT_BATCH_SIZE):
+                chunk = order[start:start + SENTIMENT_BATCH_SIZE]
+                batch = self.tokenizer.pad(
+                    {key: [encodings[key][i] for i in chunk] for key in encodings.keys()},
+                    return_tensors="np"
+                )
+                probabilities = self._probabilities(batch)
+                for i, row in zip(chunk, probabilities):
+                    label_id = int(row.argmax())
+                    predictions[i] = (self.id2label[label_id], float(row[label_id]))
+        return predictions
+
+    def _probabilities(self, batch) -> np.ndarray:
+        import torch
+
+        with torch.inference_mode():
+            inputs = {key: torch.from_numpy(value) for key, value in batch.items()}
+            return torch.softmax(self.model(**inputs).logits, dim=-1).numpy()
+
+
+class OnnxSentimentModel(SentimentModel):
+    """
+    Same interface as SentimentModel, backed by a dynamically int8-quantized ONNX export run on
+    onnxruntime's CPU provider. Shares the tokenizer of the PyTorch model it was exported from but
+    does not keep the PyTorch weights.
+    """
+
+    backend = "onnx"
+
+    def __init__(self, source: SentimentModel, threads: int = SENTIMENT_ONNX_THREADS):
+        import onnxruntime as ort
+
+        self.model_name = source.model_name
+        self.revision = source.revision
+        self.commit = source.commit
+        self.tokenizer = source.tokenizer
+        self.model = None
+        self.id2label = source.id2label
+        self._lock = threading.Lock()
+
+        self.path = self._export(source)
+        options = ort.SessionOptions()
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        if threads > 0:
+            options.intra_op_num_threads = threads
+        options.inter_op_num_threads = 1
+        self.session = ort.InferenceSession(self.path, options, providers=["CPUExecutionProvider"])
+        self.input_names = [model_input.name for model_input in self.session.get_inputs()]
+
+    @staticmethod
+    def _export(source: SentimentModel) -> str:
+        """Export + quantize once per model commit; concurrent workers each write a temp file and atomically rename"""
+        import torch
+        from onnxruntime.quantization import quantize_dynamic, QuantType
+
+        safe_name = re.sub(r"[^A-Za-z0-9_.-]", "_", f"{source.model_name}@{source.commit}")
+        path = os.path.join(SENTIMENT_ONNX_DIR, f"{safe_name}.int8.onnx")
+        if os.path.exists(path):
+            return path
+
+        os.makedirs(SENTIMENT_ONNX_DIR, exist_ok=True)
+        fp32_path = f"{path}.{os.getpid()}.fp32"
+        int8_path = f"{path}.{os.getpid()}.tmp"
+        sample = source.tokenizer(["export sample review", "short"], padding=True, return_tensors="pt")
+        input_names = list(sample.keys())
+
+        class LogitsOnly(torch.nn.Module):
+            def __init__(self, model):
+                super().__init__()
+                self.model = model
+
+            def forward(self, *inputs):
+                return self.model(**dict(zip(input_names, inputs))).logits
+
+        started = time.perf_counter()
+        try:
+            dynamic_axes = {name: {0: "batch", 1: "sequence"} for name in input_names}
+            dynamic_axes["logits"] = {0: "batch"}
+            with torch.no_grad():
+                torch.onnx.export(
+                    LogitsOnly(source.model),
+                    tuple(sample[name] for name in input_names),
+                    fp32_path,
+                    input_names=input_names,
+                    output_names=["logits"],
+                    dynamic_axes=dynamic_axes,
+                    opset_version=17
+                )
+            quantize_dynamic(fp32_path, int8_path, weight_type=QuantType.QInt8)
+            os.replace(int8_path, path)
+            logging.info(f"Exported int8 ONNX sentiment model to {path} in {time.perf_counter() - started:.1f}s")
+        finally:
+            for leftover in (fp32_path, int8_path):
+                if os.path.exists(leftover):
+                    os.remove(leftover)
+        return path
+
+    def _probabilities(self, batch) -> np.ndarray:
+        logits = self.session.run(["logits"], {name: batch[name].astype(np.int64) for name in self.input_names})[0]
+        logits = logits - logits.max(axis=-1, keepdims=True)
+        exp = np.exp(logits)
+        return exp / exp.sum(axis=-1, keepdims=True)
+
+
+def check_parity(reference: SentimentModel, candidate: SentimentModel, tolerance: float = SENTIMENT_PARITY_TOLERANCE) -> bool:
+    """True when candidate predicts the same label as reference for every PARITY_REVIEWS text, with scores within tolerance"""
+    expected = reference.predict(PARITY_REVIEWS)
+    actual = candidate.predict(PARITY_REVIEWS)
+    label_mismatches = sum(1 for (label, _), (other, _) in zip(expected, actual) if label != other)
+    max_score_diff = max(abs(score - other) for (_, score), (_, other) in zip(expected, actual))
+    logging.info(
+        f"Sentiment parity {candidate.backend} vs {reference.backend}: "
+        f"{label_mismatches}/{len(PARITY_REVIEWS)} label mismatches, max score diff {max_score_diff:.4f}"
+    )
+    return label_mismatches == 0 and max_score_diff <= tolerance
+
+
+def load_sentiment_model() -> SentimentModel:
+    model = SentimentModel()
+    if SENTIMENT_BACKEND != "onnx":
+        return model
+    try:
+        onnx_model = OnnxSentimentModel(model)
+        if check_parity(model, onnx_model):
+            # Dropping the PyTorch model here releases its weights; only the ONNX session stays resident
+            return onnx_model
+        logging.warning("ONNX sentiment model failed the parity check, keeping the PyTorch backend")
+    except Exception as error:
+        logging.error(f"ONNX sentiment backend unavailable, keeping the PyTorch backend: {error}")
+    return model
+
+
+_model: Optional[SentimentModel] = None
+_model_lock = threading.Lock()
+
+
+def get_sentiment_model() -> Optional[SentimentModel]:
+    """Return the shared model, loading it on first use. Returns None if loading fails (retried on the next call)."""
+    global _model
+    if _model is not None:
+        return _model
+    with _model_lock:
+        if _model is None:
+            try:
+                started = time.perf_counter()
+                _model = load_sentiment_model()
+                logging.info(f"Loaded sentiment model {SENTIMENT_MODEL_NAME}@{_model.commit} ({_model.backend}) in {time.perf_counter() - started:.1f}s")
+            except Exception as error:
+                logging.error(f"Failed to initialize HF sentiment model: {error}")
+                return None
+    return _model
+
+
+def warm_up() -> None:
+    """Load the model and run one short batch so the first request does not pay for loading or lazy init"""
+    model = get_sentiment_model()
+    if model is None:
+        return
+    try:
+        model.predict(["Great service", "Terrible experience, would not come back"])
+    except Exception as error:
+        logging.error(f"Sentiment model warm-up failed: {error}")
+
+
+def start_background_warm_up() -> None:
+    """Warm the model in a daemon thread so worker startup is not blocked (SENTIMENT_WARMUP=false disables)"""
+    if SENTIMENT_WARMUP:
+        threading.Thread(target=warm_up, name="sentiment-warm-up", daemon=True).start()
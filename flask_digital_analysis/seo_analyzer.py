@@ -1,67 +1,47 @@
-import aiohttp
-import ssl
-import certifi
 import re
-from bs4 import BeautifulSoup
+import asyncio
+import lxml.html
 from urllib.parse import urlparse
 from typing import Dict, List, Optional, Any
 from helpers import clean_text
+from http_client import fetch
+from http_cache import fetch_revalidated, get_cached_pagespeed, put_cached_pagespeed
+
+SOCIAL_DOMAINS = [
+    'facebook.com', 'twitter.com', 'instagram.com', 'linkedin.com',
+    'youtube.com', 'pinterest.com', 'tiktok.com'
+]
+OG_PROPERTIES = [
+    'og:title', 'og:description', 'og:image', 'og:url',
+    'og:type', 'og:site_name'
+]
 
 class SEOAnalyzer:
     
     def __init__(self):
-        self.timeout = aiohttp.ClientTimeout(total=30)
+        self.timeout = 30
         self.headers = {
             'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
         }
     
     async def analyze_website(self, url: str) -> Dict[str, Any]:
-        
+        """Full analysis; PageSpeed runs while the page is fetched and parsed"""
+        page_speed_task = self.start_page_speed(url)
+        results = await self.analyze_page(url)
+        return await self.add_page_speed(results, page_speed_task)
+    
+    def start_page_speed(self, url: str, strategy: str = "mobile") -> asyncio.Task:
+        """Start the PageSpeed lookup, which only needs the URL and is by far the slowest step"""
+        return asyncio.ensure_future(self._get_page_speed_score(url, strategy))
+    
+    async def analyze_page(self, url: str) -> Dict[str, Any]:
+        """On-page results (everything but PageSpeed), ready as soon as the HTML is fetched and parsed"""
         try:
             html_content = await self._fetch_html(url)
             
-            soup = BeautifulSoup(html_content, 'lxml')
-            
-            title = self._extract_title(soup)
-            meta_description = self._extract_meta_description(soup)
-            headings = self._extract_headings(soup)
-            canonical_url = self._extract_canonical_url(soup)
-            
-            https = self._check_https(url)
-            
-            images_count, alt_tags_missing = self._analyze_images(soup)
-            
-            internal_links = self._count_internal_links(soup, url)
-            external_links = self._count_external_links(soup, url)
-            
-            social_links = self._extract_social_links(soup)
-            
-            schema_types = self._detect_schema_markup(soup)
-            
-            og_tags = self._extract_og_tags(soup)
-            
-            page_speed_scores = await self._get_page_speed_score(url)
-            results = {
-                "url": url,
-                "https": https,
-                "title": title,
-                "title_length": len(title) if title else 0,
-                "meta_description": meta_description,
-                "meta_description_length": len(meta_description) if meta_description else 0,
-                "headings": headings,
-                "canonical_url": canonical_url,
-                "images_count": images_count,
-                "alt_tags_missing": alt_tags_missing,
-                "internal_links": internal_links,
-                "external_links": external_links,
-                "social_links": social_links,
-                "schema_markup": schema_types,
-                "og_tags": og_tags,
-                "page_speed_scores": page_speed_scores,
-                "page_speed_score": page_speed_scores.get("overall") if page_speed_scores else None  
-            }
-            
-            return results
+            # Parsing a large page is CPU-bound, keep it off the event loop
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(None, self.analyze_html, html_content, url)
             
         except Exception as e:
             print(f"Error analyzing {url}: {str(e)}")
@@ -71,132 +51,118 @@ class SEOAnalyzer:
                 "success": False
             }
     
-    async def _fetch_html(self, url: str) -> str:
-
-        ssl_context = ssl.create_default_context(cafile=certifi.where())
-        
-        async with aiohttp.ClientSession(
-            timeout=self.timeout,
-            headers=self.headers,
-            connector=aiohttp.TCPConnector(ssl=ssl_context)
-        ) as session:
-            async with session.get(url) as response:
-                if response.status != 200:
-                    raise Exception(f"HTTP {response.status}: Unable to fetch URL")
-                
-                return await response.text()
-    
-    def _check_https(self, url: str) -> bool:
-        return url.startswith('https://')
-    
-    def _extract_title(self, soup: BeautifulSoup) -> Optional[str]:
-        title_tag = soup.find('title')
-        return title_tag.get_text().strip() if title_tag else None
-    
-    def _extract_meta_description(self, soup: BeautifulSoup) -> Optional[str]:
-        meta_desc = soup.find('meta', attrs={'name': 'description'})
-        return meta_desc.get('content', '').strip() if meta_desc else None
-    
-    def _extract_headings(self, soup: BeautifulSoup) -> Dict[str, List[str]]:
-        headings = {}
-        
-        for i in range(1, 7):
-            heading_tag = f'h{i}'
-            heading_elements = soup.find_all(heading_tag)
-            headings[heading_tag] = [h.get_text().strip() for h in heading_elements]
-        
-        return headings
-    
-    def _extract_canonical_url(self, soup: BeautifulSoup) -> Optional[str]:
-        canonical = soup.find('link', attrs={'rel': 'canonical'})
-        return canonical.get('href') if canonical else None
-    
-    def _analyze_images(self, soup: BeautifulSoup) -> tuple[int, int]:
-        images = soup.find_all('img')
-        total_images = len(images)
-        missing_alt = 0
-        
-        for img in images:
-            if not img.get('alt') or img.get('alt').strip() == '':
-                missing_alt += 1
-        
-        return total_images, missing_alt
-    
-    def _count_internal_links(self, soup: BeautifulSoup, base_url: str) -> int:
-        domain = urlparse(base_url).netloc
-        links = soup.find_all('a', href=True)
-        internal_count = 0
-        
-        for link in links:
-            href = link['href']
-            if href.startswith('/') or domain in href:
-                internal_count += 1
-        
-        return internal_count
+    async def add_page_speed(self, results: Dict[str, Any], page_speed_task: asyncio.Task) -> Dict[str, Any]:
+        """Merge the PageSpeed scores into analyze_page's results (the lookup is dropped if the page failed)"""
+        if results.get("error"):
+            page_speed_task.cancel()
+            return results
+        page_speed_scores = await page_speed_task
+        results["page_speed_scores"] = page_speed_scores
+        results["page_speed_score"] = page_speed_scores.get("overall") if page_speed_scores else None
+        return results
     
-    def _count_external_links(self, soup: BeautifulSoup, base_url: str) -> int:
-        domain = urlparse(base_url).netloc
-        links = soup.find_all('a', href=True)
-        external_count = 0
-        
-        for link in links:
-            href = link['href']
-            if href.startswith('http') and domain not in href:
-                external_count += 1
+    def analyze_html(self, html_content: str, url: str, links: Optional[List[str]] = None) -> Dict[str, Any]:
+        """Collect every on-page signal in one walk over the parsed tree; every href is appended to links if given"""
+        domain = urlparse(url).netloc
+        title = None
+        meta_description = None
+        canonical_url = None
+        headings = {f'h{i}': [] for i in range(1, 7)}
+        images_count = 0
+        alt_tags_missing = 0
+        internal_links = 0
+        external_links = 0
+        social_links = {}
+        og_tags = {}
+        json_ld = microdata = rdfa = False
+        
+        for element in self._parse(html_content).iter():
+            tag = element.tag
+            if not isinstance(tag, str):
+                # Comments and processing instructions
+                continue
+            attrib = element.attrib
+            if 'itemtype' in attrib:
+                microdata = True
+            if 'property' in attrib and 'content' in attrib:
+                rdfa = True
+            
+            if tag == 'a':
+                href = attrib.get('href')
+                if href is None:
+                    continue
+                if links is not None:
+                    links.append(href)
+                if href.startswith('/') or domain in href:
+                    internal_links += 1
+                if href.startswith('http'):
+                    if domain not in href:
+                        external_links += 1
+                    if any(social in href for social in SOCIAL_DOMAINS):
+                        social_links[href] = None
+            elif tag == 'img':
+                images_count += 1
+                if not (attrib.get('alt') or '').strip():
+                    alt_tags_missing += 1
+            elif tag in headings:
+                headings[tag].append(element.text_content().strip())
+            elif tag == 'meta':
+                prop = attrib.get('property')
+                if prop in OG_PROPERTIES and prop not in og_tags:
+                    og_tags[prop] = attrib.get('content')
+                if meta_description is None and attrib.get('name') == 'description':
+                    meta_description = attrib.get('content', '').strip()
+            elif tag == 'title':
+                if title is None:
+                    title = element.text_content().strip()
+            elif tag == 'link':
+                if canonical_url is None and 'canonical' in attrib.get('rel', '').split():
+                    canonical_url = attrib.get('href')
+            elif tag == 'script':
+                if attrib.get('type') == 'application/ld+json':
+                    json_ld = True
+        
+        schema_types = [
+            name for name, found in (('JSON-LD', json_ld), ('Microdata', microdata), ('RDFa', rdfa)) if found
+        ]
         
-        return external_count
+        return {
+            "url": url,
+            "https": self._check_https(url),
+            "title": title,
+            "title_length": len(title) if title else 0,
+            "meta_description": meta_description,
+            "meta_description_length": len(meta_description) if meta_description else 0,
+            "headings": headings,
+            "canonical_url": canonical_url,
+            "images_count": images_count,
+            "alt_tags_missing": alt_tags_missing,
+            "internal_links": internal_links,
+            "external_links": external_links,
+            "social_links": list(social_links),
+            "schema_markup": schema_types,
+            "og_tags": {prop: og_tags.get(prop) for prop in OG_PROPERTIES}
+        }
     
-    def _detect_schema_markup(self, soup: BeautifulSoup) -> List[str]:
-        schema_types = []
-        
-        json_ld_scripts = soup.find_all('script', type='application/ld+json')
-        for script in json_ld_scripts:
-            schema_types.append('JSON-LD')
-            break
-        
-        microdata_elements = soup.find_all(attrs={"itemtype": True})
-        if microdata_elements:
-            schema_types.append('Microdata')
-        
-        rdfa_elements = soup.find_all(attrs={"property": True, "content": True})
-        if rdfa_elements:
-            schema_types.append('RDFa')
-        
-        return schema_types
+    @staticmethod
+    def _parse(html_content: str):
+        # Parse bytes: lxml rejects str input that carries an XML encoding declaration
+        if not html_content.strip():
+            return lxml.html.Element('html')
+        parser = lxml.html.HTMLParser(encoding='utf-8')
+        return lxml.html.document_fromstring(html_content.encode('utf-8', errors='replace'), parser=parser)
     
-    def _extract_social_links(self, soup: BeautifulSoup) -> List[str]:
-        social_domains = [
-            'facebook.com', 'twitter.com', 'instagram.com', 'linkedin.com',
-            'youtube.com', 'pinterest.com', 'tiktok.com'
-        ]
-        
-        social_links = []
-        links = soup.find_all('a', href=True)
-        
-        for link in links:
-            href = link['href']
-            if href.startswith('http'):
-                for domain in social_domains:
-                    if domain in href and href not in social_links:
-                        social_links.append(href)
+    async def _fetch_html(self, url: str) -> str:
+        response = await fetch_revalidated(url, headers=self.headers, timeout=self.timeout)
+        if response.status != 200:
+            raise Exception(f"HTTP {response.status}: Unable to fetch URL")
         
-        return social_links
+        return response.text()
     
-    def _extract_og_tags(self, soup: BeautifulSoup) -> Dict[str, Optional[str]]:
-        og_tags = {}
-        
-        og_properties = [
-            'og:title', 'og:description', 'og:image', 'og:url', 
-            'og:type', 'og:site_name'
-        ]
-        
-        for prop in og_properties:
-            og_tag = soup.find('meta', property=prop)
-            og_tags[prop] = og_tag.get('content') if og_tag else None
-        
-        return og_tags
+    def _check_https(self, url: str) -> bool:
+        return url.startswith('https://')
     
-    async def _get_page_speed_score(self, url: str) -> Dict[str, Any]:
+    async def _get_page_speed_score(self, url: str, strategy: str = "mobile") -> Dict[str, Any]:
         try:
             import os
             from dotenv import load_dotenv
@@ -217,35 +183,40 @@ class SEOAnalyzer:
                     "overall": random.randint(50, 95)
                 }
 
+            cached_scores = await get_cached_pagespeed(url, strategy)
+            if cached_scores:
+                return cached_scores
+
             api_url = (
                 f"https://www.googleapis.com/pagespeedonline/v5/runPagespeed"
-                f"?url={url}&strategy=mobile&category=performance&category=accessibility"
+                f"?url={url}&strategy={strategy}&category=performance&category=accessibility"
                 f"&category=best-practices&category=seo&key={api_key}"
             )
 
-            async with aiohttp.ClientSession() as session:
-                async with session.get(api_url) as response:
-                    if response.status != 200:
-                        print(f"PageSpeed API error: HTTP {response.status}")
-                        return None
+            # Lighthouse runs can take well over the default timeout
+            response = await fetch(api_url, timeout=120)
+            if response.status != 200:
+                print(f"PageSpeed API error: HTTP {response.status}")
+                return None
 
-                    data = await response.json()
+            data = response.json()
 
-                    scores = {}
+            scores = {}
 
-                    if 'lighthouseResult' in data and 'categories' in data['lighthouseResult']:
-                        categories = data['lighthouseResult']['categories']
+            if 'lighthouseResult' in data and 'categories' in data['lighthouseResult']:
+                categories = data['lighthouseResult']['categories']
 
-                        for cat in ['performance', 'accessibility', 'best-practices', 'seo']:
-                            cat_data = categories.get(cat)
-                            if cat_data and 'score' in cat_data:
-                                key_name = cat.replace('-', '_')
-                                scores[key_name] = int(cat_data['score'] * 100)
+                for cat in ['performance', 'accessibility', 'best-practices', 'seo']:
+                    cat_data = categories.get(cat)
+                    if cat_data and 'score' in cat_data:
+                        key_name = cat.replace('-', '_')
+                        scores[key_name] = int(cat_data['score'] * 100)
 
-                        if scores:
-                            scores['overall'] = int(sum(scores.values()) / len(scores))
+                if scores:
+                    scores['overall'] = int(sum(scores.values()) / len(scores))
+                    await put_cached_pagespeed(url, strategy, scores)
 
-                        return scores
+                return scores
 
             return None
         except Exception as e:
@@ -0,0 +1,316 @@
+"""
+Multi-page crawl for the website SWOT analysis.
+Starting from the submitted URL (and the URLs listed in the site's sitemaps), pages on the same
+host are fetched by a bounded pool of async workers and analyzed with SEOAnalyzer's on-page
+extractor. Internal links found on each page are queued until the page or time budget runs out.
+robots.txt rules and Crawl-delay are respected, and requests to a host are spaced at least
+SITE_CRAWL_DELAY apart. Per-page results are yielded as pages complete, and SiteStats aggregates
+them into site-level issues (duplicate titles, missing meta descriptions, heading problems,
+alt-text coverage).
+"""
+
+import os
+import re
+import asyncio
+import logging
+import lxml.etree
+from urllib import robotparser
+from urllib.parse import urljoin, urldefrag, urlparse
+from typing import Any, AsyncIterator, Dict, List, Optional, Set
+from http_client import fetch
+from helpers import registrable_domain
+from seo_analyzer import SEOAnalyzer
+
+SITE_CRAWL_MAX_PAGES = int(os.environ.get("SITE_CRAWL_MAX_PAGES", 500))
+# Seconds from the start of the crawl after which no new page is fetched
+SITE_CRAWL_TIME_BUDGET = float(os.environ.get("SITE_CRAWL_TIME_BUDGET", 50))
+SITE_CRAWL_CONCURRENCY = int(os.environ.get("SITE_CRAWL_CONCURRENCY", 8))
+# Minimum spacing between requests to one host; a larger robots.txt Crawl-delay wins
+SITE_CRAWL_DELAY = float(os.environ.get("SITE_CRAWL_DELAY", 0.1))
+SITE_CRAWL_PAGE_TIMEOUT = float(os.environ.get("SITE_CRAWL_PAGE_TIMEOUT", 15))
+# Child sitemaps read from a sitemap index
+SITE_CRAWL_MAX_SITEMAPS = int(os.environ.get("SITE_CRAWL_MAX_SITEMAPS", 5))
+# Example URLs kept per site-level issue
+SITE_STATS_EXAMPLES = 10
+
+_SKIPPED_EXTENSIONS = re.compile(
+    r"\.(jpe?g|png|gif|webp|svg|ico|pdf|zip|gz|rar|mp3|mp4|avi|mov|webm|css|js|json|xml|txt|woff2?|ttf|eot|docx?|xlsx?|pptx?)$",
+    re.IGNORECASE
+)
+_XML_PARSER = lxml.etree.XMLParser(resolve_entities=False, no_network=True, recover=True)
+
+
+def _normalize(url: str) -> str:
+    return urldefrag(url)[0]
+
+
+class _HostThrottle:
+    """Spaces the start of requests to one host at least delay seconds apart"""
+
+    def __init__(self, delay: float):
+        self.delay = delay
+        self._lock = asyncio.Lock()
+        self._next = 0.0
+
+    async def wait(self):
+        async with self._lock:
+            now = asyncio.get_running_loop().time()
+            if self._next > now:
+                await asyncio.sleep(self._next - now)
+            self._next = max(now, self._next) + self.delay
+
+
+class SiteStats:
+    """Site-level aggregation of per-page crawl results"""
+
+    def __init__(self):
+        self.pages_crawled = 0
+        self.pages_failed = 0
+        self.blocked_by_robots = 0
+        self.images_count = 0
+        self.alt_tags_missing = 0
+        self._titles: Dict[str, List[str]] = {}
+        self._descriptions: Dict[str, List[str]] = {}
+        self._issues: Dict[str, List[str]] = {
+            "missing_title": [],
+            "missing_meta_description": [],
+            "missing_h1": [],
+            "multiple_h1": [],
+            "skipped_heading_levels": []
+        }
+
+    def add(self, page: Dict[str, Any]) -> None:
+        if page.get("error"):
+            self.pages_failed += 1
+            return
+        self.pages_crawled += 1
+        url = page["url"]
+        title = page.get("title")
+        meta_description = page.get("meta_description")
+        headings = page.get("headings", {})
+        if title:
+            self._titles.setdefault(title, []).append(url)
+        else:
+            self._issues["missing_title"].append(url)
+        if meta_description:
+            self._descriptions.setdefault(meta_description, []).append(url)
+        else:
+            self._issues["missing_meta_description"].append(url)
+        h1_count = len(headings.get("h1", []))
+        if h1_count == 0:
+            self._issues["missing_h1"].append(url)
+        elif h1_count > 1:
+            self._issues["multiple_h1"].append(url)
+        levels = [level for level in range(1, 7) if headings.get(f"h{level}")]
+        if any(level > 1 and level - 1 not in levels for level in levels):
+            self._issues["skipped_heading_levels"].append(url)
+        self.images_count += page.get("images_count", 0)
+        self.alt_tags_missing += page.get("alt_tags_missing", 0)
+
+    @staticmethod
+    def _duplicates(groups: Dict[str, List[str]]) -> List[Dict[str, Any]]:
+        duplicates = [{"text": text, "count": len(urls), "urls": urls[:SITE_STATS_EXAMPLES]}
+                      for text, urls in groups.items() if len(urls) > 1]
+        duplicates.sort(key=lambda group: group["count"], reverse=True)
+        return duplicates[:SITE_STATS_EXAMPLES]
+
+    def summary(self) -> Dict[str, Any]:
+        issues = {name: {"count": len(urls), "examples": urls[:SITE_STATS_EXAMPLES]}
+                  for name, urls in self._issues.items()}
+        issues["duplicate_titles"] = self._duplicates(self._titles)
+        issues["duplicate_meta_descriptions"] = self._duplicates(self._descriptions)
+        with_alt = self.images_count - self.alt_tags_missing
+        return {
+            "pages_crawled": self.pages_crawled,
+            "pages_failed": self.pages_failed,
+            "blocked_by_robots": self.blocked_by_robots,
+            "images_count": self.images_count,
+            "alt_tags_missing": self.alt_tags_missing,
+            "alt_coverage": round(100 * with_alt / self.images_count, 1) if self.images_count else None,
+            "issues": issues
+        }
+
+
+class SiteCrawler:
+
+    def __init__(self, max_pages: int = SITE_CRAWL_MAX_PAGES, time_budget: float = SITE_CRAWL_TIME_BUDGET,
+                 concurrency: int = SITE_CRAWL_CONCURRENCY):
+        self.max_pages = max_pages
+        self.time_budget = time_budget
+        self.concurrency = concurrency
+        self.analyzer = SEOAnalyzer()
+        self.stats = SiteStats()
+        self.sitemap_urls = 0
+        self._robots: Dict[str, asyncio.Future] = {}
+        self._throttles: Dict[str, _HostThrottle] = {}
+        self._seen: Set[str] = set()
+        self._hosts: Set[str] = set()
+        self._start_url = ""
+
+    async def crawl(self, start_url: str) -> AsyncIterator[Dict[str, Any]]:
+        """Yield each page's on-page results as it completes; self.stats has the running aggregate"""
+        results: asyncio.Queue = asyncio.Queue()
+        runner = asyncio.ensure_future(self._run(start_url, results))
+        try:
+            while True:
+                page = await results.get()
+                if page is None:
+                    break
+                yield page
+        finally:
+            runner.cancel()
+
+    async def _run(self, start_url: str, results: asyncio.Queue) -> None:
+        try:
+            await asyncio.wait_for(self._crawl_site(start_url, results), timeout=self.time_budget)
+        except asyncio.TimeoutError:
+            logging.info(f"Crawl of {start_url} stopped at the {self.time_budget}s budget")
+        except Exception as error:
+            logging.error(f"Crawl of {start_url} failed: {error}")
+        finally:
+            results.put_nowait(None)
+
+    async def _crawl_site(self, start_url: str, results: asyncio.Queue) -> None:
+        self._start_url = _normalize(start_url)
+        self._hosts.add(urlparse(start_url).netloc)
+        self._seen.add(self._start_url)
+        queue: asyncio.Queue = asyncio.Queue()
+        # The home page goes first: it settles the host the site redirects to and seeds the queue
+        await self._process(self._start_url, queue, results)
+        workers = [asyncio.ensure_future(self._worker(queue, results)) for _ in range(self.concurrency)]
+        try:
+            robots = await self._robots_for(start_url)
+            for url in await self._sitemap_urls(start_url, robots):
+                if self._enqueue(queue, url):
+                    self.sitemap_urls += 1
+            await queue.join()
+        finally:
+            for worker in workers:
+                worker.cancel()
+
+    def _enqueue(self, queue: asyncio.Queue, url: str) -> bool:
+        url = _normalize(url)
+        parsed = urlparse(url)
+        if (parsed.scheme not in ("http", "https") or parsed.netloc not in self._hosts
+                or _SKIPPED_EXTENSIONS.search(parsed.path) or url in self._seen
+                or len(self._seen) >= self.max_pages):
+            return False
+        self._seen.add(url)
+        queue.put_nowait(url)
+        return True
+
+    async def _worker(self, queue: asyncio.Queue, results: asyncio.Queue) -> None:
+        while True:
+            url = await queue.get()
+            try:
+                await self._process(url, queue, results)
+            finally:
+                queue.task_done()
+
+    async def _process(self, url: str, queue: asyncio.Queue, results: asyncio.Queue) -> None:
+        try:
+            page = await self._crawl_page(url)
+        except Exception as error:
+            logging.warning(f"Crawl of {url} failed: {error}")
+            return
+        if page is None:
+            return
+        for link in page.pop("links", []):
+            self._enqueue(queue, urljoin(page["url"], link))
+        self.stats.add(page)
+        results.put_nowait(page)
+
+    async def _crawl_page(self, url: str) -> Optional[Dict[str, Any]]:
+        """On-page results plus the page's links, or None when the page is skipped (disallowed by
+        robots.txt, not HTML, already crawled, or redirected off the crawled hosts)"""
+        robots = await self._robots_for(url)
+        if robots is not None and not robots.can_fetch("*", url):
+            self.stats.blocked_by_robots += 1
+            return None
+        await self._throttle(url, robots).wait()
+        try:
+            response = await fetch(url, timeout=SITE_CRAWL_PAGE_TIMEOUT, retries=1)
+        except Exception as error:
+            return {"url": url, "error": str(error) or type(error).__name__, "success": False}
+        if response.status != 200:
+            return {"url": url, "error": f"HTTP {response.status}", "success": False}
+        if "html" not in response.headers.get("Content-Type", "html").lower():
+            return None
+        final = urlparse(response.url)
+        if url == self._start_url:
+            # Follow the site to wherever its home page redirects (www, https), but not off-site
+            # (an SSO or parked-domain target), whose page is not the site's to audit
+            if registrable_domain(final.hostname) != registrable_domain(urlparse(url).hostname):
+                logging.info(f"{url} redirects to {final.netloc}, which is not the same site; not following it")
+                return {"url": url, "error": f"Redirected off-site to {final.netloc}", "success": False}
+            self._hosts.add(final.netloc)
+        elif final.netloc not in self._hosts:
+            return None
+        final_url = _normalize(response.url)
+        if final_url != url:
+            if final_url in self._seen:
+                return None
+            self._seen.add(final_url)
+        links: List[str] = []
+        loop = asyncio.get_running_loop()
+        page = await loop.run_in_executor(None, self.analyzer.analyze_html, response.text(), response.url, links)
+        page["links"] = links
+        return page
+
+    def _throttle(self, url: str, robots: Optional[robotparser.RobotFileParser]) -> _HostThrottle:
+        host = urlparse(url).netloc
+        if host not in self._throttles:
+            crawl_delay = robots.crawl_delay("*") if robots is not None else None
+            self._throttles[host] = _HostThrottle(max(SITE_CRAWL_DELAY, float(crawl_delay or 0)))
+        return self._throttles[host]
+
+    def _robots_for(self, url: str) -> asyncio.Future:
+        """The host's robots.txt rules (None if unreadable), fetched once per host"""
+        host = urlparse(url).netloc
+        if host not in self._robots:
+            self._robots[host] = asyncio.ensure_future(self._load_robots(url))
+        return self._robots[host]
+
+    async def _load_robots(self, url: str) -> Optional[robotparser.RobotFileParser]:
+        parsed = urlparse(url)
+        robots = robotparser.RobotFileParser(f"{parsed.scheme}://{parsed.netloc}/robots.txt")
+        try:
+            response = await fetch(robots.url, timeout=SITE_CRAWL_PAGE_TIMEOUT, retries=1)
+        except Exception as error:
+            logging.warning(f"Could not read {robots.url}, crawling without it: {error}")
+            return None
+        # Same rules as RobotFileParser.read(): 401/403 blocks the site, other errors allow everything
+        if response.status in (401, 403):
+            robots.disallow_all = True
+        elif response.status >= 400:
+            robots.allow_all = True
+        else:
+            robots.parse(response.text().splitlines())
+        return robots
+
+    async def _sitemap_urls(self, start_url: str, robots: Optional[robotparser.RobotFileParser]) -> List[str]:
+        """Page URLs from the robots.txt sitemaps (or /sitemap.xml), following one level of sitemap index"""
+        parsed = urlparse(start_url)
+        pending = (robots.site_maps() if robots is not None else None) or [f"{parsed.scheme}://{parsed.netloc}/sitemap.xml"]
+        pending = pending[:SITE_CRAWL_MAX_SITEMAPS]
+        urls: List[str] = []
+        read = 0
+        while pending and read < SITE_CRAWL_MAX_SITEMAPS and len(urls) < self.max_pages:
+            sitemap_url = pending.pop(0)
+            read += 1
+            try:
+                response = await fetch(sitemap_url, timeout=SITE_CRAWL_PAGE_TIMEOUT, retries=1)
+                if response.status != 200:
+                    continue
+                root = lxml.etree.fromstring(response.body, parser=_XML_PARSER)
+            except Exception as error:
+                logging.warning(f"Could not read sitemap {sitemap_url}: {error}")
+                continue
+            if root is None:
+                continue
+            locations = [loc.text.strip() for loc in root.iter("{*}loc") if loc.text]
+            if lxml.etree.QName(root).localname == "sitemapindex":
+                pending.extend(locations)
+            else:
+                urls.extend(locations)
+        return urls[:self.max_pages]
@@ -1,6 +1,3 @@
-import aiohttp
-import ssl
-import certifi
 from bs4 import BeautifulSoup, Tag
 from typing import Dict, Any, Optional
 from urllib.parse import urlparse
@@ -8,10 +5,21 @@ from helpers import is_social_media_url, extract_domain, extract_username_from_u
 from tiktok_scraping import scrape_profile_and_posts as tiktok_scrape_profile
 import asyncio
 from instagram_analyzer import InstagramAnalyzer
+from http_cache import fetch_revalidated
+from worker_loop import run as run_on_worker_loop
+from social_cache import SOCIAL_CACHE_TTL, get_social_cache, posts_key, profile_key
+from concurrent.futures import ThreadPoolExecutor
 import logging
+
+TIKTOK_MAX_POSTS = 30
+INSTAGRAM_MAX_POSTS = 41
+
+# Stale cache entries are refreshed here; a request's event loop is closed once the response is sent
+_refresh_executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix="social-refresh")
+
 class SocialAnalyzer:
     def __init__(self):
-        self.timeout = aiohttp.ClientTimeout(total=30)
+        self.timeout = 30
         self.headers = {
             'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
         }
@@ -35,7 +43,10 @@ class SocialAnalyzer:
                 if path_parts:
                     username = path_parts[0]  
                     
-                    instagram_data = await self.instagram_analyzer.analyze_profile(username)
+                    instagram_data = await self._cached_profile(
+                        "instagram", username, INSTAGRAM_MAX_POSTS,
+                        lambda: self.instagram_analyzer.analyze_profile(username)
+                    )
                     
                     if instagram_data.get("success", False):
                         method = instagram_data.get("method", "unknown")
@@ -106,9 +117,7 @@ class SocialAnalyzer:
                 username = extract_username_from_url(url, platform) or ""
                 if not username:
                     raise Exception("Unable to extract TikTok username from URL")
-                loop = asyncio.get_running_loop()
-                logging.critical(f"Scraping TikTok profile: {username}")
-                data = await loop.run_in_executor(None, lambda: tiktok_scrape_profile(username, headless=True, max_posts=30))
+                data = await self._cached_profile("tiktok", username, TIKTOK_MAX_POSTS, lambda: self._scrape_tiktok(username))
                 logging.critical(f"TikTok profile scraped: {data}")
                 posts = data.get('posts', []) or []
                 like_values = [p.get('likes') for p in posts if isinstance(p.get('likes'), int)]
@@ -160,20 +169,9 @@ class SocialAnalyzer:
         try:
             # Fetch basic information
             html_content = await self._fetch_html(url)
-            soup = BeautifulSoup(html_content, 'html.parser')
-            
-            analysis_results = {
-                "url": url,
-                "platform": platform,
-                "is_social": True,
-                "title": self._extract_title(soup),
-                "description": self._extract_description(soup),
-                "og_tags": self._extract_og_tags(soup),
-                "profile_info": self._extract_profile_info(soup, platform),
-                "accessibility": self._check_accessibility(url)
-            }
-            
-            return analysis_results
+            # Parsing is CPU-bound; run it off the worker loop shared by concurrent analyses
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(None, self._analyze_html, html_content, url, platform)
             
         except Exception as e:
             return {
@@ -184,6 +182,77 @@ class SocialAnalyzer:
                 "accessible": False
             }
     
+    async def _cached_profile(self, platform: str, username: str, max_posts: int, fetch) -> Dict[str, Any]:
+        """
+        Scrape result from the social cache when fresh. A stale result is returned right away and
+        refreshed in the background by one worker. fetch is a zero-argument coroutine function.
+        Cache calls are SQLite queries that can wait on a locked database, so they run in threads
+        rather than on the worker loop shared by every concurrent analysis.
+        """
+        cache = await asyncio.to_thread(get_social_cache)
+        if cache is None:
+            return await fetch()
+
+        key = profile_key(platform, username, max_posts)
+        cached = await asyncio.to_thread(cache.get, key)
+        if cached is not None:
+            data, age = cached
+            if age >= SOCIAL_CACHE_TTL and await asyncio.to_thread(cache.claim_refresh, key):
+                logging.info(f"Serving stale {key} ({age:.0f}s old), refreshing in the background")
+                _refresh_executor.submit(self._refresh_profile, cache, key, fetch)
+            return data
+
+        data = await fetch()
+        if self._is_cacheable(data):
+            await asyncio.to_thread(cache.put, key, data)
+        return data
+
+    def _refresh_profile(self, cache, key: str, fetch) -> None:
+        try:
+            data = run_on_worker_loop(fetch())
+            if self._is_cacheable(data):
+                cache.put(key, data)
+        except Exception as e:
+            logging.error(f"Background refresh of {key} failed: {e}")
+        finally:
+            cache.release_refresh(key)
+
+    @staticmethod
+    def _is_cacheable(data: Dict[str, Any]) -> bool:
+        """
+        Only complete scrapes are cached; a failed or partial one would otherwise be served for the
+        whole TTL and then again while it revalidates.
+        """
+        if not data or not data.get("success", True) or data.get("error"):
+            return False
+        if "profile" not in data:
+            return True
+        # TikTok: the profile stats must have been read, and the posts must not all have failed
+        profile = data.get("profile") or {}
+        if any(profile.get(stat) is None for stat in ("followers", "following", "likes_total")):
+            return False
+        posts = data.get("posts") or []
+        if not posts:
+            # An account with likes has posts, so an empty grid means the scrape failed
+            return not profile.get("likes_total")
+        return not all(post.get("error") for post in posts)
+
+    async def _scrape_tiktok(self, username: str) -> Dict[str, Any]:
+        cache = await asyncio.to_thread(get_social_cache)
+        owner = posts_key("tiktok", username)
+        known_posts = await asyncio.to_thread(cache.get_posts, owner) if cache else {}
+        loop = asyncio.get_running_loop()
+        logging.critical(f"Scraping TikTok profile: {username}")
+        data = await loop.run_in_executor(
+            None, lambda: tiktok_scrape_profile(username, headless=True, max_posts=TIKTOK_MAX_POSTS, known_posts=known_posts)
+        )
+        if cache:
+            # Reused posts keep their original timestamp so they still expire on schedule
+            await asyncio.to_thread(
+                cache.put_posts, owner, [p for p in data.get("posts") or [] if not p.get("error") and p.get("url") not in known_posts]
+            )
+        return data
+
     def _identify_platform(self, url: str) -> str:
         domain = extract_domain(url).lower()
         
@@ -207,19 +276,25 @@ class SocialAnalyzer:
         return 'Unknown'
     
     async def _fetch_html(self, url: str) -> str:
-        ssl_context = ssl.create_default_context(cafile=certifi.where())
+        response = await fetch_revalidated(url, headers=self.headers, timeout=self.timeout)
+        if response.status != 200:
+            raise Exception(f"HTTP {response.status}: Unable to fetch URL")
         
-        async with aiohttp.ClientSession(
-            timeout=self.timeout,
-            headers=self.headers,
-            connector=aiohttp.TCPConnector(ssl=ssl_context)
-        ) as session:
-            async with session.get(url) as response:
-                if response.status != 200:
-                    raise Exception(f"HTTP {response.status}: Unable to fetch URL")
-                
-                return await response.text()
+        return response.text()
     
+    def _analyze_html(self, html_content: str, url: str, platform: str) -> Dict[str, Any]:
+        soup = BeautifulSoup(html_content, 'html.parser')
+        return {
+            "url": url,
+            "platform": platform,
+            "is_social": True,
+            "title": self._extract_title(soup),
+            "description": self._extract_description(soup),
+            "og_tags": self._extract_og_tags(soup),
+            "profile_info": self._extract_profile_info(soup, platform),
+            "accessibility": self._check_accessibility(url)
+        }
+
     def _extract_title(self, soup: BeautifulSoup) -> Optional[str]:
         title_tag = soup.find('title')
         return title_tag.get_text().strip() if title_tag else None
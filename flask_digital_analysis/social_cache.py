@@ -0,0 +1,179 @@
+"""
+Persistent cache of social profile scrapes (TikTok, Instagram).
+Results are keyed by (platform, username, max_posts) and shared by every worker on the host
+through SQLite. A result younger than SOCIAL_CACHE_TTL is served as-is. An older one is still
+served while younger than SOCIAL_CACHE_STALE_TTL, and one worker refreshes it in the background
+(stale-while-revalidate). Individual posts are cached per URL as well, so a refresh only
+scrapes posts it has not seen within SOCIAL_POST_CACHE_TTL.
+"""
+
+import os
+import json
+import time
+import sqlite3
+import logging
+import threading
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+SOCIAL_CACHE_ENABLED = os.environ.get("SOCIAL_CACHE_ENABLED", "true").lower() == "true"
+SOCIAL_CACHE_PATH = os.environ.get("SOCIAL_CACHE_PATH", "/tmp/social_cache/social.sqlite3")
+SOCIAL_CACHE_TTL = int(os.environ.get("SOCIAL_CACHE_TTL", 15 * 60))
+SOCIAL_CACHE_STALE_TTL = int(os.environ.get("SOCIAL_CACHE_STALE_TTL", 24 * 3600))
+SOCIAL_POST_CACHE_TTL = int(os.environ.get("SOCIAL_POST_CACHE_TTL", 6 * 3600))
+# How long one worker's claim on a background refresh blocks the others
+SOCIAL_REFRESH_LEASE = int(os.environ.get("SOCIAL_REFRESH_LEASE", 10 * 60))
+
+
+def posts_key(platform: str, username: str) -> str:
+    return f"{platform.lower()}:{username.strip().lstrip('@').lower()}"
+
+
+def profile_key(platform: str, username: str, max_posts: int) -> str:
+    return f"{posts_key(platform, username)}:{max_posts}"
+
+
+class SocialCache:
+    """SQLite store shared by every worker on the host (WAL mode, one connection per call)"""
+
+    def __init__(self, path: str = SOCIAL_CACHE_PATH):
+        self.path = path
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS profile_results (
+                    key TEXT PRIMARY KEY,
+                    result TEXT NOT NULL,
+                    created_at REAL NOT NULL
+                )
+            """)
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS post_results (
+                    url TEXT PRIMARY KEY,
+                    profile TEXT NOT NULL,
+                    result TEXT NOT NULL,
+                    created_at REAL NOT NULL
+                )
+            """)
+            conn.execute("CREATE INDEX IF NOT EXISTS post_results_profile ON post_results (profile)")
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS profile_history (
+                    profile TEXT PRIMARY KEY,
+                    posts TEXT NOT NULL,
+                    created_at REAL NOT NULL
+                )
+            """)
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS refresh_claims (
+                    key TEXT PRIMARY KEY,
+                    until REAL NOT NULL
+                )
+            """)
+        self.purge_expired()
+
+    def _connect(self):
+        return sqlite3.connect(self.path, timeout=30)
+
+    def get(self, key: str) -> Optional[Tuple[Dict[str, Any], float]]:
+        """(result, age in seconds) if a result younger than SOCIAL_CACHE_STALE_TTL exists"""
+        with self._connect() as conn:
+            row = conn.execute("SELECT result, created_at FROM profile_results WHERE key = ?", (key,)).fetchone()
+        if row is None:
+            return None
+        age = time.time() - row[1]
+        if age >= SOCIAL_CACHE_STALE_TTL:
+            return None
+        return json.loads(row[0]), age
+
+    def put(self, key: str, result: Dict[str, Any]) -> None:
+        with self._connect() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO profile_results (key, result, created_at) VALUES (?, ?, ?)",
+                (key, json.dumps(result, default=str), time.time())
+            )
+
+    def get_posts(self, profile: str) -> Dict[str, Dict[str, Any]]:
+        """Fresh cached posts of one profile ("platform:username"), keyed by URL"""
+        with self._connect() as conn:
+            rows = conn.execute(
+                "SELECT url, result FROM post_results WHERE profile = ? AND created_at >= ?",
+                (profile, time.time() - SOCIAL_POST_CACHE_TTL)
+            ).fetchall()
+        return {url: json.loads(result) for url, result in rows}
+
+    def put_posts(self, profile: str, posts: Iterable[Dict[str, Any]]) -> None:
+        now = time.time()
+        rows = [(post["url"], profile, json.dumps(post, default=str), now) for post in posts if post.get("url")]
+        if not rows:
+            return
+        with self._connect() as conn:
+            conn.executemany(
+                "INSERT OR REPLACE INTO post_results (url, profile, result, created_at) VALUES (?, ?, ?, ?)",
+                rows
+            )
+
+    def get_history(self, profile: str, ttl: int) -> List[Dict[str, Any]]:
+        """Cached post history of one profile, newest first; empty once the history is older than ttl"""
+        with self._connect() as conn:
+            row = conn.execute(
+                "SELECT posts FROM profile_history WHERE profile = ? AND created_at >= ?",
+                (profile, time.time() - ttl)
+            ).fetchone()
+        return json.loads(row[0]) if row else []
+
+    def put_history(self, profile: str, posts: List[Dict[str, Any]], reset: bool) -> None:
+        """Store the history; created_at only moves when reset is set (a full fetch), so incremental updates still expire"""
+        with self._connect() as conn:
+            conn.execute(
+                f"""
+                INSERT INTO profile_history (profile, posts, created_at) VALUES (?, ?, ?)
+                ON CONFLICT(profile) DO UPDATE SET posts = excluded.posts{", created_at = excluded.created_at" if reset else ""}
+                """,
+                (profile, json.dumps(posts, default=str), time.time())
+            )
+
+    def claim_refresh(self, key: str) -> bool:
+        """True for exactly one caller across workers until the claim is released or expires"""
+        now = time.time()
+        with self._connect() as conn:
+            cursor = conn.execute(
+                """
+                INSERT INTO refresh_claims (key, until) VALUES (?, ?)
+                ON CONFLICT(key) DO UPDATE SET until = excluded.until WHERE refresh_claims.until < ?
+                """,
+                (key, now + SOCIAL_REFRESH_LEASE, now)
+            )
+            return cursor.rowcount == 1
+
+    def release_refresh(self, key: str) -> None:
+        with self._connect() as conn:
+            conn.execute("DELETE FROM refresh_claims WHERE key = ?", (key,))
+
+    def purge_expired(self) -> None:
+        now = time.time()
+        with self._connect() as conn:
+            conn.execute("DELETE FROM profile_results WHERE created_at < ?", (now - SOCIAL_CACHE_STALE_TTL,))
+            conn.execute("DELETE FROM post_results WHERE created_at < ?", (now - SOCIAL_POST_CACHE_TTL,))
+            conn.execute("DELETE FROM refresh_claims WHERE until < ?", (now,))
+
+
+_cache: Optional[SocialCache] = None
+_cache_lock = threading.Lock()
+_cache_failed = False
+
+
+def get_social_cache() -> Optional[SocialCache]:
+    """Shared cache, or None when disabled (SOCIAL_CACHE_ENABLED=false) or the database cannot be opened"""
+    global _cache, _cache_failed
+    if not SOCIAL_CACHE_ENABLED or _cache_failed:
+        return None
+    if _cache is not None:
+        return _cache
+    with _cache_lock:
+        if _cache is None and not _cache_failed:
+            try:
+                _cache = SocialCache()
+            except Exception as error:
+                logging.error(f"Social cache unavailable, scraping without it: {error}")
+                _cache_failed = True
+    return _cache
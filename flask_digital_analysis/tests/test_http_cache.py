@@ -0,0 +1,103 @@
+import types
+
+import pytest
+from aiohttp import web
+
+import http_cache
+import worker_loop
+from http_cache import HttpCache, fetch_revalidated, get_cached_pagespeed, put_cached_pagespeed
+
+SEO_UA = {"User-Agent": "seo-analyzer"}
+SOCIAL_UA = {"User-Agent": "social-analyzer"}
+
+
+@pytest.fixture
+def cache(tmp_path, monkeypatch):
+    store = HttpCache(str(tmp_path / "http.sqlite3"))
+    monkeypatch.setattr(http_cache, "HTTP_CACHE_ENABLED", True)
+    monkeypatch.setattr(http_cache, "_cache", store)
+    return store
+
+
+@pytest.fixture
+def server():
+    requests = []
+
+    async def page(request):
+        requests.append(dict(request.headers))
+        user_agent = request.headers.get("User-Agent", "")
+        # Serves a different body per User-Agent under one ETag and without Vary, as many sites do
+        if request.headers.get("If-None-Match") == '"v1"':
+            return web.Response(status=304, headers={"ETag": '"v1"'})
+        return web.Response(text=f"<html>{user_agent}</html>", content_type="text/html", headers={"ETag": '"v1"'})
+
+    async def varies(request):
+        requests.append(dict(request.headers))
+        vary = request.match_info["vary"]
+        return web.Response(text=request.headers.get(vary, ""), headers={"ETag": '"v1"', "Vary": vary})
+
+    async def start():
+        app = web.Application()
+        app.router.add_get("/page", page)
+        app.router.add_get("/vary/{vary}", varies)
+        runner = web.AppRunner(app)
+        await runner.setup()
+        site = web.TCPSite(runner, "127.0.0.1", 0)
+        await site.start()
+        return runner, site._server.sockets[0].getsockname()[1]
+
+    runner, port = worker_loop.run(start(), timeout=10)
+    yield types.SimpleNamespace(base=f"http://127.0.0.1:{port}", requests=requests)
+    worker_loop.run(runner.cleanup(), timeout=10)
+
+
+def _get(url, headers):
+    return worker_loop.run(fetch_revalidated(url, headers=headers), timeout=10)
+
+
+def test_unchanged_page_is_revalidated_and_served_from_cache(cache, server):
+    first = _get(f"{server.base}/page", SEO_UA)
+    second = _get(f"{server.base}/page", SEO_UA)
+
+    assert server.requests[1]["If-None-Match"] == '"v1"'
+    assert (second.status, second.text()) == (200, first.text()) == (200, "<html>seo-analyzer</html>")
+
+
+def test_stored_copy_is_not_served_to_another_user_agent(cache, server):
+    _get(f"{server.base}/page", SEO_UA)
+    social = _get(f"{server.base}/page", SOCIAL_UA)
+
+    assert "If-None-Match" not in server.requests[1]
+    assert social.text() == "<html>social-analyzer</html>"
+
+
+def test_stored_copy_is_only_reused_for_matching_vary_headers(cache, server):
+    url = f"{server.base}/vary/Accept-Language"
+    _get(url, {**SEO_UA, "Accept-Language": "en"})
+    _get(url, {**SEO_UA, "Accept-Language": "en"})
+    arabic = _get(url, {**SEO_UA, "Accept-Language": "ar"})
+
+    assert [("If-None-Match" in headers) for headers in server.requests] == [False, True, False]
+    assert arabic.text() == "ar"
+
+
+@pytest.mark.parametrize("vary", ["*", "Cookie"])
+def test_responses_varying_on_everything_or_cookies_are_not_stored(cache, server, vary):
+    url = f"{server.base}/vary/{vary}"
+    _get(url, SEO_UA)
+    _get(url, SEO_UA)
+
+    assert not any("If-None-Match" in headers for headers in server.requests)
+
+
+def test_pagespeed_results_expire_after_the_ttl(cache, monkeypatch):
+    now = [1_000_000.0]
+    monkeypatch.setattr(http_cache, "time", types.SimpleNamespace(time=lambda: now[0]))
+    scores = {"performance": 91, "seo": 100}
+
+    worker_loop.run(put_cached_pagespeed("https://example.com/", "mobile", scores))
+    assert worker_loop.run(get_cached_pagespeed("https://example.com/", "mobile")) == scores
+    assert worker_loop.run(get_cached_pagespeed("https://example.com/", "desktop")) is None
+
+    now[0] += http_cache.PAGESPEED_CACHE_TTL + 1
+    assert worker_loop.run(get_cached_pagespeed("https://example.com/", "mobile")) is None
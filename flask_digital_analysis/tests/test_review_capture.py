@@ -0,0 +1,69 @@
+import json
+import os
+import time
+
+from review_capture import REVIEW_PAYLOADS, ReviewCapture, parse_review_payload
+
+FIXTURES = os.path.join(os.path.dirname(__file__), "fixtures")
+
+
+def _fixture(name):
+    with open(os.path.join(FIXTURES, name), encoding="utf-8") as handle:
+        return handle.read()
+
+
+def test_parse_listugcposts_payload():
+    reviews = parse_review_payload(_fixture("listugcposts.txt"), REVIEW_PAYLOADS[0])
+
+    assert [review["name"] for review in reviews] == ["Mona Hassan", "Karim Adel", "Sara"]
+    assert [review["stars"] for review in reviews] == [5, 2, 4]
+    assert reviews[0]["review_text"] == "Lovely staff and quick service."
+    assert reviews[0]["review_id"] == "Ci9DQUlRQUNvZENodGpTVVJ1"
+    # A rating without text still parses; the scraper drops it later
+    assert reviews[2]["review_text"] == ""
+
+
+def test_unrecognized_payload_parses_to_nothing():
+    assert parse_review_payload(")]}'\n[null, \"token\", null]", REVIEW_PAYLOADS[0]) == []
+
+
+class FakeDriver:
+    def __init__(self, responses=()):
+        self.entries = []
+        self.bodies = {}
+        for request_id, (url, body) in enumerate(responses):
+            self.bodies[str(request_id)] = body
+            for method, params in (
+                ("Network.responseReceived", {"requestId": str(request_id), "response": {"url": url}}),
+                ("Network.loadingFinished", {"requestId": str(request_id)}),
+            ):
+                self.entries.append({"message": json.dumps({"message": {"method": method, "params": params}})})
+
+    def get_log(self, kind):
+        entries, self.entries = self.entries, []
+        return entries
+
+    def execute_cdp_cmd(self, command, params):
+        return {"body": self.bodies[params["requestId"]], "base64Encoded": False}
+
+
+def test_capture_reads_reviews_from_performance_log():
+    driver = FakeDriver()
+    capture = ReviewCapture(driver)
+    driver.entries = FakeDriver([
+        ("https://www.google.com/maps/rpc/listugcposts?authuser=0", _fixture("listugcposts.txt")),
+        ("https://www.google.com/maps/vt?pb=tile", "not a review payload"),
+    ]).entries
+    driver.bodies = {"0": _fixture("listugcposts.txt")}
+
+    assert capture.wait_for_more(1) == 3
+    assert capture.payloads == 1
+
+
+def test_missing_payload_gives_up_after_the_timeout():
+    capture = ReviewCapture(FakeDriver())
+
+    started = time.monotonic()
+    assert capture.wait_for_more(0.3) == 0
+    assert time.monotonic() - started < 1
+
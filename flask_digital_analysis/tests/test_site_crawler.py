@@ -0,0 +1,105 @@
+import os
+
+import pytest
+from aiohttp import web
+
+import worker_loop
+from site_crawler import SiteCrawler, SiteStats
+
+SITE = os.path.join(os.path.dirname(__file__), "fixtures", "site")
+
+
+async def _serve_fixture(request):
+    # localhost only serves a redirect to the same server under 127.0.0.1, i.e. another site
+    if request.host.startswith("localhost"):
+        if request.path == "/":
+            raise web.HTTPFound(f"http://127.0.0.1:{request.url.port}/")
+        raise web.HTTPNotFound()
+    path = os.path.normpath(os.path.join(SITE, request.path.lstrip("/") or "index.html"))
+    if not path.startswith(SITE) or not os.path.isfile(path):
+        raise web.HTTPNotFound()
+    with open(path, encoding="utf-8") as handle:
+        body = handle.read().replace("{base}", f"http://{request.host}")
+    content_type = {".html": "text/html", ".xml": "application/xml"}.get(os.path.splitext(path)[1], "text/plain")
+    return web.Response(text=body, content_type=content_type)
+
+
+@pytest.fixture
+def site_port():
+    async def start():
+        app = web.Application()
+        app.router.add_get("/{tail:.*}", _serve_fixture)
+        runner = web.AppRunner(app)
+        await runner.setup()
+        site = web.TCPSite(runner, "127.0.0.1", 0)
+        await site.start()
+        return runner, site._server.sockets[0].getsockname()[1]
+
+    runner, port = worker_loop.run(start(), timeout=10)
+    yield port
+    worker_loop.run(runner.cleanup(), timeout=10)
+
+
+def _crawl(start_url, **options):
+    crawler = SiteCrawler(time_budget=20, concurrency=4, **options)
+
+    async def collect():
+        return [page async for page in crawler.crawl(start_url)]
+
+    return crawler, worker_loop.run(collect(), timeout=30)
+
+
+def test_crawl_follows_links_and_sitemaps_and_respects_robots(site_port):
+    base = f"http://127.0.0.1:{site_port}"
+    crawler, pages = _crawl(f"{base}/")
+
+    crawled = {page["url"] for page in pages if not page.get("error")}
+    assert crawled == {f"{base}/", f"{base}/about.html", f"{base}/blog/a.html", f"{base}/blog/b.html", f"{base}/orphan.html"}
+    assert [page["url"] for page in pages if page.get("error")] == [f"{base}/missing.html"]
+    # /private/ is disallowed in robots.txt; it is linked from the home page and listed in the sitemap
+    assert crawler.stats.blocked_by_robots == 1
+    # The sitemap index was followed to the page sitemap; the home page was already queued
+    assert crawler.sitemap_urls == 1
+
+    summary = crawler.stats.summary()
+    assert summary["pages_crawled"] == 5
+    assert summary["pages_failed"] == 1
+    assert summary["images_count"] == 4
+    assert summary["alt_tags_missing"] == 2
+    assert summary["alt_coverage"] == 50.0
+    issues = summary["issues"]
+    assert issues["missing_meta_description"]["examples"] == [f"{base}/blog/a.html"]
+    assert issues["missing_h1"]["examples"] == [f"{base}/blog/b.html"]
+    assert issues["multiple_h1"]["examples"] == [f"{base}/about.html"]
+    assert sorted(issues["skipped_heading_levels"]["examples"]) == [f"{base}/blog/a.html", f"{base}/blog/b.html"]
+    assert [(group["text"], group["count"]) for group in issues["duplicate_titles"]] == [("Acme Blog", 2)]
+    assert [(group["text"], group["count"]) for group in issues["duplicate_meta_descriptions"]] == [("Acme makes anvils.", 2)]
+
+
+def test_max_pages_bounds_the_crawl(site_port):
+    crawler, pages = _crawl(f"http://127.0.0.1:{site_port}/", max_pages=2)
+    assert len(pages) == 2
+
+
+def test_home_redirect_to_another_site_is_not_followed(site_port):
+    crawler, pages = _crawl(f"http://localhost:{site_port}/")
+    # The other site's page is reported, not audited as the home page
+    assert pages == [{"url": f"http://localhost:{site_port}/",
+                      "error": f"Redirected off-site to 127.0.0.1:{site_port}", "success": False}]
+    assert (crawler.stats.pages_crawled, crawler.stats.pages_failed) == (0, 1)
+
+
+def test_site_stats_aggregates_pages():
+    stats = SiteStats()
+    stats.add({"url": "/a", "title": "Same", "meta_description": "", "headings": {"h1": ["A"], "h2": ["x"]},
+               "images_count": 2, "alt_tags_missing": 1})
+    stats.add({"url": "/b", "title": "Same", "meta_description": "Desc", "headings": {"h1": ["B"], "h4": ["y"]},
+               "images_count": 0, "alt_tags_missing": 0})
+    stats.add({"url": "/c", "error": "HTTP 500", "success": False})
+
+    summary = stats.summary()
+    assert (summary["pages_crawled"], summary["pages_failed"]) == (2, 1)
+    assert summary["alt_coverage"] == 50.0
+    assert summary["issues"]["missing_meta_description"] == {"count": 1, "examples": ["/a"]}
+    assert summary["issues"]["skipped_heading_levels"] == {"count": 1, "examples": ["/b"]}
+    assert summary["issues"]["duplicate_titles"] == [{"text": "Same", "count": 2, "urls": ["/a", "/b"]}]
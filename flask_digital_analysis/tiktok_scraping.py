@@ -6,10 +6,96 @@ from selenium.webdriver.common.keys import Keys
 from selenium.webdriver import ActionChains
 from selenium.common.exceptions import TimeoutException, StaleElementReferenceException
 import re, time, urllib.parse, os, json
-from selenium.webdriver.chrome.service import Service
-from webdriver_manager.chrome import ChromeDriverManager
 import logging
+import requests
+from collections import deque
 from concurrent.futures import ThreadPoolExecutor, as_completed
+from dom_extract import extract_fields
+from scrape_waits import wait_for_any
+from debug_capture import capture, capture_failure
+from browser_pool import BROWSER_ISOLATION, BrowserPool, get_pool, launch_chrome
+
+# "tabs" loads posts as tabs in a few pooled browsers; "browsers" leases one pooled browser per post
+TIKTOK_POST_MODE = os.environ.get("TIKTOK_POST_MODE", "tabs").lower()
+TIKTOK_POST_BROWSERS = int(os.environ.get("TIKTOK_POST_BROWSERS", 2))
+TIKTOK_TABS_PER_BROWSER = int(os.environ.get("TIKTOK_TABS_PER_BROWSER", 4))
+# Try plain HTTP fetches of post pages (reading their hydration JSON) before opening any browser tab
+TIKTOK_HTTP_FAST_PATH = os.environ.get("TIKTOK_HTTP_FAST_PATH", "true").lower() == "true"
+TIKTOK_USER_AGENT = (
+    "Mozilla/5.0 (Windows NT 10.0; Win64; x64) "
+    "AppleWebKit/537.36 (KHTML, like Gecko) Chrome/132.0.0.0 Safari/537.36"
+)
+
+# Server-rendered hydration state holding exact profile and post stats; SIGI_STATE is the older layout
+STATE_SCRIPT_IDS = ["__UNIVERSAL_DATA_FOR_REHYDRATION__", "SIGI_STATE"]
+_STATE_SCRIPT_RE = re.compile(r'<script[^>]*\bid="(?:__UNIVERSAL_DATA_FOR_REHYDRATION__|SIGI_STATE)"[^>]*>(.*?)</script>', re.S)
+_READ_STATE_JS = """
+for (const id of arguments[0]) {
+    const script = document.getElementById(id);
+    if (script && script.textContent) return script.textContent;
+}
+return null;
+"""
+
+# Selector fallbacks per field, read in a single script call (see dom_extract)
+POST_FIELDS = {
+    "fields": {
+        "caption": {"selectors": [
+            '[data-e2e="browse-video-desc"]',
+            '[data-e2e="video-desc"]',
+            'h1[data-e2e="browse-video-desc"]',
+            'xpath:(//div[contains(@class,"DivMainContent")]//p)[1]',
+            'xpath:(//div[contains(@class,"DivWrapper")]//p)[1]',
+            'span[data-e2e="view-video-desc"]',
+            # Photo-specific fallbacks
+            '[data-e2e="photo-desc"], [data-e2e="browse-photo-desc"]',
+            # Feed/explore layout selectors
+            'xpath:(//div[contains(@class,"DivSlideItemContainer")]//p)[1]',
+            'xpath:(//div[@class="DivContainer"]//p)[1]',
+            'p[data-e2e="video-desc"]'
+        ]},
+        "hashtags": {"selectors": ['a[href*="/tag/"]'], "all": True, "attr": "href", "within": "caption"},
+        "likes": {"selectors": [
+            'strong[data-e2e="like-count"]',
+            '[data-e2e="like-count"]',
+            '[data-e2e="video-like-count"]',
+            '[data-e2e*="photo"][data-e2e$="like-count"] strong'
+        ]},
+        "comments": {"selectors": [
+            'strong[data-e2e="comment-count"]',
+            '[data-e2e="comment-count"]',
+            '[data-e2e="video-comment-count"]',
+            '[data-e2e*="photo"][data-e2e$="comment-count"] strong'
+        ]},
+        "like_label": {"attr": "aria-label", "selectors": [
+            'xpath://button[.//span[@data-e2e="like-icon"] or .//span[contains(@data-e2e,"browse-like-icon")]]'
+        ]},
+        "comment_label": {"attr": "aria-label", "selectors": [
+            'xpath://button[.//span[@data-e2e="comment-icon"] or .//span[contains(@data-e2e,"browse-comment-icon")]]'
+        ]},
+        "like_button": {"selectors": ['xpath://button[.//span[contains(@data-e2e,"like")]]//strong']},
+        "comment_button": {"selectors": ['xpath://button[.//span[contains(@data-e2e,"comment")]]//strong']}
+    }
+}
+# Any of these means the post has rendered enough to read
+POST_READY_SELECTORS = [f"script#{script_id}" for script_id in STATE_SCRIPT_IDS] + [
+    '[data-e2e="browse-video-desc"]',
+    '[data-e2e="video-desc"]',
+    '[data-e2e="photo-desc"]',
+    '[data-e2e="browse-photo-desc"]',
+    '[data-e2e="like-count"]',
+    '[data-e2e="video-like-count"]'
+]
+
+PROFILE_FIELDS = {
+    "fields": {
+        "name": {"selectors": ['[data-e2e="user-title"] h1', 'h1[data-e2e="user-title"]', '[data-e2e="user-title"]']},
+        "following": {"selectors": ['[data-e2e="following-count"]']},
+        "followers": {"selectors": ['[data-e2e="followers-count"]']},
+        "likes": {"selectors": ['[data-e2e="likes-count"]']},
+        "bio": {"selectors": ['[data-e2e="user-bio"]']}
+    }
+}
 
 def to_western_digits(s: str) -> str:
     arabic_map  = str.maketrans("٠١٢٣٤٥٦٧٨٩", "0123456789")
@@ -34,17 +120,6 @@ def parse_count(s: str) -> int | None:
     except Exception:
         return None
 
-def get_text(driver, candidates, timeout: int = 6):
-    for by, sel in candidates:
-        try:
-            el = WebDriverWait(driver, timeout).until(EC.presence_of_element_located((by, sel)))
-            txt = (el.text or "").strip()
-            if txt:
-                return txt
-        except Exception:
-            pass
-    return ""
-
 def _parse_cookie_string(cookie_str: str):
     cookies = []
     for part in cookie_str.split(';'):
@@ -86,6 +161,65 @@ def load_tiktok_cookies():
 
     return []
 
+def parse_hydration_state(html: str) -> dict | None:
+    m = _STATE_SCRIPT_RE.search(html or "")
+    if not m:
+        return None
+    try:
+        return json.loads(m.group(1))
+    except ValueError:
+        return None
+
+def read_hydration_state(driver) -> dict | None:
+    """The open page's hydration JSON, read from its script tag without pulling the whole page source"""
+    try:
+        raw = driver.execute_script(_READ_STATE_JS, STATE_SCRIPT_IDS)
+        return json.loads(raw) if raw else None
+    except Exception:
+        return None
+
+def profile_from_state(state: dict | None, username: str) -> dict | None:
+    if not state:
+        return None
+    info = state.get("__DEFAULT_SCOPE__", {}).get("webapp.user-detail", {}).get("userInfo")
+    if info:
+        user, stats = info.get("user") or {}, info.get("stats") or {}
+    else:
+        users = state.get("UserModule", {})
+        user, stats = users.get("users", {}).get(username) or {}, users.get("stats", {}).get(username) or {}
+    if not user or not stats:
+        return None
+    return {
+        "username": username,
+        "name": user.get("nickname") or user.get("uniqueId") or "",
+        "following": stats.get("followingCount"),
+        "followers": stats.get("followerCount"),
+        "likes_total": stats.get("heartCount", stats.get("heart")),
+        "bio": user.get("signature") or "",
+    }
+
+def post_from_state(state: dict | None, url: str) -> dict | None:
+    if not state:
+        return None
+    item = state.get("__DEFAULT_SCOPE__", {}).get("webapp.video-detail", {}).get("itemInfo", {}).get("itemStruct")
+    if not item:
+        post_id = urllib.parse.urlparse(url).path.rstrip("/").split("/")[-1]
+        item = state.get("ItemModule", {}).get(post_id)
+    stats = (item or {}).get("stats") or {}
+    if "diggCount" not in stats:
+        return None
+    hashtags = ["#" + tag["hashtagName"] for tag in item.get("textExtra") or [] if tag.get("hashtagName")]
+    hashtags += ["#" + challenge["title"] for challenge in item.get("challenges") or [] if challenge.get("title")]
+    likes, comments = stats.get("diggCount"), stats.get("commentCount")
+    return {
+        "url": url,
+        "caption": item.get("desc") or "",
+        "hashtags": list(dict.fromkeys(hashtags)),
+        "likes": likes,
+        "comments": comments,
+        "raw_text": {"likes": "" if likes is None else str(likes), "comments": "" if comments is None else str(comments)}
+    }
+
 def ensure_post_grid(wait):
     return wait.until(EC.presence_of_element_located((By.CSS_SELECTOR, '[data-e2e="user-post-item-list"]')))
 
@@ -166,161 +300,64 @@ def scroll_grid_and_collect_links(driver, wait, limit=None, max_scrolls=300, idl
 
     return list(links)
 
+def _count_from_label(label: str, noun: str) -> str:
+    m = re.search(r'([\d\s,\.KMB]+)\s+' + noun, label or "", re.I)
+    return m.group(1) if m else ""
+
+def extract_post(driver, url):
+    """Read caption, hashtags, likes and comments of the open post page from its hydration JSON, else from the DOM"""
+    wait_for_any(driver, POST_READY_SELECTORS, timeout=8)
+    post = post_from_state(read_hydration_state(driver), url)
+    if post:
+        return post
+
+    fields = extract_fields(driver, POST_FIELDS)[0]
+
+    hashtags = []
+    for tag in fields["hashtags"]:
+        txt = tag["text"]
+        if txt.startswith("#"):
+            hashtags.append(txt)
+        elif "/tag/" in tag["value"]:
+            name = urllib.parse.urlparse(tag["value"]).path.split("/tag/")[1].strip("/")
+            if name: hashtags.append("#"+name)
+
+    like_txt = fields["likes"] or _count_from_label(fields["like_label"], "Like") or fields["like_button"]
+    comment_txt = fields["comments"] or _count_from_label(fields["comment_label"], "Comment") or fields["comment_button"]
+    if not fields["caption"] and not like_txt:
+        capture_failure(driver, "tiktok_post")
+    return {
+        "url": url,
+        "caption": fields["caption"],
+        "hashtags": list(dict.fromkeys(hashtags)),
+        "likes": parse_count(like_txt),
+        "comments": parse_count(comment_txt),
+        "raw_text": {"likes": like_txt or "", "comments": comment_txt or ""}
+    }
+
 def scrape_video_page(driver, url, wait, timeout=25):
     print(f"Scraping video page: {url}")
+    origin = driver.current_window_handle
     driver.execute_script("window.open(arguments[0], '_blank');", url)
     driver.switch_to.window(driver.window_handles[-1])
     # Force desktop viewport to avoid mobile/explore mode
     driver.set_window_size(1920, 1080)
-    driver.save_screenshot('video.png')
-    with open('video.html', 'w', encoding='utf-8') as f:
-        f.write(driver.page_source)
-    logging.critical("Saved debug screenshot and HTML. Check video.png!")
-    def scroll_into_view(el):
-        try:
-            driver.execute_script("arguments[0].scrollIntoView({block:'center'});", el)
-            time.sleep(0.05)
-        except Exception:
-            pass
-
+    capture(driver, "video")
     try:
-        # Try multiple selectors for caption across different TikTok layouts
-        caption_text, hashtags = "", []
-        caption_el = None
-
-        # Desktop full-page layout selectors
-        for by, sel in [
-            (By.CSS_SELECTOR, '[data-e2e="browse-video-desc"]'),
-            (By.XPATH, '//*[@data-e2e="browse-video-desc"]'),
-            (By.XPATH, '//*[@data-e2e="video-desc"]'),
-            (By.CSS_SELECTOR, 'h1[data-e2e="browse-video-desc"]'),
-            (By.XPATH, '(//div[contains(@class,"DivMainContent")]//p)[1]'),
-            (By.XPATH, '(//div[contains(@class,"DivWrapper")]//p)[1]'),
-            (By.CSS_SELECTOR, 'span[data-e2e="view-video-desc"]'),
-            # Photo-specific fallbacks
-            (By.CSS_SELECTOR, '[data-e2e="photo-desc"], [data-e2e="browse-photo-desc"]'),
-            # Feed/explore layout selectors
-            (By.XPATH, '(//div[contains(@class,"DivSlideItemContainer")]//p)[1]'),
-            (By.XPATH, '(//div[@class="DivContainer"]//p)[1]'),
-            (By.CSS_SELECTOR, 'p[data-e2e="video-desc"]')
-        ]:
-            try:
-                caption_el = WebDriverWait(driver, 2).until(
-                    EC.presence_of_element_located((by, sel))
-                ); break
-            except TimeoutException:
-                continue
-
-        if caption_el:
-            scroll_into_view(caption_el)
-            try:
-                caption_text = (caption_el.text or "").strip()
-                tag_container = caption_el
-            except Exception:
-                caption_text = ""
-                tag_container = caption_el
-            # hashtags
-            try:
-                tag_els = tag_container.find_elements(By.XPATH, './/a[contains(@href, "/tag/")]')
-                for t in tag_els:
-                    txt = (t.text or "").strip()
-                    if txt.startswith("#"):
-                        hashtags.append(txt)
-                    else:
-                        href = t.get_attribute("href") or ""
-                        if "/tag/" in href:
-                            tag = urllib.parse.urlparse(href).path.split("/tag/")[1].strip("/")
-                            if tag: hashtags.append("#"+tag)
-            except Exception:
-                pass
-
-        like_txt = ""
-        comment_txt = ""
-
-        # Try multiple selectors for engagement metrics across layouts
-        for by, sel in [
-            (By.CSS_SELECTOR, 'strong[data-e2e="like-count"]'),
-            (By.XPATH, '//strong[@data-e2e="like-count"]'),
-            (By.XPATH, '//*[@data-e2e="like-count"]'),
-            (By.CSS_SELECTOR, '[data-e2e="video-like-count"]'),
-            (By.CSS_SELECTOR, 'div[data-e2e="video-like-count"]'),
-            # Photo fallbacks
-            (By.CSS_SELECTOR, '[data-e2e*="photo"][data-e2e$="like-count"] strong')
-        ]:
-            try:
-                el = WebDriverWait(driver, 2).until(EC.presence_of_element_located((by, sel)))
-                scroll_into_view(el); like_txt = (el.text or "").strip()
-                if like_txt: break
-            except TimeoutException:
-                pass
-
-        for by, sel in [
-            (By.CSS_SELECTOR, 'strong[data-e2e="comment-count"]'),
-            (By.XPATH, '//strong[@data-e2e="comment-count"]'),
-            (By.XPATH, '//*[@data-e2e="comment-count"]'),
-            (By.CSS_SELECTOR, '[data-e2e="video-comment-count"]'),
-            (By.CSS_SELECTOR, 'div[data-e2e="video-comment-count"]'),
-            # Photo fallbacks
-            (By.CSS_SELECTOR, '[data-e2e*="photo"][data-e2e$="comment-count"] strong')
-        ]:
-            try:
-                el = WebDriverWait(driver, 2).until(EC.presence_of_element_located((by, sel)))
-                scroll_into_view(el); comment_txt = (el.text or "").strip()
-                if comment_txt: break
-            except TimeoutException:
-                pass
+        post = extract_post(driver, url)
 
-        if not like_txt:
-            try:
-                btn = driver.find_element(By.XPATH, '//button[.//span[@data-e2e="like-icon"] or .//span[contains(@data-e2e,"browse-like-icon")]]')
-                scroll_into_view(btn)
-                aria = (btn.get_attribute("aria-label") or "")
-                m = re.search(r'([\d\s,\.KMB]+)\s+Like', aria, re.I)
-                if m: like_txt = m.group(1)
-            except Exception: pass
-
-        if not comment_txt:
-            try:
-                btn = driver.find_element(By.XPATH, '//button[.//span[@data-e2e="comment-icon"] or .//span[contains(@data-e2e,"browse-comment-icon")]]')
-                scroll_into_view(btn)
-                aria = (btn.get_attribute("aria-label") or "")
-                m = re.search(r'([\d\s,\.KMB]+)\s+Comment', aria, re.I)
-                if m: comment_txt = m.group(1)
-            except Exception: pass
-
-        if not like_txt:
-            try:
-                el = driver.find_element(By.XPATH, '//button[.//span[contains(@data-e2e,"like")]]//strong')
-                scroll_into_view(el); like_txt = (el.text or "").strip()
-            except Exception: pass
-        if not comment_txt:
-            try:
-                el = driver.find_element(By.XPATH, '//button[.//span[contains(@data-e2e,"comment")]]//strong')                
-                scroll_into_view(el); comment_txt = (el.text or "").strip()
-            except Exception: pass
-        
         if "/photo/" in url:
-            driver.save_screenshot('photo_metrics.png')
-            with open('photo_metrics.html', 'w', encoding='utf-8') as f:
-                f.write(driver.page_source)
-            logging.critical("Saved debug screenshot and HTML for photo page. Check photo_metrics.png!")
-        print(f"Caption: {caption_text}")
-        print(f"Hashtags: {hashtags}")
-        print(f"Likes: {like_txt}")
-        print(f"Comments: {comment_txt}")
+            capture(driver, "photo_metrics")
+        print(f"Caption: {post['caption']}")
+        print(f"Hashtags: {post['hashtags']}")
+        print(f"Likes: {post['raw_text']['likes']}")
+        print(f"Comments: {post['raw_text']['comments']}")
         print("--------------------------------")
-        return {
-            "url": url,
-            "caption": caption_text,
-            "hashtags": list(dict.fromkeys(hashtags)),
-            "likes": parse_count(like_txt),
-            "comments": parse_count(comment_txt),
-            "raw_text": {"likes": like_txt or "", "comments": comment_txt or ""}
-        }
+        return post
 
     finally:
         driver.close()
-        driver.switch_to.window(driver.window_handles[0])
+        driver.switch_to.window(origin)
 
 
 
@@ -341,132 +378,150 @@ def _build_chrome_options(headless: bool):
     opts.add_argument("--window-size=1920,1080")
     opts.add_argument("--disable-dev-shm-usage")
     opts.add_argument("--disable-gpu")
-    opts.add_argument(
-        "--user-agent=Mozilla/5.0 (Windows NT 10.0; Win64; x64) "
-        "AppleWebKit/537.36 (KHTML, like Gecko) Chrome/132.0.0.0 Safari/537.36"
-    )
+    opts.add_argument(f"--user-agent={TIKTOK_USER_AGENT}")
     user_data_dir = os.environ.get("TIKTOK_USER_DATA_DIR", "").strip()
     if user_data_dir:
         opts.add_argument(f"--user-data-dir={user_data_dir}")
     return opts
 
 
-def _scrape_post_standalone(url: str, *, headless: bool) -> dict:
-    opts = _build_chrome_options(headless=headless)
-    driver = webdriver.Chrome(options=opts, service=Service(ChromeDriverManager().install()))
+def _launch_browser(headless: bool):
+    driver = launch_chrome(_build_chrome_options(headless=headless))
     try:
-        try:
-            driver.set_page_load_timeout(25)
-        except Exception:
-            pass
-        wait = WebDriverWait(driver, 12)
+        driver.set_page_load_timeout(25)
+    except Exception:
+        pass
+    return driver
+
+
+def _browser_pool(kind: str, headless: bool) -> BrowserPool:
+    # A persistent TIKTOK_USER_DATA_DIR profile has to be used as-is, not from a throwaway context
+    isolation = "none" if os.environ.get("TIKTOK_USER_DATA_DIR", "").strip() else BROWSER_ISOLATION
+    mode = "headless" if headless else "headed"
+    return get_pool(f"tiktok {kind} browser ({mode})", lambda: _launch_browser(headless), isolation=isolation)
+
+
+def _scrape_post_standalone(url: str, *, headless: bool) -> dict:
+    with _browser_pool("post", headless).lease() as driver:
         driver.set_window_size(1920, 1080)
         driver.get(url)
 
-        # Use the same logic paths as in scrape_video_page, inline to avoid window juggling
-        def scroll_into_view(el):
-            try:
-                driver.execute_script("arguments[0].scrollIntoView({block:'center'});", el)
-                time.sleep(0.05)
-            except Exception:
-                pass
+        return extract_post(driver, url)
+
+
+def _scrape_posts_in_tabs(links: list, *, headless: bool, tabs: int = TIKTOK_TABS_PER_BROWSER) -> list:
+    """
+    Scrape posts in one pooled browser, keeping up to `tabs` posts loading at once. WebDriver
+    commands are serialized per browser, so tabs are read round-robin: while one is extracted
+    the others keep loading, and each read tab is navigated straight to the next link.
+    """
+    pending = deque(links)
+    posts = []
+    with _browser_pool("post", headless).lease() as driver:
+        origin = driver.current_window_handle
+        loading = {}
+        for _ in range(min(tabs, len(pending))):
+            known = set(driver.window_handles)
+            url = pending.popleft()
+            driver.execute_script("window.open(arguments[0], '_blank');", url)
+            handle = next(h for h in driver.window_handles if h not in known)
+            loading[handle] = url
+
+        while loading:
+            for handle, url in list(loading.items()):
+                driver.switch_to.window(handle)
+                try:
+                    # A reused tab still shows the previous post until its navigation commits
+                    WebDriverWait(driver, 15).until(lambda d: not d.execute_script("return window.__postRead === true"))
+                    posts.append(extract_post(driver, url))
+                except Exception as e:
+                    posts.append({"url": url, "error": str(e)})
+                if pending:
+                    loading[handle] = pending.popleft()
+                    driver.execute_script("window.__postRead = true; window.location.href = arguments[0];", loading[handle])
+                else:
+                    driver.close()
+                    del loading[handle]
+        driver.switch_to.window(origin)
+    return posts
+
+
+def _fetch_post_http(session: requests.Session, url: str) -> dict | None:
+    try:
+        resp = session.get(url, timeout=10)
+        if resp.status_code != 200:
+            return None
+        return post_from_state(parse_hydration_state(resp.text), url)
+    except requests.RequestException:
+        return None
 
-        caption_text, hashtags = "", []
-        caption_el = None
-        for by, sel in [
-            (By.CSS_SELECTOR, '[data-e2e="browse-video-desc"]'),
-            (By.XPATH, '//*[@data-e2e="browse-video-desc"]'),
-            (By.XPATH, '//*[@data-e2e="video-desc"]'),
-            (By.CSS_SELECTOR, 'h1[data-e2e="browse-video-desc"]'),
-            (By.XPATH, '(//div[contains(@class, "DivMainContent")]//p)[1]'),
-            (By.XPATH, '(//div[contains(@class, "DivWrapper")]//p)[1]'),
-            (By.CSS_SELECTOR, 'span[data-e2e="view-video-desc"]'),
-            (By.CSS_SELECTOR, '[data-e2e="photo-desc"], [data-e2e="browse-photo-desc"]'),
-            (By.CSS_SELECTOR, 'p[data-e2e="video-desc"]'),
-        ]:
-            try:
-                caption_el = WebDriverWait(driver, 2).until(EC.presence_of_element_located((by, sel)))
-                break
-            except TimeoutException:
-                continue
-        if caption_el:
-            scroll_into_view(caption_el)
-            try:
-                caption_text = (caption_el.text or "").strip()
-                tag_container = caption_el
-            except Exception:
-                caption_text = ""
-                tag_container = caption_el
-            try:
-                tag_els = tag_container.find_elements(By.XPATH, './/a[contains(@href, "/tag/")]')
-                for t in tag_els:
-                    txt = (t.text or "").strip()
-                    if txt.startswith("#"):
-                        hashtags.append(txt)
-                    else:
-                        href = t.get_attribute("href") or ""
-                        if "/tag/" in href:
-                            tag = urllib.parse.urlparse(href).path.split("/tag/")[1].strip("/")
-                            if tag: hashtags.append("#"+tag)
-            except Exception:
-                pass
-        like_txt = ""
-        comment_txt = ""
-        for by, sel in [
-            (By.CSS_SELECTOR, 'strong[data-e2e="like-count"]'),
-            (By.XPATH, '//strong[@data-e2e="like-count"]'),
-            (By.XPATH, '//*[@data-e2e="like-count"]'),
-            (By.CSS_SELECTOR, '[data-e2e="video-like-count"]'),
-            (By.CSS_SELECTOR, 'div[data-e2e="video-like-count"]'),
-            (By.CSS_SELECTOR, '[data-e2e*="photo"][data-e2e$="like-count"] strong'),
-        ]:
-            try:
-                el = WebDriverWait(driver, 2).until(EC.presence_of_element_located((by, sel)))
-                scroll_into_view(el); like_txt = (el.text or "").strip()
-                if like_txt: break
-            except TimeoutException:
-                pass
-        for by, sel in [
-            (By.CSS_SELECTOR, 'strong[data-e2e="comment-count"]'),
-            (By.XPATH, '//strong[@data-e2e="comment-count"]'),
-            (By.XPATH, '//*[@data-e2e="comment-count"]'),
-            (By.CSS_SELECTOR, '[data-e2e="video-comment-count"]'),
-            (By.CSS_SELECTOR, 'div[data-e2e="video-comment-count"]'),
-            (By.CSS_SELECTOR, '[data-e2e*="photo"][data-e2e$="comment-count"] strong'),
-        ]:
+
+def _fetch_posts_http(links: list) -> dict:
+    """Posts whose page HTML already carries the hydration JSON, keyed by URL; the rest need a browser"""
+    session = requests.Session()
+    session.headers.update({"User-Agent": TIKTOK_USER_AGENT, "Accept-Language": "en-US,en;q=0.9"})
+    for ck in load_tiktok_cookies():
+        if ck.get("name"):
+            session.cookies.set(ck["name"], ck.get("value", ""), domain=ck.get("domain", ".tiktok.com"), path=ck.get("path", "/"))
+    with session, ThreadPoolExecutor(max_workers=min(8, len(links))) as pool:
+        results = zip(links, pool.map(lambda link: _fetch_post_http(session, link), links))
+        return {link: post for link, post in results if post}
+
+
+def _scrape_posts(links: list, *, headless: bool) -> list:
+    fetched = _fetch_posts_http(links) if TIKTOK_HTTP_FAST_PATH else {}
+    remaining = [link for link in links if link not in fetched]
+    if fetched:
+        logging.info(f"Read {len(fetched)}/{len(links)} TikTok posts over HTTP, {len(remaining)} left for the browser")
+    posts = list(fetched.values())
+    if remaining:
+        posts.extend(_scrape_posts_in_browsers(remaining, headless=headless))
+    return posts
+
+
+def _scrape_posts_in_browsers(links: list, *, headless: bool) -> list:
+    posts = []
+    if TIKTOK_POST_MODE == "tabs":
+        browsers = max(1, min(TIKTOK_POST_BROWSERS, _browser_pool("post", headless).size, len(links)))
+        shares = [links[i::browsers] for i in range(browsers)]
+        with ThreadPoolExecutor(max_workers=browsers) as pool:
+            futures = {pool.submit(_scrape_posts_in_tabs, share, headless=headless): share for share in shares}
+            for fut in as_completed(futures):
+                try:
+                    posts.extend(fut.result())
+                except Exception as e:
+                    # The browser failed outright; report every post it had not returned yet
+                    posts.extend({"url": link, "error": str(e)} for link in futures[fut])
+        return posts
+
+    # Parallel scrape over the pooled post browsers; more workers than browsers would only queue
+    workers = max(1, min(8, _browser_pool("post", headless).size))
+
+    if workers == 1:
+        for link in links:
             try:
-                el = WebDriverWait(driver, 2).until(EC.presence_of_element_located((by, sel)))
-                scroll_into_view(el); comment_txt = (el.text or "").strip()
-                if comment_txt: break
-            except TimeoutException:
-                pass
-        return {
-            "url": url,
-            "caption": caption_text,
-            "hashtags": list(dict.fromkeys(hashtags)),
-            "likes": parse_count(like_txt),
-            "comments": parse_count(comment_txt),
-            "raw_text": {"likes": like_txt or "", "comments": comment_txt or ""}
-        }
-    finally:
-        try:
-            driver.quit()
-        except Exception:
-            pass
+                posts.append(_scrape_post_standalone(link, headless=headless))
+            except Exception as e:
+                posts.append({"url": link, "error": str(e)})
+            time.sleep(0.1)
+    else:
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            futures = {pool.submit(_scrape_post_standalone, link, headless=headless): link for link in links}
+            for fut in as_completed(futures):
+                link = futures[fut]
+                try:
+                    posts.append(fut.result())
+                except Exception as e:
+                    posts.append({"url": link, "error": str(e)})
+    return posts
 
 
-def scrape_profile_and_posts(username: str, *, headless: bool = False, max_posts: int | None = 12):
+def scrape_profile_and_posts(username: str, *, headless: bool = False, max_posts: int | None = 12, known_posts: dict | None = None):
+    """known_posts maps post URL to an already scraped post; those posts are reused instead of scraped again"""
     profile_url = f"https://www.tiktok.com/@{username}"
 
-    opts = _build_chrome_options(headless=headless)
-    driver = webdriver.Chrome(options=opts, service=Service(ChromeDriverManager().install()))
-    try:
-        driver.set_page_load_timeout(25)
-    except Exception:
-        pass
-    wait = WebDriverWait(driver, 12)
-
-    try:
+    with _browser_pool("profile", headless).lease() as driver:
+        wait = WebDriverWait(driver, 12)
         driver.get("https://www.tiktok.com/")
         cookies = load_tiktok_cookies()
         for ck in cookies:
@@ -481,10 +536,7 @@ def scrape_profile_and_posts(username: str, *, headless: bool = False, max_posts
                 continue
 
         driver.get(profile_url)
-        driver.save_screenshot('cookies.png')
-        with open('cookies.html', 'w', encoding='utf-8') as f:
-                f.write(driver.page_source)
-        logging.critical("Saved debug screenshot and HTML. Check cookies.png!")
+        capture(driver, "cookies")
         for sel in [
             (By.CSS_SELECTOR, 'button[data-e2e="privacy-center-accept"]'),
             (By.XPATH, '//button[contains(., "Accept")]'),
@@ -494,82 +546,37 @@ def scrape_profile_and_posts(username: str, *, headless: bool = False, max_posts
                 break
             except Exception:
                 pass
-        driver.save_screenshot('profile.png')
-        with open('profile.html', 'w', encoding='utf-8') as f:
-                f.write(driver.page_source)
-        logging.critical("Saved debug screenshot and HTML. Check profile.png!")
-        name = get_text(driver, [
-            (By.CSS_SELECTOR, '[data-e2e="user-title"] h1'),
-            (By.CSS_SELECTOR, 'h1[data-e2e="user-title"]'),
-            (By.CSS_SELECTOR, '[data-e2e="user-title"]'),
-        ])
-        following_txt = get_text(driver, [
-            (By.CSS_SELECTOR, '[data-e2e="following-count"]'),
-            (By.XPATH, '//*[@data-e2e="following-count"]'),
-        ])
-        followers_txt = get_text(driver, [
-            (By.CSS_SELECTOR, '[data-e2e="followers-count"]'),
-            (By.XPATH, '//*[@data-e2e="followers-count"]'),
-        ])
-        likes_txt = get_text(driver, [
-            (By.CSS_SELECTOR, '[data-e2e="likes-count"]'),
-            (By.XPATH, '//*[@data-e2e="likes-count"]'),
-        ])
-        bio = get_text(driver, [
-            (By.CSS_SELECTOR, '[data-e2e="user-bio"]'),
-            (By.XPATH, '//*[@data-e2e="user-bio"]'),
-        ])
+        capture(driver, "profile")
+        profile = profile_from_state(read_hydration_state(driver), username)
+        if profile is None:
+            wait_for_any(driver, ['[data-e2e="user-title"]', '[data-e2e="followers-count"]'], timeout=6)
+            profile_fields = extract_fields(driver, PROFILE_FIELDS)[0]
+            profile = {
+                "username": username,
+                "name": profile_fields["name"],
+                "following": parse_count(profile_fields["following"]),
+                "followers": parse_count(profile_fields["followers"]),
+                "likes_total": parse_count(profile_fields["likes"]),
+                "bio": profile_fields["bio"],
+            }
 
         links = scroll_grid_and_collect_links(driver, wait, limit=max_posts)
-        posts = []
-
-        # Parallel scrape using separate lightweight drivers for each post
-        max_workers_env = 8
-        try:
-            workers = int(max_workers_env) if max_workers_env else 3
-        except Exception:
-            workers = 3
-        workers = max(1, min(8, workers))
-
-        if workers == 1:
-            for link in links:
-                try:
-                    posts.append(_scrape_post_standalone(link, headless=True))
-                except Exception as e:
-                    posts.append({"url": link, "error": str(e)})
-                time.sleep(0.1)
-        else:
-            with ThreadPoolExecutor(max_workers=workers) as pool:
-                futures = {pool.submit(_scrape_post_standalone, link, headless=True): link for link in links}
-                for fut in as_completed(futures):
-                    link = futures[fut]
-                    try:
-                        posts.append(fut.result())
-                    except Exception as e:
-                        posts.append({"url": link, "error": str(e)})
-        print(f"Scraped {len(posts)} posts from @{username}")
-        print("metrics:", {
-            "following": parse_count(following_txt),
-            "followers": parse_count(followers_txt),
-            "likes_total": parse_count(likes_txt),
-            "bio": bio,
-        })
-        return {
-            "profile": {
-                "username": username,
-                "name": name,
-                "following": parse_count(following_txt),
-                "followers": parse_count(followers_txt),
-                "likes_total": parse_count(likes_txt),
-                "bio": bio,
-            },
-            "post_count_scanned": len(posts),
-            "posts": posts
-        }
 
-    finally:
-        time.sleep(1)
-        driver.quit()
+    known_posts = known_posts or {}
+    new_links = [link for link in links if link not in known_posts]
+    posts = [known_posts[link] for link in links if link in known_posts]
+    if posts:
+        logging.info(f"Reusing {len(posts)} cached posts for @{username}, scraping {len(new_links)}")
+    if new_links:
+        posts.extend(_scrape_posts(new_links, headless=True))
+
+    print(f"Scraped {len(posts)} posts from @{username}")
+    print("metrics:", {key: profile[key] for key in ("following", "followers", "likes_total", "bio")})
+    return {
+        "profile": profile,
+        "post_count_scanned": len(posts),
+        "posts": posts
+    }
 
 if __name__ == "__main__":
     data = scrape_profile_and_posts("thetransformix", headless=False, max_posts=100)
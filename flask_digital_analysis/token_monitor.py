@@ -285,8 +285,9 @@ class TokenMonitor:
                 metadata={"max_tokens": max_tokens}
             )
             
-            # Log to MLflow
-            self._log_to_mlflow(llm_call, experiment_name=experiment_name)
+            # Log to MLflow; its HTTP calls (and retries while the server is down) block, so keep
+            # them off the worker loop shared by every concurrent analysis
+            await asyncio.to_thread(self._log_to_mlflow, llm_call, experiment_name=experiment_name)
             
             # Update totals
             self.total_cost += total_cost
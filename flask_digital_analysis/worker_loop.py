@@ -0,0 +1,71 @@
+"""
+The worker's persistent event loop.
+One asyncio loop runs for the life of the process on a background thread, and Flask's request
+threads hand their coroutines to it. Async resources created on it (the HTTP session, tasks,
+caches) are shared by every request, and concurrent requests run their analyses side by side
+on the one loop instead of each spinning up and tearing down a private loop.
+
+Code scheduled here must not block: Selenium, model inference and other sync work goes through
+asyncio.to_thread / run_in_executor.
+"""
+
+import atexit
+import asyncio
+import logging
+import threading
+from typing import Any, AsyncIterator, Awaitable, Iterator, Optional, Tuple, TypeVar
+
+T = TypeVar("T")
+
+_loop: Optional[asyncio.AbstractEventLoop] = None
+_loop_lock = threading.Lock()
+
+
+def _stop(loop: asyncio.AbstractEventLoop) -> None:
+    loop.call_soon_threadsafe(loop.stop)
+
+
+def get_loop() -> asyncio.AbstractEventLoop:
+    """The worker's loop, started on first use"""
+    global _loop
+    if _loop is not None:
+        return _loop
+    with _loop_lock:
+        if _loop is None:
+            loop = asyncio.new_event_loop()
+            threading.Thread(target=loop.run_forever, name="worker-loop", daemon=True).start()
+            atexit.register(_stop, loop)
+            _loop = loop
+    return _loop
+
+
+def run(coro: Awaitable[T], timeout: Optional[float] = None) -> T:
+    """Run a coroutine on the worker loop and block the calling (non-loop) thread for its result"""
+    return asyncio.run_coroutine_threadsafe(coro, get_loop()).result(timeout)
+
+
+async def _next_chunk(agen: AsyncIterator[T]) -> Tuple[bool, Any]:
+    try:
+        return False, await agen.__anext__()
+    except StopAsyncIteration:
+        return True, None
+
+
+def iterate(agen: AsyncIterator[T]) -> Iterator[T]:
+    """
+    Drive an async generator on the worker loop from a sync generator (a Flask streaming response).
+    Each item is produced on the loop and handed to the calling thread; if the consumer stops early
+    (client disconnect) the async generator is closed on the loop so its cleanup runs.
+    """
+    loop = get_loop()
+    try:
+        while True:
+            done, chunk = asyncio.run_coroutine_threadsafe(_next_chunk(agen), loop).result()
+            if done:
+                return
+            yield chunk
+    finally:
+        try:
+            asyncio.run_coroutine_threadsafe(agen.aclose(), loop).result(timeout=5)
+        except Exception as error:
+            logging.warning(f"Could not close async generator cleanly: {error}")